@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the monitor's parsing and sampling hot paths.
+
+Usage:
+    python3 bench/run.py                         # default sizes, table + bench-results.json
+    python3 bench/run.py --sizes 1M,64M,1G       # larger session/log files
+    python3 bench/run.py --tree-files 20000      # bigger session tree
+    python3 bench/run.py --only observe,log      # subset (substring match on bench names)
+    python3 bench/run.py --compare old.json      # ratios against a previous results file
+
+Synthetic data is generated under --data (a temp dir by default; pass a
+fixed path to reuse it between runs). CODEX_HOME and XDG_CACHE_HOME point
+into that directory, so the real ~/.codex is never read.
+
+For every benchmark the results file records latency percentiles (ms),
+the tracemalloc peak of one extra traced iteration, and per-iteration
+read/write syscalls (from /proc/self/io) and spawned subprocesses.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO / "lib"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synth import make_session_tree, write_session, write_tui_log, turn_lines  # noqa: E402
+
+
+_spawned = 0
+_popen_init = subprocess.Popen.__init__
+
+
+def _counting_popen_init(self, *args, **kwargs):
+    global _spawned
+    _spawned += 1
+    _popen_init(self, *args, **kwargs)
+
+
+def _syscalls() -> Optional[int]:
+    try:
+        with open("/proc/self/io", "rb") as f:
+            fields = dict(line.split(b":", 1) for line in f.read().splitlines() if b":" in line)
+        return int(fields[b"syscr"]) + int(fields[b"syscw"])
+    except Exception:
+        return None
+
+
+def parse_size(s: str) -> int:
+    s = s.strip().upper().rstrip("B")
+    mult = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}.get(s[-1:], 1)
+    return int(float(s[:-1] if s[-1:] in "KMG" else s) * mult)
+
+
+def size_label(n: int) -> str:
+    for unit, mult in (("G", 1 << 30), ("M", 1 << 20), ("K", 1 << 10)):
+        if n >= mult and n % mult == 0:
+            return f"{n // mult}{unit}"
+    return str(n)
+
+
+def percentile(sorted_vals: List[float], p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = (len(sorted_vals) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+Setup = Optional[Callable[[], Any]]
+
+
+def measure(fn: Callable[[Any], Any], setup: Setup = None, repeat: int = 20, warmup: int = 1) -> Dict[str, Any]:
+    """Times `fn(setup())`; setup cost is excluded from every counter."""
+    global _spawned
+    for _ in range(warmup):
+        fn(setup() if setup else None)
+
+    times: List[float] = []
+    syscalls = 0
+    have_syscalls = _syscalls() is not None
+    spawned = 0
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        sc0, sp0 = _syscalls(), _spawned
+        t0 = time.perf_counter()
+        fn(arg)
+        dt = time.perf_counter() - t0
+        sc1, sp1 = _syscalls(), _spawned
+        times.append(dt * 1000)
+        if have_syscalls:
+            syscalls += sc1 - sc0
+        spawned += sp1 - sp0
+
+    arg = setup() if setup else None
+    tracemalloc.start()
+    try:
+        fn(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    times.sort()
+    return {
+        "n": repeat,
+        "mean_ms": sum(times) / len(times),
+        "min_ms": times[0],
+        "p50_ms": percentile(times, 50),
+        "p90_ms": percentile(times, 90),
+        "p99_ms": percentile(times, 99),
+        "max_ms": times[-1],
+        "peak_kb": peak / 1024,
+        "syscalls": syscalls / repeat if have_syscalls else None,
+        "subprocesses": spawned / repeat,
+    }
+
+
+class Bench:
+    def __init__(self, data: Path, sizes: List[int], tree_files: int, repeat: int):
+        self.data = data
+        self.sizes = sizes
+        self.tree_files = tree_files
+        self.repeat = repeat
+        self.home = data / "codex"
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.failures: List[str] = []
+        self._children: List[subprocess.Popen] = []
+
+    # ---- data --------------------------------------------------------------
+
+    def session_file(self, size: int) -> Path:
+        path = self.data / "sessions" / f"session-{size_label(size)}.jsonl"
+        if not path.exists():
+            print(f"  generating {path.name} ...", file=sys.stderr)
+            tmp = path.with_suffix(".tmp")
+            write_session(tmp, size, seed=size)
+            tmp.replace(path)
+        return path
+
+    def log_file(self, size: int) -> Path:
+        path = self.data / "logs" / f"codex-tui-{size_label(size)}.log"
+        if not path.exists():
+            print(f"  generating {path.name} ...", file=sys.stderr)
+            tmp = path.with_suffix(".tmp")
+            write_tui_log(tmp, size, seed=size)
+            tmp.replace(path)
+        return path
+
+    def session_tree(self) -> Path:
+        root = self.home / "sessions"
+        marker = self.home / f".tree-{self.tree_files}"
+        if not marker.exists():
+            print(f"  generating {self.tree_files} session files ...", file=sys.stderr)
+            shutil.rmtree(root, ignore_errors=True)
+            make_session_tree(root, self.tree_files)
+            for old in self.home.glob(".tree-*"):
+                old.unlink()
+            marker.touch()
+        return root
+
+    def spawn_tree(self, width: int = 4) -> subprocess.Popen:
+        """A long-running shell with `width` sleeping children, standing in for Codex."""
+        script = " ".join(["sleep 600 &"] * width) + " wait"
+        p = subprocess.Popen(["sh", "-c", script], cwd=str(self.data), start_new_session=True)
+        self._children.append(p)
+        time.sleep(0.1)
+        return p
+
+    def cleanup(self) -> None:
+        for p in self._children:
+            try:
+                os.killpg(p.pid, 15)
+            except Exception:
+                pass
+            p.wait()
+
+    # ---- benchmarks --------------------------------------------------------
+
+    def record(self, name: str, fn: Callable[[Any], Any], setup: Setup = None, repeat: Optional[int] = None) -> None:
+        res = measure(fn, setup, repeat=repeat or self.repeat)
+        self.results[name] = res
+        print(f"{name:<40} p50 {res['p50_ms']:9.3f}  p99 {res['p99_ms']:9.3f} ms  "
+              f"peak {res['peak_kb']:9.1f} KB  sys {res['syscalls'] or 0:8.1f}  spawn {res['subprocesses']:.1f}")
+
+    def bench_observe(self) -> None:
+        from monitor import SessionTail
+        import random
+
+        for size in self.sizes:
+            path = self.session_file(size)
+            self.record(f"session_observe.cold[{size_label(size)}]", lambda _: SessionTail(path).poll())
+
+        # Incremental: one appended turn per poll, on a copy so the inputs stay fixed.
+        src = self.session_file(self.sizes[0])
+        path = self.data / "sessions" / "session-append.jsonl"
+        shutil.copyfile(src, path)
+        tail = SessionTail(path)
+        tail.poll()
+        rng = random.Random(1)
+
+        def append():
+            with path.open("a") as f:
+                for line in turn_lines(rng, time.time(), 0):
+                    f.write(line + "\n")
+
+        self.record("session_observe.append_turn", lambda _: tail.poll(), setup=append)
+
+    # decode_line must stay ahead of decoding every line with json.loads. Every
+    # line of a turn carries an event (item times, token counts, tool calls),
+    # so both do per-line work and the decoder measures ~1.7-2x faster; lines
+    # sent back to json.loads bring the ratio to ~1 or below.
+    DECODE_MIN_SPEEDUP = 1.25
+
+    def bench_decode(self) -> None:
+        from monitor import JsonlTail
+        from session_events import decode_line
+
+        window = JsonlTail.INITIAL_WINDOW
+        path = self.session_file(self.sizes[0])
+        with path.open("rb") as f:
+            f.seek(max(0, path.stat().st_size - window))
+            lines = [line for line in f.read().split(b"\n")[1:] if line]
+        label = size_label(window)
+        self.record(f"decode_line[{label} window]", lambda _: [decode_line(line) for line in lines])
+        self.record(f"json.loads[{label} window]", lambda _: [json.loads(line) for line in lines])
+        # Best runs: the minimum is the least disturbed by other load on the machine.
+        decode = self.results[f"decode_line[{label} window]"]["min_ms"]
+        baseline = self.results[f"json.loads[{label} window]"]["min_ms"]
+        speedup = baseline / decode if decode > 0 else float("inf")
+        print(f"{'decode_line speedup':<40} {speedup:.2f}x over json.loads (minimum {self.DECODE_MIN_SPEEDUP:.1f}x)")
+        if speedup < self.DECODE_MIN_SPEEDUP:
+            self.failures.append(f"decode_line is only {speedup:.2f}x faster than json.loads")
+
+    def bench_find_by_cwd(self) -> None:
+        from session_index import SessionIndex
+
+        root = self.session_tree()
+        index_path = self.data / "cache" / "bench-index.json"
+        label = f"{self.tree_files}"
+
+        def cold():
+            try:
+                index_path.unlink()
+            except FileNotFoundError:
+                pass
+            return SessionIndex(root=root, index_path=index_path)
+
+        self.record(f"find_session_by_cwd.cold[{label}]", lambda idx: idx.find_by_cwd("/work/project7", 0),
+                    setup=cold, repeat=max(3, self.repeat // 4))
+
+        def reload():
+            return SessionIndex(root=root, index_path=index_path)
+
+        self.record(f"find_session_by_cwd.load[{label}]", lambda idx: idx.find_by_cwd("/work/project7", 0), setup=reload)
+
+        warm = SessionIndex(root=root, index_path=index_path)
+        warm.refresh()
+
+        def stale():
+            warm._refreshed_at = 0.0
+            return warm
+
+        self.record(f"find_session_by_cwd.warm[{label}]", lambda idx: idx.find_by_cwd("/work/project7", 0), setup=stale)
+
+    def bench_log(self) -> None:
+        from monitor import LogWatcher
+
+        for size in self.sizes:
+            path = self.log_file(size)
+            real = path.stat().st_size
+
+            def fresh():
+                w = LogWatcher(log_path=path, session_id=None)
+                w._offset = 0
+                return w
+
+            self.record(f"log_parse_new_content[{size_label(size)}]", lambda w: w._parse_new_content(0, real),
+                        setup=fresh, repeat=max(3, self.repeat // 4) if real > 64 << 20 else None)
+
+            watcher = LogWatcher(log_path=path)
+            self.record(f"log_check_activity.idle[{size_label(size)}]", lambda _: watcher.check_activity())
+
+    def bench_sampler(self) -> None:
+        from monitor import ProcSampler
+
+        proc = self.spawn_tree()
+        sampler = ProcSampler(proc.pid)
+        sampler.sample()
+        self.record("proc_sampler.sample[tree=5]", lambda _: sampler.sample())
+        self.record("proc_sampler.is_alive", lambda _: sampler.is_alive())
+
+        # One tick over several sessions: /proc reads vs the batched `ps` backend
+        # (a fresh `ps` snapshot per iteration, as on a real tick).
+        from procscan import default_ps_batch
+
+        roots = [self.spawn_tree(width=1) for _ in range(8)]
+
+        def tick(samplers):
+            for s in samplers:
+                if s.is_alive():
+                    s.sample()
+
+        samplers = [ProcSampler(p.pid) for p in roots]
+        self.record("proc_sampler.tick[sessions=8]", lambda _: tick(samplers))
+        prev = os.environ.get("CODEX_STATUS_PROC_BACKEND")
+        os.environ["CODEX_STATUS_PROC_BACKEND"] = "ps"
+        try:
+            ps_samplers = [ProcSampler(p.pid) for p in roots]
+        finally:
+            if prev is None:
+                os.environ.pop("CODEX_STATUS_PROC_BACKEND")
+            else:
+                os.environ["CODEX_STATUS_PROC_BACKEND"] = prev
+        self.record("proc_sampler.tick[sessions=8,ps]", lambda _: tick(ps_samplers),
+                    setup=default_ps_batch().invalidate)
+
+    def bench_monitor(self) -> None:
+        from monitor import CodexMonitor
+
+        self.session_tree()
+        proc = self.spawn_tree()
+        # A live session for the child's cwd so detection and observation both run.
+        sessions = self.home / "sessions"
+        day = time.strftime("%Y/%m/%d", time.gmtime())
+        sid = "0199aaaa-bbbb-7ccc-8ddd-eeeeeeeeeeee"
+        live = sessions / day / f"rollout-{time.strftime('%Y-%m-%dT%H-%M-%S')}-{sid}.jsonl"
+        write_session(live, 1 << 20, seed=7, cwd=os.path.realpath(self.data), t0=time.time() + 1, sid=sid)
+
+        def cold():
+            return CodexMonitor(pid=proc.pid, start_cwd=str(self.data))
+
+        self.record("monitor_sample.cold", lambda m: m.sample(), setup=cold)
+
+        monitor = cold()
+        monitor.sample()
+        self.record("monitor_sample.steady", lambda _: monitor.sample())
+
+    ALL = ("decode", "observe", "find_by_cwd", "log", "sampler", "monitor")
+
+    def run(self, only: Optional[List[str]]) -> None:
+        try:
+            for name in self.ALL:
+                if only and not any(o in name for o in only):
+                    continue
+                getattr(self, f"bench_{name}")()
+        finally:
+            self.cleanup()
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "-C", str(REPO), "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(results: Dict[str, Dict[str, Any]], old_path: Path) -> None:
+    old = json.loads(old_path.read_text()).get("results", {})
+    print(f"\nvs {old_path} (new/old, <1 is faster):")
+    for name, res in results.items():
+        prev = old.get(name)
+        if not prev:
+            continue
+        ratios = []
+        for key in ("p50_ms", "p99_ms", "peak_kb"):
+            if prev.get(key):
+                ratios.append(f"{key} {res[key] / prev[key]:5.2f}x")
+        print(f"  {name:<40} " + "  ".join(ratios))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="codex-status hot path benchmarks")
+    parser.add_argument("--sizes", default="1M,16M,64M", help="Session/log file sizes (e.g. 1M,64M,1G)")
+    parser.add_argument("--tree-files", type=int, default=10000, help="Session files in the synthetic tree")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed iterations per benchmark")
+    parser.add_argument("--only", default="", help="Comma-separated subset: " + ",".join(Bench.ALL))
+    parser.add_argument("--data", default="", help="Directory for generated data (kept between runs)")
+    parser.add_argument("--out", default="bench-results.json", help="Results file")
+    parser.add_argument("--compare", default="", help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    data = Path(args.data).resolve() if args.data else Path(tempfile.mkdtemp(prefix="codex-status-bench-"))
+    data.mkdir(parents=True, exist_ok=True)
+    os.environ["CODEX_HOME"] = str(data / "codex")
+    os.environ["XDG_CACHE_HOME"] = str(data / "cache")
+    (data / "codex" / "log").mkdir(parents=True, exist_ok=True)
+    (data / "codex" / "log" / "codex-tui.log").touch()
+
+    subprocess.Popen.__init__ = _counting_popen_init
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    bench = Bench(data, sizes, args.tree_files, args.repeat)
+    try:
+        bench.run([o.strip() for o in args.only.split(",") if o.strip()] or None)
+    finally:
+        subprocess.Popen.__init__ = _popen_init
+        if not args.data:
+            shutil.rmtree(data, ignore_errors=True)
+
+    doc = {
+        "version": 1,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_rev": _git_rev(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"sizes": [size_label(s) for s in sizes], "tree_files": args.tree_files, "repeat": args.repeat},
+        "results": bench.results,
+    }
+    Path(args.out).write_text(json.dumps(doc, indent=2) + "\n")
+    print(f"\nwrote {args.out}")
+    if args.compare:
+        compare(bench.results, Path(args.compare))
+    for failure in bench.failures:
+        print(f"FAILED: {failure}", file=sys.stderr)
+    return 1 if bench.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
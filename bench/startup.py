@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Startup-time budget for the command-line entry points.
+
+Usage:
+    python3 bench/startup.py                 # table; exit 1 if a budget is exceeded
+    python3 bench/startup.py --repeat 30
+    python3 bench/startup.py --scale 2       # double every budget (slow machines)
+
+Each case starts an entry point as a fresh interpreter --repeat times and
+compares the median wall time above a bare `python3 -c pass` with its
+budget. Both cases also check with `-X importtime` that the monitor stack
+is not imported: the launcher runs for every `codex` command, and
+`codex-status --json` may run for every shell prompt.
+
+A fake daemon socket and a published status (both served by this process)
+stand in for a running monitor; CODEX_HOME and XDG_CACHE_HOME point into a
+temp dir.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+REPO = Path(__file__).resolve().parent.parent
+BIN = REPO / "bin"
+sys.path.insert(0, str(REPO / "lib"))
+
+# Milliseconds above a bare interpreter start (median).
+BUDGETS_MS = {
+    "bg_launch[daemon up]": 45.0,
+    "status[published]": 80.0,
+}
+# Modules the launcher must not import.
+LAUNCHER_FORBIDDEN = ("monitor", "procscan", "titles", "watch", "argparse", "subprocess", "dataclasses", "pathlib", "typing")
+# Modules `--json` answered from a published status must not import.
+STATUS_FORBIDDEN = ("monitor", "procscan", "renderer", "dataclasses", "subprocess")
+
+
+def _median_ms(cmd: List[str], env: Dict[str, str], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def _imported(cmd: List[str], env: Dict[str, str]) -> List[str]:
+    r = subprocess.run(
+        [cmd[0], "-X", "importtime"] + cmd[1:], env=env, stdin=subprocess.DEVNULL, capture_output=True, text=True
+    )
+    return [line.rsplit("|", 1)[-1].strip() for line in r.stderr.splitlines() if line.startswith("import time:")]
+
+
+def _serve_fake_daemon(path: Path) -> socket.socket:
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(path))
+    server.listen(16)
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            with conn:
+                try:
+                    conn.recv(65536)
+                    conn.sendall(json.dumps({"ok": True, "pid": os.getpid()}).encode() + b"\n")
+                except OSError:
+                    pass
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="codex-status entry point startup budget")
+    parser.add_argument("--repeat", type=int, default=15, help="Runs per case (median is reported)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget")
+    args = parser.parse_args()
+
+    data = Path(tempfile.mkdtemp(prefix="codex-status-startup-"))
+    env = dict(os.environ)
+    env.update({
+        "CODEX_HOME": str(data / "codex"),
+        "XDG_CACHE_HOME": str(data / "cache"),
+        "CODEX_STATUS_DAEMON": "1",
+        "CODEX_STATUS_LIB": str(REPO / "lib"),
+    })
+    os.environ.update(env)
+
+    from monitor import CodexStatus, State
+    from paths import cache_dir
+    from status_store import StatusPublisher
+
+    cache_dir().mkdir(parents=True, exist_ok=True)
+    server = _serve_fake_daemon(cache_dir() / "daemon.sock")
+    publisher = StatusPublisher(os.getpid(), "bench", cwd=str(data), max_wait=600)
+    status = CodexStatus()
+    status.state = State.RUNNING
+    status.pid = os.getpid()
+    publisher.publish(status)
+
+    py = sys.executable
+    cases = {
+        "bg_launch[daemon up]": [py, str(BIN / "codex-status-bg"), "pts/999", str(data)],
+        "status[published]": [py, str(BIN / "codex-status"), "--json", "-p", str(os.getpid())],
+    }
+    failed = False
+    try:
+        base = _median_ms([py, "-c", "pass"], env, args.repeat)
+        print(f"{'interpreter':<24} {base:8.1f} ms")
+        for name, cmd in cases.items():
+            over = _median_ms(cmd, env, args.repeat) - base
+            budget = BUDGETS_MS[name] * args.scale
+            ok = over <= budget
+            failed |= not ok
+            print(f"{name:<24} +{over:7.1f} ms  budget {budget:6.1f}  {'ok' if ok else 'OVER BUDGET'}")
+
+        for name, forbidden in (("bg_launch[daemon up]", LAUNCHER_FORBIDDEN), ("status[published]", STATUS_FORBIDDEN)):
+            heavy = sorted(set(_imported(cases[name], env)) & set(forbidden))
+            if heavy:
+                failed = True
+                print(f"{name} imports {', '.join(heavy)}")
+    finally:
+        publisher.close()
+        server.close()
+        shutil.rmtree(data, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
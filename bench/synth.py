@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Synthetic Codex data for benchmarks: session `.jsonl` files and session trees."""
+
+import os
+import json
+import random
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+
+def _ts(t: float) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _j(obj) -> str:
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def session_meta(sid: str, cwd: str, t: float) -> str:
+    return _j({"timestamp": _ts(t), "type": "session_meta", "payload": {"id": sid, "cwd": cwd, "timestamp": _ts(t)}})
+
+
+def turn_lines(rng: random.Random, t: float, call_base: int, done: bool = True) -> Iterator[str]:
+    """One user turn: a request, 10-40 tool calls with outputs, then the answer."""
+    yield _j({"timestamp": _ts(t), "type": "event_msg", "payload": {"type": "user_message", "message": "fix the failing test"}})
+    yield _j({"timestamp": _ts(t), "type": "response_item", "payload": {"type": "message", "role": "user", "content": [{"type": "input_text", "text": "fix the failing test"}]}})
+    tokens = 0
+    for k in range(rng.randint(10, 40)):
+        t += rng.random() * 3
+        call_id = f"call_{call_base + k}"
+        yield _j({"timestamp": _ts(t), "type": "response_item", "payload": {"type": "reasoning", "summary": [{"type": "summary_text", "text": "Looking at the code " * rng.randint(2, 30)}]}})
+        yield _j({"timestamp": _ts(t), "type": "response_item", "payload": {"type": "function_call", "name": "shell", "arguments": _j({"command": ["bash", "-lc", "rg -n parse src"]}), "call_id": call_id}})
+        t += rng.random() * 5
+        # Tool output dominates file size: a few hundred bytes to ~100 KB.
+        body = "src/parse.rs:12: fn parse(input: &str) -> Result<Ast, Error> {\n" * int(rng.paretovariate(1.2) * 8)
+        yield _j({"timestamp": _ts(t), "type": "response_item", "payload": {"type": "function_call_output", "call_id": call_id, "output": _j({"output": body[:100_000], "metadata": {"exit_code": 0, "duration_seconds": 0.4}})}})
+        tokens += rng.randint(20, 400)
+        yield _j({"timestamp": _ts(t), "type": "event_msg", "payload": {"type": "token_count", "info": {"total_token_usage": {"input_tokens": tokens * 20, "output_tokens": tokens, "total_tokens": tokens * 21}}}})
+    t += 2
+    yield _j({"timestamp": _ts(t), "type": "event_msg", "payload": {"type": "agent_message", "message": "Fixed."}})
+    text = "Fixed the parser.\n\nCODEX_DONE" if done else "Fixed the parser."
+    yield _j({"timestamp": _ts(t), "type": "response_item", "payload": {"type": "message", "role": "assistant", "content": [{"type": "output_text", "text": text}]}})
+
+
+def write_session(path: Path, size: int, seed: int = 0, cwd: str = "/work/project", t0: float = 1760000000.0, sid: Optional[str] = None) -> int:
+    """Writes a session file of roughly `size` bytes. Returns the bytes written."""
+    rng = random.Random(seed)
+    sid = sid or str(uuid.UUID(int=rng.getrandbits(128)))
+    written = 0
+    t = t0
+    call_base = 0
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w") as f:
+        line = session_meta(sid, cwd, t) + "\n"
+        f.write(line)
+        written += len(line)
+        while written < size:
+            for line in turn_lines(rng, t, call_base):
+                f.write(line + "\n")
+                written += len(line) + 1
+            t += 600
+            call_base += 100
+    return written
+
+
+def make_session_tree(root: Path, n_files: int, seed: int = 0, cwds: int = 50, days: int = 365) -> List[Path]:
+    """Creates `n_files` small rollout files spread over YYYY/MM/DD dirs."""
+    rng = random.Random(seed)
+    paths: List[Path] = []
+    t_end = 1760000000.0
+    for i in range(n_files):
+        t = t_end - rng.random() * days * 86400
+        day = datetime.fromtimestamp(t, timezone.utc)
+        sid = str(uuid.UUID(int=rng.getrandbits(128)))
+        d = root / day.strftime("%Y/%m/%d")
+        d.mkdir(parents=True, exist_ok=True)
+        p = d / f"rollout-{day.strftime('%Y-%m-%dT%H-%M-%S')}-{sid}.jsonl"
+        with p.open("w") as f:
+            f.write(session_meta(sid, f"/work/project{i % cwds}", t) + "\n")
+            for line in turn_lines(rng, t + 1, 0):
+                f.write(line + "\n")
+        os.utime(p, (t, t))
+        paths.append(p)
+    return paths
+
+
+def write_tui_log(path: Path, size: int, seed: int = 0, session_ids: Optional[List[str]] = None) -> int:
+    """Writes a codex-tui.log-like file interleaving several sessions."""
+    rng = random.Random(seed)
+    sids = session_ids or [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(3)]
+    written = 0
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w") as f:
+        while written < size:
+            sid = rng.choice(sids)
+            r = rng.random()
+            if r < 0.1:
+                line = f'2025-10-17T08:00:00.000000Z  INFO session_loop{{thread_id={sid}}}: codex_core::codex: ToolCall: shell {{"command":["bash","-lc","cargo test"]}}'
+            elif r < 0.12:
+                line = (f'2025-10-17T08:00:00.000000Z  INFO session_loop{{thread_id={sid}}}: codex_core::codex: ToolCall: update_plan '
+                        '{"plan":[{"step":"Read code","status":"completed"},{"step":"Fix parser","status":"in_progress"},{"step":"Run tests","status":"pending"}]}')
+            else:
+                line = f"2025-10-17T08:00:00.000000Z DEBUG session_loop{{thread_id={sid}}}: codex_core::client: SSE event: " + "x" * rng.randint(50, 400)
+            f.write(line + "\n")
+            written += len(line) + 1
+    return written
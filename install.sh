@@ -82,6 +82,9 @@ echo ""
 mkdir -p "$INSTALL_DIR" "$PRIORITY_DIR" "$LIB_DIR" "$SHARE_DIR" "$CACHE_DIR"
 
 cp -r "$SCRIPT_DIR/lib/"* "$LIB_DIR/"
+# Precompile so the first run of every entry point skips bytecode compilation.
+rm -rf "$LIB_DIR/__pycache__"
+python3 -m compileall -q "$LIB_DIR" >/dev/null 2>&1 || true
 cp "$SCRIPT_DIR/config/ccbdone_instructions.txt" "$SHARE_DIR/"
 cp "$SCRIPT_DIR/config/done_tag_instructions.txt" "$SHARE_DIR/"
 
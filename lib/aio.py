@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""asyncio engine sampling many `CodexMonitor`s concurrently.
+
+`CodexMonitor.sample()` stays synchronous (procfs reads, session tails and,
+off Linux, `ps`/`tasklist` fallbacks bounded by CODEX_STATUS_CMD_TIMEOUT_S).
+The engine runs each sample on a worker thread, so a slow call only delays
+its own session, and every session waits for its next sample on its own
+`AdaptiveScheduler` delay.
+
+    engine = MonitorEngine()
+    engine.add(CodexMonitor(pid=1234), on_status=lambda m, s: print(s.state))
+    await engine.run()              # returns once every monitor has exited
+
+or, for a single monitor:
+
+    async for status in monitor.stream():
+        ...
+
+`follow_session` is the asyncio counterpart of `monitor.follow_session`:
+the session file is polled on the executor, so index lookups and reads
+never block the loop.
+"""
+
+import os
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Optional, Dict, Callable, Any, AsyncIterator
+
+try:
+    from .monitor import CodexMonitor, CodexStatus, State, SessionFollower
+    from .scheduler import AdaptiveScheduler
+    from .session_events import SessionEvent
+except ImportError:
+    from monitor import CodexMonitor, CodexStatus, State, SessionFollower
+    from scheduler import AdaptiveScheduler
+    from session_events import SessionEvent
+
+
+StatusCallback = Callable[[CodexMonitor, CodexStatus], Any]
+
+
+async def stream(
+    monitor: CodexMonitor,
+    interval: float = 2.0,
+    executor: Optional[Executor] = None,
+    scheduler: Optional[AdaptiveScheduler] = None,
+) -> AsyncIterator[CodexStatus]:
+    """Yields a status per sample until the process exits (the EXITED status is yielded last)."""
+    loop = asyncio.get_running_loop()
+    scheduler = scheduler or AdaptiveScheduler(monitor, interval)
+    while True:
+        try:
+            status = await loop.run_in_executor(executor, monitor.sample)
+        except Exception:
+            await asyncio.sleep(interval)
+            continue
+        yield status
+        if status.state == State.EXITED:
+            return
+        await asyncio.sleep(scheduler.next_delay(status))
+
+
+async def follow_session(
+    session,
+    cursor: Optional[str] = None,
+    from_start: bool = False,
+    poll_interval: float = 0.5,
+    idle_timeout: Optional[float] = None,
+    executor: Optional[Executor] = None,
+) -> AsyncIterator[SessionEvent]:
+    """Yields a session's events as they are written (see monitor.follow_session)."""
+    loop = asyncio.get_running_loop()
+    follower = SessionFollower(session, cursor, from_start)
+    idle_since = loop.time()
+    while True:
+        events = await loop.run_in_executor(executor, follower.poll)
+        if events:
+            idle_since = loop.time()
+            for event in events:
+                yield event
+        if not follower.caught_up:
+            continue
+        if idle_timeout is not None and loop.time() - idle_since >= idle_timeout:
+            return
+        await asyncio.sleep(poll_interval)
+
+
+class MonitorEngine:
+    """Samples any number of monitors concurrently, each on its own schedule."""
+
+    def __init__(self, interval: float = 2.0, max_workers: Optional[int] = None, publish: bool = False):
+        self.interval = interval
+        self.publish = publish
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or min(32, (os.cpu_count() or 1) + 4),
+            thread_name_prefix="codex-monitor",
+        )
+        self._callbacks: Dict[CodexMonitor, Optional[StatusCallback]] = {}
+        self._tasks: Dict[CodexMonitor, "asyncio.Task"] = {}
+        self._changed: Optional[asyncio.Event] = None
+        self._stopped = False
+
+    def add(self, monitor: CodexMonitor, on_status: Optional[StatusCallback] = None) -> None:
+        """Starts sampling `monitor`; may be called before or while `run()` is running.
+
+        `on_status(monitor, status)` is called (and awaited if it returns an
+        awaitable) after every sample.
+        """
+        self._callbacks[monitor] = on_status
+        if self._changed is not None:
+            self._start(monitor)
+            self._changed.set()
+
+    def remove(self, monitor: CodexMonitor) -> None:
+        self._callbacks.pop(monitor, None)
+        task = self._tasks.pop(monitor, None)
+        if task is not None:
+            task.cancel()
+
+    def monitors(self):
+        return list(self._callbacks)
+
+    def _start(self, monitor: CodexMonitor) -> None:
+        if monitor not in self._tasks:
+            self._tasks[monitor] = asyncio.get_running_loop().create_task(self._watch(monitor))
+
+    async def _watch(self, monitor: CodexMonitor) -> None:
+        scheduler = AdaptiveScheduler(monitor, self.interval)
+        publisher = None
+        try:
+            async for status in stream(monitor, self.interval, self._executor, scheduler):
+                if self.publish and publisher is None and status.pid:
+                    try:
+                        from .status_store import StatusPublisher
+                    except ImportError:
+                        from status_store import StatusPublisher
+                    publisher = StatusPublisher(
+                        status.pid, "engine", cwd=monitor.start_cwd, max_wait=scheduler.max_interval
+                    )
+                if publisher is not None:
+                    publisher.publish(status, monitor)
+                callback = self._callbacks.get(monitor)
+                if callback is not None:
+                    result = callback(monitor, status)
+                    if asyncio.iscoroutine(result):
+                        await result
+        finally:
+            if publisher is not None:
+                publisher.close()
+            self._callbacks.pop(monitor, None)
+            self._tasks.pop(monitor, None)
+            if self._changed is not None:
+                self._changed.set()
+
+    async def run(self) -> None:
+        """Samples until every monitor has exited (or `stop()` is called)."""
+        self._changed = asyncio.Event()
+        self._stopped = False
+        try:
+            for monitor in list(self._callbacks):
+                self._start(monitor)
+            while self._tasks and not self._stopped:
+                await self._changed.wait()
+                self._changed.clear()
+        finally:
+            tasks = list(self._tasks.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._changed = None
+
+    def stop(self) -> None:
+        self._stopped = True
+        if self._changed is not None:
+            self._changed.set()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
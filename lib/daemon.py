@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""Per-user monitor daemon shared by all terminals.
+
+Instead of one `codex-status-bg` worker (and interpreter) per TTY, a single
+long-lived daemon owns one `CodexMonitor` per Codex process. TTY discovery
+uses one process-table scan per tick for every pending terminal, sessions
+are resolved through the shared session index, and titles for all terminals
+go through one `TitleDispatcher` flushed once per tick.
+
+`codex-status-bg` registers a TTY over a Unix socket in the cache dir (the
+client side lives in daemon_client.py); the protocol is one
+newline-terminated JSON request and reply per connection:
+
+    {"op": "register", "tty": "/dev/pts/3", "cwd": "/path", "tmux": "$TMUX"}
+                        -> {"ok": true}
+    {"op": "list"}      -> {"ok": true, "sessions": [...]}
+    {"op": "ping"}      -> {"ok": true, "pid": 1234}
+
+The daemon exits on its own once no terminal has been registered for
+IDLE_EXIT_S seconds.
+"""
+
+import os
+import json
+import time
+import socket
+import signal
+import threading
+from typing import Optional, Dict, Any, List, Set
+
+try:
+    from .daemon_client import CONNECT_TIMEOUT_S, socket_path, daemon_enabled, request, register_tty  # noqa: F401
+    from .monitor import CodexMonitor, State
+    from .procscan import find_codex_pids_on_ttys
+    from .renderer import render_title
+    from .scheduler import AdaptiveScheduler
+    from .status_store import StatusPublisher
+    from .titles import TitleOutput, TitleDispatcher, wezterm_mode
+    from .watch import MonitorWaiter, monitor_watch_paths
+except ImportError:
+    from daemon_client import CONNECT_TIMEOUT_S, socket_path, daemon_enabled, request, register_tty  # noqa: F401
+    from monitor import CodexMonitor, State
+    from procscan import find_codex_pids_on_ttys
+    from renderer import render_title
+    from scheduler import AdaptiveScheduler
+    from status_store import StatusPublisher
+    from titles import TitleOutput, TitleDispatcher, wezterm_mode
+    from watch import MonitorWaiter, monitor_watch_paths
+
+
+IDLE_EXIT_S = 300
+
+
+class _Session:
+    def __init__(self, tty_path: str, start_cwd: Optional[str], dispatcher: TitleDispatcher, mode: str, tmux: str = ""):
+        self.tty_path = tty_path
+        self.start_cwd = start_cwd
+        self.registered_at = time.time()
+        self.monitor: Optional[CodexMonitor] = None
+        self.publisher: Optional[StatusPublisher] = None
+        self.scheduler: Optional[AdaptiveScheduler] = None
+        self.next_at = 0.0
+        self.output = TitleOutput(tty_path, mode=mode, dispatcher=dispatcher, tmux=tmux)
+        self.state: Optional[State] = None
+
+    def attach(self, pid: int, waiter: MonitorWaiter) -> None:
+        self.monitor = CodexMonitor(pid=pid, start_cwd=self.start_cwd, history=True)
+        self.scheduler = AdaptiveScheduler(self.monitor, waiter.slow_interval, event_driven=waiter.event_driven)
+        self.publisher = StatusPublisher(
+            pid, "daemon", tty=self.tty_path, cwd=self.start_cwd, max_wait=self.scheduler.max_interval
+        )
+
+    def close(self) -> None:
+        self.output.close()
+        if self.publisher is not None:
+            self.publisher.close()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "tty": self.tty_path,
+            "cwd": self.start_cwd,
+            "pid": self.monitor.pid if self.monitor else None,
+            "state": self.state.value if self.state else None,
+            "registered_at": self.registered_at,
+        }
+
+
+class _DaemonWaiter(MonitorWaiter):
+    """Waits on the union of every attached monitor's session/log paths.
+
+    A write only makes the monitors whose session file or directory fired
+    due. codex-tui.log is shared by every monitor, so a write to it just
+    ends the wait like a timer tick would.
+    """
+
+    def __init__(self, daemon: "MonitorDaemon", interval: float):
+        self.daemon = daemon
+        self._owners: Dict[str, List[CodexMonitor]] = {}
+        super().__init__(None, interval=interval)
+
+    def _paths(self) -> Dict[str, int]:
+        paths: Dict[str, int] = {}
+        owners: Dict[str, List[CodexMonitor]] = {}
+        for monitor in self.daemon.monitors():
+            shared_log = str(monitor.log_watcher.log_path)
+            for path, mask in monitor_watch_paths(monitor).items():
+                paths[path] = mask
+                if path != shared_log:
+                    owners.setdefault(path, []).append(monitor)
+        self._owners = owners
+        return paths
+
+    def fired_monitors(self) -> Set[CodexMonitor]:
+        """Monitors with a session write during the last wait()."""
+        return {m for path in self.watcher.fired for m in self._owners.get(path, ())}
+
+
+class MonitorDaemon:
+    PENDING_POLL_S = 0.2
+
+    def __init__(self):
+        self.interval = float(os.environ.get("CODEX_STATUS_INTERVAL_S", "2"))
+        self.wait_s = int(os.environ.get("CODEX_STATUS_WAIT_S", "10"))
+        self.mode = wezterm_mode()
+        self.titles = TitleDispatcher()
+        self._sessions: Dict[str, _Session] = {}
+        # Sessions replaced by a re-register; the main loop closes them between samples.
+        self._retired: List[_Session] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._last_active = time.time()
+        self._waiter = _DaemonWaiter(self, interval=self.interval)
+        self._server: Optional[socket.socket] = None
+        self._lock_file = None
+
+    def monitors(self) -> List[CodexMonitor]:
+        with self._lock:
+            return [s.monitor for s in self._sessions.values() if s.monitor is not None]
+
+    def _bind(self) -> bool:
+        import fcntl
+
+        path = socket_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # One daemon per user: the lock is held for the daemon's lifetime.
+        self._lock_file = open(os.path.join(os.path.dirname(path), "daemon.lock"), "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(path)
+        except OSError:
+            server.close()
+            return False
+        os.chmod(path, 0o600)
+        server.listen(16)
+        self._server = server
+        return True
+
+    def _serve(self) -> None:
+        assert self._server is not None
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                break
+            try:
+                conn.settimeout(CONNECT_TIMEOUT_S)
+                buf = b""
+                while not buf.endswith(b"\n"):
+                    chunk = conn.recv(65536)
+                    if not chunk:
+                        break
+                    buf += chunk
+                reply = self._handle(json.loads(buf) if buf.strip() else {})
+                conn.sendall(json.dumps(reply).encode() + b"\n")
+            except Exception:
+                pass
+            finally:
+                conn.close()
+
+    def _handle(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        op = msg.get("op")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if op == "list":
+            with self._lock:
+                return {"ok": True, "sessions": [s.describe() for s in self._sessions.values()]}
+        if op == "register":
+            tty = str(msg.get("tty") or "")
+            if not tty:
+                return {"ok": False, "error": "missing tty"}
+            with self._lock:
+                old = self._sessions.pop(tty, None)
+                session = _Session(tty, msg.get("cwd") or None, self.titles, self.mode, str(msg.get("tmux") or ""))
+                self._sessions[tty] = session
+                self._last_active = time.time()
+                # The main loop may be sampling the old session right now.
+                if old:
+                    self._retired.append(old)
+            self._waiter.wake()
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown op: {op}"}
+
+    def _attach_pending(self, now: float) -> None:
+        with self._lock:
+            pending = [s for s in self._sessions.values() if s.monitor is None]
+        if not pending:
+            return
+        found = find_codex_pids_on_ttys(s.tty_path for s in pending)
+        for s in pending:
+            pid = found.get(s.tty_path)
+            if pid:
+                s.attach(pid, self._waiter)
+            elif now - s.registered_at > max(1, self.wait_s):
+                self._drop(s)
+
+    def _close_retired(self) -> None:
+        with self._lock:
+            retired, self._retired = self._retired, []
+        for s in retired:
+            s.close()
+
+    def _drop(self, session: _Session) -> None:
+        with self._lock:
+            # Not registered any more: retired, and closed by _close_retired().
+            if self._sessions.get(session.tty_path) is not session:
+                return
+            del self._sessions[session.tty_path]
+        session.close()
+
+    def _sample_due(self, now: float, fired: Set[CodexMonitor]) -> Optional[float]:
+        """Samples every monitor that is due or whose session was just written.
+
+        Returns seconds until the next one is due.
+        """
+        with self._lock:
+            attached = [s for s in self._sessions.values() if s.monitor is not None]
+        next_due: Optional[float] = None
+        for s in attached:
+            if s.monitor not in fired and now < s.next_at:
+                left = s.next_at - now
+                next_due = left if next_due is None else min(next_due, left)
+                continue
+            try:
+                status = s.monitor.sample()
+            except Exception:
+                # Retry on the next tick instead of every pass of the loop.
+                s.next_at = now + self.interval
+                next_due = self.interval if next_due is None else min(next_due, self.interval)
+                continue
+            s.state = status.state
+            s.output.set_title(render_title(status))
+            if s.publisher is not None:
+                s.publisher.publish(status, s.monitor)
+            if status.state == State.EXITED:
+                self._drop(s)
+                continue
+            delay = s.scheduler.next_delay(status, now)
+            s.next_at = now + delay
+            next_due = delay if next_due is None else min(next_due, delay)
+        return next_due
+
+    def run(self) -> int:
+        if not self._bind():
+            return 0
+        threading.Thread(target=self._serve, daemon=True).start()
+        fired: Set[CodexMonitor] = set()
+        try:
+            while not self._stop.is_set():
+                now = time.time()
+                self._close_retired()
+                self._attach_pending(now)
+                sample_due = self._sample_due(now, fired)
+                with self._lock:
+                    title_due = self.titles.flush()
+                    has_pending = any(s.monitor is None for s in self._sessions.values())
+                    if self._sessions:
+                        self._last_active = now
+                    elif now - self._last_active > IDLE_EXIT_S:
+                        break
+                timeout = self.PENDING_POLL_S if has_pending else None
+                for due in (sample_due, title_due):
+                    if due is not None:
+                        timeout = due if timeout is None else min(timeout, due)
+                self._waiter.wait(timeout)
+                fired = self._waiter.fired_monitors()
+        finally:
+            self.shutdown()
+        return 0
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._waiter.wake()
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            try:
+                os.unlink(socket_path())
+            except Exception:
+                pass
+            try:
+                self._server.close()
+            except Exception:
+                pass
+            self._server = None
+        with self._lock:
+            sessions = list(self._sessions.values()) + self._retired
+            self._sessions.clear()
+            self._retired = []
+        for s in sessions:
+            s.close()
+        self.titles.close()
+        self._waiter.close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def run_daemon() -> int:
+    daemon = MonitorDaemon()
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+    return daemon.run()
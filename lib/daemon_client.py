@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Client side of the monitor daemon protocol (see daemon.py).
+
+Kept separate from the daemon so the `codex-status-bg` launcher, which runs
+on every `codex` command, can register a TTY without importing the monitor
+stack (nor pathlib or typing).
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import socket
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional, Dict, Any
+
+try:
+    from .paths import cache_root
+except ImportError:
+    from paths import cache_root
+
+
+CONNECT_TIMEOUT_S = 2.0
+
+
+def socket_path() -> str:
+    return os.path.join(cache_root(), "daemon.sock")
+
+
+def daemon_enabled() -> bool:
+    if os.name != "posix" or not hasattr(socket, "AF_UNIX"):
+        return False
+    return os.environ.get("CODEX_STATUS_DAEMON", "1").strip() not in ("0", "off", "no")
+
+
+def request(msg: Dict[str, Any], timeout: float = CONNECT_TIMEOUT_S) -> Optional[Dict[str, Any]]:
+    """Sends one request to the daemon. Returns its reply, or None if unreachable."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(timeout)
+            s.connect(socket_path())
+            s.sendall(json.dumps(msg).encode() + b"\n")
+            buf = b""
+            while not buf.endswith(b"\n"):
+                chunk = s.recv(65536)
+                if not chunk:
+                    break
+                buf += chunk
+        return json.loads(buf) if buf else None
+    except Exception:
+        return None
+
+
+def spawn_daemon(script: str) -> bool:
+    """Starts `<script> --daemon` detached and waits for its socket to answer."""
+    import subprocess
+
+    try:
+        subprocess.Popen(
+            [sys.executable, script, "--daemon"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except Exception:
+        return False
+    deadline = time.time() + CONNECT_TIMEOUT_S
+    while time.time() < deadline:
+        if request({"op": "ping"}, timeout=0.5):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def register_tty(tty_path: str, start_cwd: Optional[str], script: str) -> bool:
+    """Hands a TTY to the daemon, starting the daemon if needed."""
+    msg = {"op": "register", "tty": tty_path, "cwd": start_cwd, "tmux": os.environ.get("TMUX", "")}
+    reply = request(msg)
+    if reply is None and spawn_daemon(script):
+        reply = request(msg)
+    return bool(reply and reply.get("ok"))
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Per-session sample history in fixed-size, memory-mapped ring buffers.
+
+A long-running monitor records every sample of a Codex process into
+`<cache>/history/<pid>-<start epoch>.hist`: a small header followed by
+CAPACITY fixed-size records (timestamp, state, CPU/IO deltas, silence and
+task time). Once full, the oldest records are overwritten, so memory and
+disk use per session never exceed HEADER_SIZE + capacity * RECORD.size bytes.
+Files outlive their session for post-mortems; at most KEEP_FILES of them are
+kept, and none older than KEEP_DAYS.
+
+Only one monitor records a given process: the writer holds an exclusive
+`flock` on the file and other monitors skip recording.
+"""
+
+import os
+import csv
+import mmap
+import time
+import struct
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Optional, List, TextIO
+
+try:
+    from .status import CodexStatus, State
+    from .paths import cache_dir
+except ImportError:
+    from status import CodexStatus, State
+    from paths import cache_dir
+
+
+MAGIC = b"CXH1"
+VERSION = 1
+# magic, version, capacity, record size, records written, pid, process start
+_HEADER = struct.Struct("<4sIIIQId")
+HEADER_SIZE = 64
+# timestamp, state code, cpu_delta, io_read_delta, io_write_delta, silence_s, task_s
+RECORD = struct.Struct("<dB3xfQQff")
+KEEP_FILES = 50
+KEEP_DAYS = 7
+
+STATES = list(State)
+
+
+def history_dir() -> Path:
+    return cache_dir() / "history"
+
+
+def history_capacity() -> int:
+    try:
+        return max(16, int(os.environ.get("CODEX_STATUS_HISTORY_SAMPLES", "4096")))
+    except ValueError:
+        return 4096
+
+
+@dataclass
+class HistorySample:
+    ts: float
+    state: State
+    cpu_delta: float
+    io_read_delta: int
+    io_write_delta: int
+    silence_s: float
+    task_s: float
+
+
+def prune_history(keep: int = KEEP_FILES, max_age_s: float = KEEP_DAYS * 86400) -> None:
+    try:
+        entries = [(e.stat().st_mtime, e.path) for e in os.scandir(history_dir()) if e.name.endswith(".hist")]
+    except OSError:
+        return
+    entries.sort(reverse=True)
+    cutoff = time.time() - max_age_s
+    for i, (mtime, path) in enumerate(entries):
+        if i >= keep or mtime < cutoff:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+class HistoryRecorder:
+    """Appends samples of one Codex process to its ring buffer file."""
+
+    def __init__(self, pid: int, start_epoch: float, capacity: Optional[int] = None):
+        self.pid = pid
+        self.start_epoch = start_epoch
+        self.capacity = capacity or history_capacity()
+        self.path = history_dir() / f"{pid}-{int(start_epoch)}.hist"
+        self._fd: Optional[int] = None
+        self._mm: Optional[mmap.mmap] = None
+        self._count = 0
+        self._disabled = False
+
+    def _open(self) -> bool:
+        if self._mm is not None:
+            return True
+        if self._disabled:
+            return False
+        import fcntl
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        prune_history()
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            # Another monitor records this process.
+            os.close(fd)
+            self._disabled = True
+            return False
+        size = HEADER_SIZE + self.capacity * RECORD.size
+        try:
+            existing = os.fstat(fd).st_size
+            if existing >= HEADER_SIZE:
+                head = _HEADER.unpack(os.pread(fd, _HEADER.size, 0))
+                if head[0] == MAGIC and head[1] == VERSION and head[3] == RECORD.size and existing == HEADER_SIZE + head[2] * RECORD.size:
+                    # Resume after a monitor restart.
+                    self.capacity, self._count = head[2], head[4]
+                    size = existing
+            os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size)
+        except OSError:
+            os.close(fd)
+            self._disabled = True
+            return False
+        self._fd = fd
+        self._write_header()
+        return True
+
+    def _write_header(self) -> None:
+        _HEADER.pack_into(self._mm, 0, MAGIC, VERSION, self.capacity, RECORD.size, self._count, self.pid, self.start_epoch)
+
+    def record(self, status: CodexStatus, now: Optional[float] = None) -> None:
+        if not self._open():
+            return
+        slot = self._count % self.capacity
+        RECORD.pack_into(
+            self._mm,
+            HEADER_SIZE + slot * RECORD.size,
+            time.time() if now is None else now,
+            STATES.index(status.state),
+            status.cpu_delta,
+            max(0, int(status.io_read_delta)),
+            max(0, int(status.io_write_delta)),
+            status.silence_s,
+            status.task_s,
+        )
+        self._count += 1
+        self._write_header()
+
+    def close(self) -> None:
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except Exception:
+                pass
+            self._mm = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def read_history(path: Path) -> List[HistorySample]:
+    """Samples in a history file, oldest first."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return []
+    if len(data) < HEADER_SIZE:
+        return []
+    magic, version, capacity, rec_size, count, _, _ = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or rec_size != RECORD.size:
+        return []
+    n = min(count, capacity)
+    first = count - n
+    if count > capacity:
+        # The oldest slot may be overwritten while we read it.
+        first += 1
+    out: List[HistorySample] = []
+    for i in range(first, count):
+        off = HEADER_SIZE + (i % capacity) * RECORD.size
+        if off + RECORD.size > len(data):
+            break
+        ts, code, cpu, r, w, silence, task = RECORD.unpack_from(data, off)
+        out.append(HistorySample(ts, STATES[code] if code < len(STATES) else State.STARTING, cpu, r, w, silence, task))
+    return out
+
+
+def find_history(pid: Optional[int] = None) -> Optional[Path]:
+    """The most recently written history file, optionally for one Codex pid."""
+    try:
+        entries = [e for e in os.scandir(history_dir()) if e.name.endswith(".hist")]
+    except OSError:
+        return None
+    if pid is not None:
+        entries = [e for e in entries if e.name.startswith(f"{pid}-")]
+    if not entries:
+        return None
+    return Path(max(entries, key=lambda e: e.stat().st_mtime).path)
+
+
+def write_csv(samples: List[HistorySample], out: TextIO) -> None:
+    w = csv.writer(out)
+    w.writerow(["timestamp", "state", "cpu_delta", "io_read_delta", "io_write_delta", "silence_s", "task_s"])
+    for s in samples:
+        w.writerow([f"{s.ts:.3f}", s.state.value, f"{s.cpu_delta:.3f}", s.io_read_delta, s.io_write_delta, f"{s.silence_s:.1f}", f"{s.task_s:.1f}"])
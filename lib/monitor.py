@@ -5,70 +5,110 @@ import os
 import re
 import json
 import time
-import subprocess
 from pathlib import Path
-from dataclasses import dataclass
-from typing import Optional, Dict, Any, List, Tuple
-from enum import Enum
-from datetime import datetime
-
-
-class State(Enum):
-    STARTING = "starting"
-    RUNNING = "running"
-    THINKING = "thinking"
-    FREE = "free"
-    IDLE = "idle"
-    STUCK = "stuck"
-    EXITED = "exited"
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Tuple, Iterator, AsyncIterator, Callable
+
+try:
+    from .status import State, CodexStatus, format_duration, format_bytes  # noqa: F401
+    from .paths import codex_home
+    from .procscan import (
+        scan_processes, process_start_epoch, parse_stat, socket_inodes, tcp_connections, TCP_ESTABLISHED,
+        default_ps_batch, ps_backend_forced,
+    )
+    from .session_index import SESSION_ID_RE, SessionIndex, default_session_index
+    from .session_events import (
+        SessionEvent, USER, DONE, ABORT, TOOL_CALL, TOOL_OUTPUT, ITEM, TOKENS,
+        decode_line, parse_ts, scan_backward, complete_length,
+    )
+    from .profiling import RollingStats, SampleProfiler, counters, run_command
+    from .trend import Trend
+except ImportError:
+    from status import State, CodexStatus, format_duration, format_bytes  # noqa: F401
+    from paths import codex_home
+    from procscan import (
+        scan_processes, process_start_epoch, parse_stat, socket_inodes, tcp_connections, TCP_ESTABLISHED,
+        default_ps_batch, ps_backend_forced,
+    )
+    from session_index import SESSION_ID_RE, SessionIndex, default_session_index
+    from session_events import (
+        SessionEvent, USER, DONE, ABORT, TOOL_CALL, TOOL_OUTPUT, ITEM, TOKENS,
+        decode_line, parse_ts, scan_backward, complete_length,
+    )
+    from profiling import RollingStats, SampleProfiler, counters, run_command
+    from trend import Trend
 
 
 @dataclass
-class CodexStatus:
-    state: State = State.STARTING
-    pid: Optional[int] = None
-    elapsed_s: float = 0
-    silence_s: float = 0
-    task_s: float = 0  # seconds since current request started (if pending)
+class ProcSample:
+    """One pass over a process tree: root state plus CPU/IO deltas summed over the tree."""
+
+    state: Optional[str] = None
     cpu_delta: float = 0
     io_read_delta: int = 0
     io_write_delta: int = 0
-    last_tool: Optional[str] = None
-    current_step: Optional[str] = None
-    plan_progress: Optional[str] = None  # e.g. "3/5"
-    error: Optional[str] = None
-
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "state": self.state.value,
-            "pid": self.pid,
-            "elapsed_s": self.elapsed_s,
-            "silence_s": self.silence_s,
-            "task_s": self.task_s,
-            "cpu_delta": self.cpu_delta,
-            "io_read_delta": self.io_read_delta,
-            "io_write_delta": self.io_write_delta,
-            "last_tool": self.last_tool,
-            "current_step": self.current_step,
-            "plan_progress": self.plan_progress,
-            "error": self.error,
-            "timestamp": time.time(),
-        }
+    rchar_delta: int = 0
+    wchar_delta: int = 0
+    tree_procs: int = 0
+    net_conns: int = 0
+    net_state: Optional[str] = None
+    rss_bytes: int = 0
+    pss_bytes: int = 0
+    threads: int = 0
+    fds: int = 0
+    busy_pid: Optional[int] = None
+    busy_cmd: Optional[str] = None
+    busy_cpu: float = 0
 
 
 class ProcSampler:
     """Sample process metrics from /proc when available, otherwise via `ps`.
 
     This keeps the monitor usable on macOS (no /proc by default) and WSL.
+    Without procfs (or with CODEX_STATUS_PROC_BACKEND=ps) the root's state and
+    CPU time come from the shared `PsBatch`, which answers every monitor from
+    one `ps` call per tick.
+
+    With /proc, `sample()` covers Codex and all of its descendants, so a long
+    `cargo build` run through a tool call counts as activity. Children that
+    exit between samples are accounted for through the parent's cutime/cstime
+    (and reaped IO), minus what was already counted while they were alive.
+
+    Block IO (`read_bytes`/`write_bytes`) stays at zero while a response is
+    streamed over the network, so the sampler also tracks `rchar`/`wchar`
+    (which cover pipes and plain read()/write() on sockets, not recv()/send())
+    and the Codex process's TCP connections: its socket fds matched against
+    /proc/<pid>/net/tcp{,6}. `net_state` is then:
+
+    - "streaming": a connection opened, closed or changed (state, queues,
+      ack/cwnd fields) since the last sample
+    - "waiting": connected and nothing moved, e.g. waiting for the API
+    - "stalled": unacknowledged send data not draining, or retransmitting
+    - "none": no TCP connection at all, so not waiting on the network
+
+    The same pass sums RSS and threads (from `stat`) and open fds over the
+    tree and feeds `rss_trend`/`fd_trend`. PSS needs the kernel to walk page
+    tables (`smaps_rollup`), so it is refreshed only every PSS_INTERVAL_S.
     """
 
-    def __init__(self, pid: int):
+    PSS_INTERVAL_S = 30.0
+
+    def __init__(self, pid: int, trend_window_s: float = 1800.0):
         self.pid = pid
         self._last_cpu = 0.0
-        self._last_io_r = 0
-        self._last_io_w = 0
+        # (pid, starttime) -> (ppid, cpu ticks incl. reaped children, read_bytes, write_bytes, rchar, wchar)
+        self._tree: Dict[Tuple[int, int], Tuple[int, int, int, int, int, int]] = {}
+        # socket inode -> (state, tx_queue, rx_queue, retransmits, ack/cwnd fields)
+        self._conns: Dict[int, Tuple[int, int, int, int, bytes]] = {}
         self._clk_tck = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
-        self._has_procfs = Path("/proc").is_dir() and Path(f"/proc/{self.pid}").exists()
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._pss = 0
+        self._pss_at = 0.0
+        self.rss_trend = Trend(trend_window_s)
+        self.fd_trend = Trend(trend_window_s)
+        self._has_procfs = (
+            not ps_backend_forced() and Path("/proc").is_dir() and Path(f"/proc/{self.pid}").exists()
+        )
         self._is_windows = os.name == "nt"
 
     def is_alive(self) -> bool:
@@ -76,7 +116,7 @@ class ProcSampler:
             return Path(f"/proc/{self.pid}").exists()
         if self._is_windows:
             try:
-                out = subprocess.run(
+                out = run_command(
                     ["tasklist", "/FI", f"PID eq {self.pid}"],
                     capture_output=True,
                     text=True,
@@ -84,6 +124,9 @@ class ProcSampler:
                 return str(self.pid) in out
             except Exception:
                 return False
+        if default_ps_batch().lookup(self.pid) is not None:
+            return True
+        # Not listed by `ps` (or `ps` failed): ask the kernel directly, e.g. under hidepid.
         try:
             os.kill(self.pid, 0)
             return True
@@ -91,137 +134,237 @@ class ProcSampler:
             return False
 
     def get_state(self) -> Optional[str]:
-        if self._has_procfs:
-            try:
-                stat = Path(f"/proc/{self.pid}/stat").read_text()
-                # Format: pid (comm) state ...
-                match = re.search(r"\)\s+(\S)", stat)
-                return match.group(1) if match else None
-            except Exception:
-                return None
+        """State letter of the root process without procfs (`sample()` reads /proc/<pid>/stat itself)."""
         if self._is_windows:
             return None
-        try:
-            out = subprocess.run(
-                ["ps", "-p", str(self.pid), "-o", "state="],
-                capture_output=True,
-                text=True,
-            ).stdout.strip()
-            return out[:1] if out else None
-        except Exception:
-            return None
-
-    def _parse_ps_time_to_seconds(self, s: str) -> float:
-        s = (s or "").strip()
-        if not s:
-            return 0.0
-        # Common formats:
-        # - [[dd-]hh:]mm:ss
-        # - hh:mm:ss
-        # - mm:ss
-        days = 0
-        if "-" in s:
-            d, rest = s.split("-", 1)
-            try:
-                days = int(d)
-            except Exception:
-                days = 0
-            s = rest
-        parts = s.split(":")
-        try:
-            parts_i = [int(p) for p in parts]
-        except Exception:
-            return 0.0
-        if len(parts_i) == 3:
-            h, m, sec = parts_i
-        elif len(parts_i) == 2:
-            h, m, sec = 0, parts_i[0], parts_i[1]
-        else:
-            return 0.0
-        return float(days * 86400 + h * 3600 + m * 60 + sec)
+        row = default_ps_batch().lookup(self.pid)
+        return row.state if row else None
 
     def sample_cpu(self) -> float:
-        """Returns CPU time delta since last sample."""
-        if self._has_procfs:
-            try:
-                stat = Path(f"/proc/{self.pid}/stat").read_text()
-                parts = stat.rsplit(")", 1)[1].split()
-                utime = int(parts[11])
-                stime = int(parts[12])
-                cpu_s = (utime + stime) / self._clk_tck
-                delta = cpu_s - self._last_cpu
-                self._last_cpu = cpu_s
-                return max(0, delta)
-            except Exception:
-                return 0.0
+        """CPU time delta of the root process since the last call, without procfs."""
         if self._is_windows:
             return 0.0
-        try:
-            # BSD/Linux: `ps ... -o time=` gives total CPU time.
-            out = subprocess.run(
-                ["ps", "-p", str(self.pid), "-o", "time="],
-                capture_output=True,
-                text=True,
-            ).stdout.strip()
-            cpu_s = self._parse_ps_time_to_seconds(out)
-            delta = cpu_s - self._last_cpu
-            self._last_cpu = cpu_s
-            return max(0.0, delta)
-        except Exception:
+        # BSD/Linux: `ps ... -o time=` gives total CPU time.
+        row = default_ps_batch().lookup(self.pid)
+        if row is None:
             return 0.0
+        delta = row.cpu_s - self._last_cpu
+        self._last_cpu = row.cpu_s
+        return max(0.0, delta)
 
-    def sample_io(self) -> Tuple[int, int]:
-        """Returns (read_bytes_delta, write_bytes_delta)."""
-        if not self._has_procfs:
-            return 0, 0
+    def _children(self, pid: int) -> List[int]:
+        out: List[int] = []
         try:
-            io_text = Path(f"/proc/{self.pid}/io").read_text()
-            io_map = {}
-            for line in io_text.splitlines():
-                if ":" in line:
-                    k, v = line.split(":", 1)
-                    io_map[k.strip()] = int(v.strip())
-
-            r = io_map.get("read_bytes", 0)
-            w = io_map.get("write_bytes", 0)
+            tids = os.listdir(f"/proc/{pid}/task")
+        except OSError:
+            return out
+        for tid in tids:
+            try:
+                with open(f"/proc/{pid}/task/{tid}/children", "rb") as f:
+                    out.extend(int(c) for c in f.read().split())
+            except FileNotFoundError:
+                # Kernel without CONFIG_PROC_CHILDREN: fall back to a /proc scan.
+                table = scan_processes()
+                return table.children(pid) if table is not None else out
+            except (OSError, ValueError):
+                continue
+        return out
+
+    def _descendants(self) -> List[int]:
+        members = [self.pid]
+        i = 0
+        while i < len(members):
+            for child in self._children(members[i]):
+                if child not in members:
+                    members.append(child)
+            i += 1
+        return members
+
+    def _read_io(self, pid: int) -> Tuple[int, int, int, int]:
+        """(read_bytes, write_bytes, rchar, wchar) of one process."""
+        try:
+            with open(f"/proc/{pid}/io", "rb") as f:
+                r = w = rc = wc = 0
+                for line in f.read().splitlines():
+                    if line.startswith(b"read_bytes:"):
+                        r = int(line[11:])
+                    elif line.startswith(b"write_bytes:"):
+                        w = int(line[12:])
+                    elif line.startswith(b"rchar:"):
+                        rc = int(line[6:])
+                    elif line.startswith(b"wchar:"):
+                        wc = int(line[6:])
+                return r, w, rc, wc
+        except (OSError, ValueError):
+            return 0, 0, 0, 0
+
+    def _read_pss(self, pid: int) -> int:
+        try:
+            with open(f"/proc/{pid}/smaps_rollup", "rb") as f:
+                for line in f:
+                    if line.startswith(b"Pss:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError, IndexError):
+            pass
+        return 0
+
+    def _net_state(self, fds: Optional[List[str]]) -> Tuple[int, str]:
+        """(established connections, net_state) of the root process; see the class docstring."""
+        conns = tcp_connections(self.pid, socket_inodes(self.pid, fds))
+        prev, self._conns = self._conns, conns
+        established = [c for c in conns.values() if c[0] == TCP_ESTABLISHED]
+        if not conns:
+            return 0, "none"
+        for inode, (state, tx, _, retrans, _) in conns.items():
+            if state == TCP_ESTABLISHED and (retrans > 0 or (tx > 0 and prev.get(inode, (0, 0))[1] == tx)):
+                return len(established), "stalled"
+        if conns != prev:
+            return len(established), "streaming"
+        return len(established), "waiting"
+
+    def sample(self) -> ProcSample:
+        """Single pass: root state plus tree-wide CPU/IO deltas since the last call."""
+        if not self._has_procfs:
+            return ProcSample(state=self.get_state(), cpu_delta=self.sample_cpu(), tree_procs=1)
 
-            delta_r = max(0, r - self._last_io_r)
-            delta_w = max(0, w - self._last_io_w)
+        out = ProcSample()
+        tree: Dict[Tuple[int, int], Tuple[int, int, int, int, int, int]] = {}
+        comms: Dict[Tuple[int, int], str] = {}
+        root_fds: Optional[List[str]] = None
+        for pid in self._descendants():
+            try:
+                with open(f"/proc/{pid}/stat", "rb") as f:
+                    parsed = parse_stat(f.read())
+                if parsed is None:
+                    continue
+                comm, rest = parsed
+                key = (pid, int(rest[19]))
+                ticks = int(rest[11]) + int(rest[12]) + int(rest[13]) + int(rest[14])
+                ppid = int(rest[1])
+                out.threads += int(rest[17])
+                out.rss_bytes += int(rest[21]) * self._page_size
+            except (OSError, ValueError, IndexError):
+                continue
+            try:
+                fds = os.listdir(f"/proc/{pid}/fd")
+                out.fds += len(fds)
+            except OSError:
+                fds = None
+            if pid == self.pid:
+                out.state = rest[0].decode()
+                root_fds = fds
+            tree[key] = (ppid, ticks) + self._read_io(pid)
+            comms[key] = comm
+
+        # Per-member deltas; members seen for the first time count in full.
+        deltas: Dict[Tuple[int, int], List[int]] = {}
+        for key, rec in tree.items():
+            prev = self._tree.get(key)
+            if prev:
+                deltas[key] = [cur - old for cur, old in zip(rec[1:], prev[1:])]
+            else:
+                deltas[key] = list(rec[1:])
+
+        # A reaped child's totals reappear in its parent's cutime/cstime and IO
+        # (via intermediate parents that exited too); subtract what was already
+        # counted while it was alive from the nearest surviving ancestor.
+        by_pid = {key[0]: key for key in tree}
+        gone = {key[0]: rec[0] for key, rec in self._tree.items() if key not in tree}
+        for key, rec in self._tree.items():
+            if key in tree:
+                continue
+            ppid = rec[0]
+            seen = {key[0]}
+            while ppid in gone and ppid not in seen:
+                seen.add(ppid)
+                ppid = gone[ppid]
+            parent = by_pid.get(ppid)
+            if parent is not None:
+                d = deltas[parent]
+                for i, v in enumerate(rec[1:]):
+                    d[i] -= v
+
+        busy_ticks = 0
+        for key, d in deltas.items():
+            d_ticks, d_r, d_w, d_rc, d_wc = (max(0, v) for v in d)
+            out.cpu_delta += d_ticks / self._clk_tck
+            out.io_read_delta += d_r
+            out.io_write_delta += d_w
+            out.rchar_delta += d_rc
+            out.wchar_delta += d_wc
+            if key[0] != self.pid and d_ticks > busy_ticks:
+                busy_ticks = d_ticks
+                out.busy_pid = key[0]
+                out.busy_cmd = comms[key]
+        out.busy_cpu = busy_ticks / self._clk_tck
+        out.tree_procs = len(tree)
+        self._tree = tree
+        out.net_conns, out.net_state = self._net_state(root_fds)
 
-            self._last_io_r = r
-            self._last_io_w = w
+        now = time.time()
+        if now - self._pss_at >= self.PSS_INTERVAL_S:
+            self._pss = sum(self._read_pss(key[0]) for key in tree)
+            self._pss_at = now
+        out.pss_bytes = self._pss
+        self.rss_trend.add(now, out.rss_bytes)
+        self.fd_trend.add(now, out.fds)
+        return out
 
-            return delta_r, delta_w
-        except Exception:
-            return 0, 0
+class LogWatcher:
+    """Watch and parse Codex log file.
 
+    codex-tui.log is global and can grow to hundreds of MB, so the watcher
+    starts near the end (TAIL_WINDOW), streams new content in CHUNK-sized
+    reads and follows rotation. Memory use does not depend on the log size.
 
-class LogWatcher:
-    """Watch and parse Codex log file."""
+    The log is shared by every Codex instance: lines tagged with a different
+    session/thread id are ignored, and untagged lines are only used while
+    `is_exclusive()` says this is the only Codex running.
+    """
 
     TOOL_CALL_RE = re.compile(r'ToolCall:\s+(\w+)\s+(.*)$')
     UPDATE_PLAN_RE = re.compile(r'"plan":\s*\[(.*?)\]', re.DOTALL)
-
-    def __init__(self, log_path: Optional[Path] = None):
-        self.log_path = log_path or Path.home() / ".codex/log/codex-tui.log"
-        self._last_size = 0
-        self._last_mtime = 0.0
+    SESSION_TAG_RE = re.compile(
+        r'(?:thread_id|conversation_id|session_id|conversation\.id)[=:]\s*"?'
+        r'([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})'
+    )
+    TAIL_WINDOW = 64 * 1024
+    CHUNK = 64 * 1024
+    MAX_LINE = 256 * 1024
+
+    def __init__(self, log_path: Optional[Path] = None, session_id: Optional[str] = None):
+        self.log_path = log_path or codex_home() / "log" / "codex-tui.log"
+        self.session_id = session_id
+        self.is_exclusive = lambda: True
+        self._ident: Optional[Tuple[int, int]] = None
+        self._offset = 0
+        self._partial = b""
+        self._skip_line = False
+        self._exclusive: Optional[bool] = None
         self.last_tool: Optional[str] = None
         self.current_step: Optional[str] = None
         self.plan_progress: Optional[str] = None
 
     def check_activity(self) -> bool:
-        """Returns True if log has new content."""
+        """Returns True if the log has new content attributed to this session."""
         try:
-            stat = self.log_path.stat()
-            if stat.st_size > self._last_size or stat.st_mtime > self._last_mtime:
-                self._parse_new_content(self._last_size, stat.st_size)
-                self._last_size = stat.st_size
-                self._last_mtime = stat.st_mtime
-                return True
-            return False
+            st = self.log_path.stat()
         except Exception:
             return False
+        ident = (st.st_dev, st.st_ino)
+        if self._ident is None:
+            self._ident = ident
+            self._offset = max(0, st.st_size - self.TAIL_WINDOW)
+            self._skip_line = self._offset > 0
+        elif ident != self._ident or st.st_size < self._offset:
+            # Rotated or truncated: the new file is read from its start.
+            self._ident = ident
+            self._offset = 0
+            self._partial = b""
+            self._skip_line = False
+        if st.st_size <= self._offset:
+            return False
+        return self._parse_new_content(self._offset, st.st_size)
 
     def get_silence_s(self) -> float:
         """Returns seconds since last log activity."""
@@ -231,22 +374,57 @@ class LogWatcher:
         except Exception:
             return 0.0
 
-    def _parse_new_content(self, start: int, end: int):
-        """Parse new log content for ToolCall and plan updates."""
+    def _parse_new_content(self, start: int, end: int) -> bool:
+        """Stream [start, end) line by line for ToolCall and plan updates."""
+        self._exclusive = None
+        active = False
         try:
-            with open(self.log_path, 'r', errors='replace') as f:
+            with open(self.log_path, "rb") as f:
                 f.seek(start)
-                content = f.read(end - start)
-
-            # Find last ToolCall
-            for match in self.TOOL_CALL_RE.finditer(content):
-                self.last_tool = match.group(1)
-
-            # Find last update_plan
-            if "update_plan" in content:
-                self._parse_plan(content)
+                while self._offset < end:
+                    chunk = f.read(min(self.CHUNK, end - self._offset))
+                    if not chunk:
+                        break
+                    self._offset += len(chunk)
+                    lines = chunk.split(b"\n")
+                    lines[0] = self._partial + lines[0]
+                    self._partial = lines.pop()
+                    counters.bytes_read += len(chunk)
+                    counters.lines += len(lines)
+                    for line in lines:
+                        if self._skip_line:
+                            self._skip_line = False
+                            continue
+                        active |= self._parse_line(line.decode("utf-8", errors="replace"))
+                    if len(self._partial) > self.MAX_LINE:
+                        self._partial = b""
+                        self._skip_line = True
         except Exception:
             pass
+        return active
+
+    def _attributed(self, line: str) -> bool:
+        match = self.SESSION_TAG_RE.search(line)
+        if match:
+            return self.session_id is not None and match.group(1) == self.session_id
+        if self._exclusive is None:
+            try:
+                self._exclusive = bool(self.is_exclusive())
+            except Exception:
+                self._exclusive = False
+        return self._exclusive
+
+    def _parse_line(self, line: str) -> bool:
+        if "ToolCall:" not in line:
+            return False
+        if not self._attributed(line):
+            return False
+        match = self.TOOL_CALL_RE.search(line)
+        if match:
+            self.last_tool = match.group(1)
+        if "update_plan" in line:
+            self._parse_plan(line)
+        return True
 
     def _parse_plan(self, content: str):
         """Extract current step and progress from update_plan."""
@@ -289,6 +467,454 @@ class LogWatcher:
             pass
 
 
+class JsonlTail:
+    """Incrementally read complete lines appended to a JSONL file.
+
+    Keeps a byte offset and a partial-line buffer, so each poll only reads what
+    was appended since the previous one. Truncation and replacement (a new
+    inode at the same path) restart reading from the initial window, or from
+    the offset returned by `locate(stat)` when one is given.
+
+    Memory is bounded: a poll reads at most MAX_READ bytes (`caught_up` tells
+    whether more is pending) and only the first MAX_LINE bytes of a line are
+    kept; tool outputs are decoded from their head, so longer lines lose
+    nothing the monitor needs.
+
+    With `track_line_ends`, `line_ends` holds the file offset just past each
+    line returned by the last `read_lines()` (a resume position; a truncated
+    line's length no longer tells it).
+    """
+
+    INITIAL_WINDOW = 1024 * 1024
+    MAX_READ = 4 * 1024 * 1024
+    MAX_LINE = 1024 * 1024
+
+    def __init__(
+        self,
+        path: Path,
+        initial_window: Optional[int] = None,
+        locate: Optional[Callable[[os.stat_result], int]] = None,
+        track_line_ends: bool = False,
+    ):
+        self.path = path
+        self.initial_window = self.INITIAL_WINDOW if initial_window is None else initial_window
+        self.locate = locate
+        self.offset = 0
+        self.caught_up = True
+        self.track_line_ends = track_line_ends
+        self.line_ends: List[int] = []
+        self._ident: Optional[Tuple[int, int]] = None
+        self._partial = b""
+        self._overflow = False  # dropping the rest of an over-long line
+
+    def resume(self, ident: Tuple[int, int], offset: int) -> None:
+        """Continues at `offset` as long as the file is still (device, inode) `ident`."""
+        self._ident, self.offset = ident, offset
+        self._partial, self._overflow = b"", False
+
+    def read_lines(self) -> Tuple[List[bytes], bool]:
+        """Returns (new complete lines, reset) where reset means the file was (re)opened."""
+        self.line_ends = []
+        try:
+            st = self.path.stat()
+        except Exception:
+            return [], False
+
+        reset = False
+        ident = (st.st_dev, st.st_ino)
+        if ident != self._ident or st.st_size < self.offset:
+            self._ident = ident
+            self._partial = b""
+            self._overflow = False
+            reset = True
+            if self.locate is not None:
+                self.offset = self.locate(st)
+                skip_first = False
+            else:
+                self.offset = max(0, st.st_size - self.initial_window)
+                skip_first = self.offset > 0
+        else:
+            skip_first = False
+
+        self.caught_up = True
+        if st.st_size <= self.offset:
+            return [], reset
+
+        base = self.offset  # file offset of data[0]
+        try:
+            with self.path.open("rb") as f:
+                f.seek(self.offset)
+                data = f.read(min(self.MAX_READ, st.st_size - self.offset))
+        except Exception:
+            return [], reset
+        self.offset += len(data)
+        self.caught_up = self.offset >= st.st_size
+        counters.bytes_read += len(data)
+
+        if skip_first:
+            # Started mid-file: the first line is most likely cut.
+            nl = data.find(b"\n")
+            data = data[nl + 1:] if nl != -1 else b""
+            base += nl + 1
+
+        lines: List[bytes] = []
+        if self._overflow:
+            nl = data.find(b"\n")
+            if nl == -1:
+                return [], reset
+            lines.append(self._partial)
+            self._partial, self._overflow = b"", False
+            data = data[nl + 1:]
+            base += nl + 1
+            if self.track_line_ends:
+                self.line_ends.append(base)
+
+        base -= len(self._partial)
+        data = self._partial + data
+        cut = data.rfind(b"\n")
+        if cut == -1:
+            rest = data
+        else:
+            complete = data[:cut].split(b"\n")
+            lines.extend(complete)
+            rest = data[cut + 1:]
+            if self.track_line_ends:
+                for line in complete:
+                    base += len(line) + 1
+                    self.line_ends.append(base)
+        if len(rest) > self.MAX_LINE:
+            rest, self._overflow = rest[:self.MAX_LINE], True
+        self._partial = rest
+        return lines, reset
+
+
+def _stats_summary(stats: Dict[str, RollingStats]) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    for name, st in stats.items():
+        s = st.summary()
+        if s["n"]:
+            summary[name] = {"n": s["count"], "p50": s["p50"], "p95": s["p95"], "max": s["max"]}
+    return summary
+
+
+class TurnMetrics:
+    """Per-turn model latency and output-token throughput of a session.
+
+    Rolling stats over the session's turns: time from the user message to the
+    first model item, gaps between model items (a tool's run time is not
+    counted), turn duration and output tokens/sec. Codex writes the token
+    count after a response's items, so a turn's throughput is closed by the
+    first count after its CODEX_DONE (or by the next user message).
+    """
+
+    STATS = ("first_item_s", "item_gap_s", "turn_s", "tokens_per_s")
+
+    def __init__(self):
+        self.stats: Dict[str, RollingStats] = {name: RollingStats() for name in self.STATS}
+        self.tokens = 0
+        self.seen_tokens = False
+        self.turn_start = 0.0
+        self.turn_tokens = 0
+        self.last_item = 0.0
+        self.last_progress = 0.0
+        self._closing: Optional[Tuple[float, int]] = None  # (duration, tokens at start) of a finished turn
+        self._summary: Optional[Dict[str, Dict[str, float]]] = None
+
+    def observe(self, event: SessionEvent) -> None:
+        kind, ts = event.kind, event.ts
+        if kind == USER:
+            self._close_throughput()
+            self.turn_start = ts
+            self.turn_tokens = self.tokens
+            self.last_item = 0.0
+            self.last_progress = ts
+        elif kind == TOKENS:
+            if event.tokens < self.tokens:
+                # Counter went back (new conversation in the same file): rebase.
+                self.turn_tokens = min(self.turn_tokens, event.tokens)
+            elif event.tokens > self.tokens and self.turn_start:
+                self.last_progress = max(self.last_progress, ts)
+            self.tokens = event.tokens
+            self.seen_tokens = True
+            self._close_throughput()
+        elif not self.turn_start or ts < self.turn_start:
+            return
+        elif kind in (ITEM, TOOL_CALL, DONE):
+            if self.last_item:
+                self._add("item_gap_s", ts - self.last_item)
+            else:
+                self._add("first_item_s", ts - self.turn_start)
+            self.last_item = ts
+        elif kind == TOOL_OUTPUT:
+            if self.last_item:
+                self.last_item = max(self.last_item, ts)
+            self.last_progress = max(self.last_progress, ts)
+        if kind in (DONE, ABORT) and self.turn_start:
+            duration = ts - self.turn_start
+            self._add("turn_s", duration)
+            self._closing = (duration, self.turn_tokens)
+            self.turn_start = 0.0
+
+    def _close_throughput(self) -> None:
+        if self._closing is None:
+            return
+        duration, start_tokens = self._closing
+        self._closing = None
+        if duration > 0 and self.tokens > start_tokens:
+            self._add("tokens_per_s", (self.tokens - start_tokens) / duration)
+
+    def _add(self, name: str, value: float) -> None:
+        self.stats[name].add(max(0.0, value))
+        self._summary = None
+
+    def tokens_per_s(self, now: float) -> float:
+        """Output tokens/sec of the running turn so far."""
+        if not self.turn_start or now <= self.turn_start:
+            return 0.0
+        return max(0, self.tokens - self.turn_tokens) / (now - self.turn_start)
+
+    def token_silence_s(self, now: float) -> float:
+        """Seconds since the running turn last produced tokens (or a tool returned)."""
+        if not self.turn_start or not self.seen_tokens:
+            return 0.0
+        return max(0.0, now - self.last_progress)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        if self._summary is None:
+            self._summary = _stats_summary(self.stats)
+        return self._summary
+
+
+class SessionTail:
+    """Running last user / done / abort timestamps of a session `.jsonl` file.
+
+    Tool calls are paired with their outputs by call id: `calls` holds the
+    outstanding ones and `tool_stats` the latency of completed ones per tool.
+    """
+
+    MAX_CALLS = 256
+    # Events of the initial backward scan replayed into the running state.
+    MAX_REPLAY = 20000
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._reader = JsonlTail(path, locate=self._locate)
+        self.last_user: float = 0.0
+        self.last_done: float = 0.0
+        self.last_abort: float = 0.0
+        self.calls: Dict[str, Tuple[str, float]] = {}
+        self.tool_stats: Dict[str, RollingStats] = {}
+        self._tool_summary: Optional[Dict[str, Dict[str, float]]] = None
+        self.turns = TurnMetrics()
+
+    def poll(self) -> int:
+        """Fold newly appended lines into the running state. Returns lines parsed."""
+        total = 0
+        while True:
+            lines, _ = self._reader.read_lines()
+            counters.lines += len(lines)
+            total += len(lines)
+            for line in lines:
+                event = decode_line(line)
+                if event is not None:
+                    self._observe(event)
+            if self._reader.caught_up:
+                return total
+
+    def _locate(self, st: os.stat_result) -> int:
+        """On (re)open: rebuild the state from a backward scan and tail from the end.
+
+        The scan stops at the last user message: the done/abort markers and
+        tool calls of the running turn all come after it, however large the
+        output that follows it. Tool and turn stats start with that turn.
+        """
+        self.last_user = self.last_done = self.last_abort = 0.0
+        self.calls.clear()
+        self.tool_stats.clear()
+        self._tool_summary = None
+        self.turns = TurnMetrics()
+
+        events: List[SessionEvent] = []
+        end = start = complete_length(str(self.path))
+        scanned = 0
+        for start, event in scan_backward(str(self.path), end):
+            scanned += 1
+            if len(events) < self.MAX_REPLAY:
+                events.append(event)
+            elif event.kind == DONE:
+                self.last_done = max(self.last_done, event.ts)
+            elif event.kind == ABORT:
+                self.last_abort = max(self.last_abort, event.ts)
+            if event.kind == USER:
+                self.last_user = max(self.last_user, event.ts)
+                break
+        # The scan maps the file rather than reading it; profile what it walked.
+        counters.bytes_read += end - start
+        counters.lines += scanned
+        for event in reversed(events):
+            self._observe(event)
+        return end
+
+    def _observe(self, event: SessionEvent) -> None:
+        self.turns.observe(event)
+        if event.kind == TOOL_CALL:
+            # Shell commands are logged both as a function call and as exec begin: keep the first.
+            if event.call_id not in self.calls:
+                if len(self.calls) >= self.MAX_CALLS:
+                    del self.calls[next(iter(self.calls))]
+                self.calls[event.call_id] = (event.tool or "tool", event.ts)
+        elif event.kind == TOOL_OUTPUT:
+            call = self.calls.pop(event.call_id, None)
+            if call is not None:
+                tool, started = call
+                stats = self.tool_stats.get(tool)
+                if stats is None:
+                    stats = self.tool_stats[tool] = RollingStats()
+                stats.add(max(0.0, event.ts - started))
+                self._tool_summary = None
+        elif event.kind == USER:
+            self.last_user = max(self.last_user, event.ts)
+            self.calls.clear()
+        elif event.kind == DONE:
+            self.last_done = max(self.last_done, event.ts)
+            self.calls.clear()
+        elif event.kind == ABORT:
+            self.last_abort = max(self.last_abort, event.ts)
+            self.calls.clear()
+
+    def active_call(self) -> Optional[Tuple[str, float]]:
+        """(tool, start epoch) of the oldest call still waiting for its output."""
+        return next(iter(self.calls.values()), None)
+
+    def tool_summary(self) -> Dict[str, Dict[str, float]]:
+        if self._tool_summary is None:
+            self._tool_summary = _stats_summary(self.tool_stats)
+        return self._tool_summary
+
+
+class SessionFollower:
+    """Follows one session `.jsonl` like `tail -F`, decoding lines into `SessionEvent`s.
+
+    Every yielded event carries `event.cursor`; passing it back as `cursor`
+    resumes right after that event without re-reading the file. A cursor is
+    only valid for the same file (device, inode): when the file was replaced
+    or truncated, following restarts at its beginning.
+
+    Reading is done by a `JsonlTail`, so `poll()` has the same memory bounds
+    as the monitor's own tail (MAX_READ per call, MAX_LINE per line).
+    `session` is a path, or a session id that is looked up in the session
+    index until its file appears.
+    """
+
+    def __init__(self, session, cursor: Optional[str] = None, from_start: bool = False):
+        self._sid: Optional[str] = None
+        self.path: Optional[Path] = None
+        if isinstance(session, Path) or os.sep in str(session) or str(session).endswith(".jsonl"):
+            self.path = Path(session)
+        else:
+            self._sid = str(session)
+        self._from_start = from_start
+        self._opened = False
+        self._ident: Optional[Tuple[int, int]] = None
+        self.offset = 0  # end of the last complete line consumed
+        self._tail: Optional[JsonlTail] = None
+        if cursor:
+            try:
+                dev, ino, off = (int(x) for x in cursor.split(":"))
+                self._ident, self.offset, self._opened = (dev, ino), off, True
+            except ValueError:
+                pass
+
+    @property
+    def caught_up(self) -> bool:
+        """False while the last poll stopped at MAX_READ."""
+        return self._tail is None or self._tail.caught_up
+
+    @property
+    def cursor(self) -> Optional[str]:
+        """Position after the last consumed line, or None before the file was found."""
+        if self._ident is None:
+            return None
+        return f"{self._ident[0]}:{self._ident[1]}:{self.offset}"
+
+    def _resolve(self) -> Optional[Path]:
+        if self.path is None and self._sid:
+            self.path = default_session_index().find_by_id(self._sid)
+        return self.path
+
+    def _locate(self, st: os.stat_result) -> int:
+        # The file seen first is followed from its end (after the last complete
+        # line) unless from_start; a replaced or truncated file from its start.
+        start_at_end = not self._opened and not self._from_start
+        self._opened = True
+        self._ident = (st.st_dev, st.st_ino)
+        self.offset = complete_length(str(self.path)) if start_at_end else 0
+        return self.offset
+
+    def poll(self) -> List[SessionEvent]:
+        """Events from lines completed since the last call (non-blocking)."""
+        if self._tail is None:
+            path = self._resolve()
+            if path is None:
+                return []
+            self._tail = JsonlTail(path, locate=self._locate, track_line_ends=True)
+            if self._ident is not None:
+                self._tail.resume(self._ident, self.offset)
+        lines, _ = self._tail.read_lines()
+        events: List[SessionEvent] = []
+        for line, end in zip(lines, self._tail.line_ends):
+            self.offset = end
+            event = decode_line(line)
+            if event is not None:
+                event.cursor = self.cursor
+                events.append(event)
+        return events
+
+
+def follow_session(
+    session,
+    cursor: Optional[str] = None,
+    from_start: bool = False,
+    poll_interval: float = 0.5,
+    idle_timeout: Optional[float] = None,
+) -> Iterator[SessionEvent]:
+    """Yields a session's events as they are written, like `tail -F`.
+
+    `session` is a path or session id; without a `cursor` following starts at
+    the end of the file (or its beginning with `from_start`). Returns after
+    `idle_timeout` seconds without new events, never by default:
+
+        for event in follow_session(sid, cursor=saved):
+            saved = event.cursor
+            if event.kind == DONE and event.req_id == req_id:
+                break
+
+    For asyncio use `follow_session_async` (same arguments).
+    """
+    follower = SessionFollower(session, cursor, from_start)
+    idle_since = time.monotonic()
+    while True:
+        events = follower.poll()
+        if events:
+            idle_since = time.monotonic()
+            yield from events
+        if not follower.caught_up:
+            continue
+        if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+            return
+        time.sleep(poll_interval)
+
+
+def follow_session_async(session, **kwargs) -> AsyncIterator[SessionEvent]:
+    """Async iterator variant of `follow_session` (see aio.py)."""
+    try:
+        from .aio import follow_session as follow
+    except ImportError:
+        from aio import follow_session as follow
+
+    return follow(session, **kwargs)
+
+
 class CodexMonitor:
     """Main monitor combining process sampling and log watching."""
 
@@ -297,30 +923,63 @@ class CodexMonitor:
     FREE_SILENCE_S = 2
     D_STUCK_S = 10
     MODEL_STUCK_S = 900
-    PENDING_REFRESH_S = 2
     THINKING_S = 5
     IDLE_S = 30
-
-    def __init__(self, pid: Optional[int] = None, start_cwd: Optional[str] = None):
+    TOKEN_STALL_S = 900
+    BLOAT_WINDOW_S = 1800
+    # Bloat: fitted growth over the window of at least this share of the start and this much.
+    BLOAT_RSS_RATIO = 0.25
+    BLOAT_RSS_MIN_BYTES = 128 * 1024 * 1024
+    BLOAT_FD_RATIO = 0.5
+    BLOAT_FD_MIN = 64
+
+    def __init__(
+        self,
+        pid: Optional[int] = None,
+        start_cwd: Optional[str] = None,
+        session_index: Optional[SessionIndex] = None,
+        history: bool = False,
+    ):
         self.pid = pid
         self.start_cwd = start_cwd
+        self.session_index = session_index or default_session_index()
         self.sampler: Optional[ProcSampler] = None
+        self.profiler = SampleProfiler()
+        self.history = history
+        self._recorder = None
         self.log_watcher = LogWatcher()
+        self.log_watcher.is_exclusive = self._is_only_codex
         self.start_time = time.time()
         self._silence_start = time.time()
         self._d_start: Optional[float] = None
         self._session_id: Optional[str] = None
         self._session_file: Optional[Path] = None
+        # cwd mode: (pid, index generation, session file) of the last lookup.
+        self._cwd_resolved: Optional[Tuple[int, int, Path]] = None
+        self._start_epoch: Optional[Tuple[int, int]] = None
+        self._session_tail: Optional[SessionTail] = None
         self._pending_cached: Optional[bool] = None
         self._req_started_at_cached: float = 0.0
         self._last_user_ts_cached: float = 0.0
         self._last_done_ts_cached: float = 0.0
         self._last_abort_ts_cached: float = 0.0
-        self._pending_checked_at: float = 0.0
         self.MODEL_STUCK_S = int(os.getenv("CODEX_STATUS_MODEL_STUCK_S", str(self.MODEL_STUCK_S)))
-        self.PENDING_REFRESH_S = int(os.getenv("CODEX_STATUS_PENDING_REFRESH_S", str(self.PENDING_REFRESH_S)))
         self.THINKING_S = int(os.getenv("CODEX_STATUS_THINKING_S", str(self.THINKING_S)))
         self.IDLE_S = int(os.getenv("CODEX_STATUS_IDLE_S", str(self.IDLE_S)))
+        self.TOKEN_STALL_S = int(os.getenv("CODEX_STATUS_TOKEN_STALL_S", str(self.TOKEN_STALL_S)))
+        self.BLOAT_WINDOW_S = int(os.getenv("CODEX_STATUS_BLOAT_WINDOW_S", str(self.BLOAT_WINDOW_S)))
+
+    def _is_only_codex(self) -> bool:
+        """True unless other Codex instances are known to be running."""
+        table = scan_processes()
+        if table is None:
+            return True
+        return len(table.codex_instances()) <= 1
+
+    @property
+    def session_file(self) -> Optional[Path]:
+        """Session `.jsonl` currently attached to, if detected."""
+        return self._session_file
 
     def _read_cmdline(self, pid: int) -> str:
         if Path("/proc").is_dir():
@@ -329,7 +988,7 @@ class CodexMonitor:
             except Exception:
                 pass
         try:
-            return subprocess.run(
+            return run_command(
                 ["ps", "-p", str(pid), "-o", "command="],
                 capture_output=True,
                 text=True,
@@ -341,213 +1000,120 @@ class CodexMonitor:
         now = int(time.time())
         if os.name == "nt":
             return now - 3600
-        # Linux: seconds since start.
-        try:
-            out = subprocess.run(
-                ["ps", "-p", str(pid), "-o", "etimes="],
-                capture_output=True,
-                text=True,
-            ).stdout.strip()
-            if out.isdigit():
-                return now - int(out)
-        except Exception:
-            pass
-        # BSD: elapsed time string.
-        try:
-            out = subprocess.run(
-                ["ps", "-p", str(pid), "-o", "etime="],
-                capture_output=True,
-                text=True,
-            ).stdout.strip()
-            secs = ProcSampler(pid)._parse_ps_time_to_seconds(out)  # reuse parser
-            if secs > 0:
-                return now - int(secs)
-        except Exception:
-            pass
+        started = None if ps_backend_forced() else process_start_epoch(pid)
+        if started:
+            return int(started)
+        # Without procfs: the process's age from the shared `ps` batch.
+        row = default_ps_batch().lookup(pid)
+        if row is not None and row.elapsed_s > 0:
+            return now - int(row.elapsed_s)
         return now - 3600
 
     def _find_session_file_by_cwd(self, start_cwd: str, since_epoch: int) -> Optional[Path]:
-        sessions_root = Path.home() / ".codex" / "sessions"
-        if not sessions_root.exists():
-            return None
-
-        try:
-            cwd_norm = os.path.realpath(start_cwd)
-        except Exception:
-            cwd_norm = start_cwd
-
-        items: List[Tuple[float, Path]] = []
-        try:
-            for p in sessions_root.rglob("*.jsonl"):
-                try:
-                    st = p.stat()
-                except Exception:
-                    continue
-                if st.st_mtime < since_epoch - 5:
-                    continue
-                items.append((st.st_mtime, p))
-        except Exception:
-            return None
-
-        items.sort(reverse=True, key=lambda t: t[0])
-        for _, p in items[:300]:
-            try:
-                with p.open("r", errors="replace") as f:
-                    first = f.readline().strip()
-                if not first:
-                    continue
-                obj = json.loads(first)
-                if obj.get("type") != "session_meta":
-                    continue
-                payload = obj.get("payload") or {}
-                meta_cwd = payload.get("cwd") or ""
-                if not meta_cwd:
-                    continue
-                if os.path.realpath(meta_cwd) == cwd_norm:
-                    return p
-            except Exception:
-                continue
-        return None
+        return self.session_index.find_by_cwd(start_cwd, since_epoch)
+
+    def _session_file_by_cwd(self, pid: int) -> Optional[Path]:
+        """cwd mode (no session id on the cmdline), cached like the sid path.
+
+        The index is queried again only when the attached file is gone or the index
+        has picked up a new session since (Codex rotated to a new rollout file).
+        """
+        index = self.session_index
+        index.refresh()
+        cached = self._cwd_resolved
+        if cached and cached[:2] == (pid, index.generation) and cached[2].exists():
+            return cached[2]
+        if self._start_epoch is None or self._start_epoch[0] != pid:
+            self._start_epoch = (pid, self._process_start_epoch(pid))
+        found = self._find_session_file_by_cwd(self.start_cwd, self._start_epoch[1])
+        self._cwd_resolved = (pid, index.generation, found) if found else None
+        return found
 
     def _detect_session_file(self, pid: int) -> Optional[Path]:
         cmdline = self._read_cmdline(pid)
         if not cmdline:
             if self.start_cwd:
-                return self._find_session_file_by_cwd(self.start_cwd, self._process_start_epoch(pid))
+                return self._session_file_by_cwd(pid)
             return None
 
         ids = re.findall(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", cmdline)
         if not ids:
             if self.start_cwd:
-                return self._find_session_file_by_cwd(self.start_cwd, self._process_start_epoch(pid))
+                return self._session_file_by_cwd(pid)
             return None
 
         sid = ids[-1]
         if sid == self._session_id and self._session_file and self._session_file.exists():
             return self._session_file
 
-        sessions_root = Path.home() / ".codex" / "sessions"
-        if not sessions_root.exists():
+        best = self.session_index.find_by_id(sid)
+        if not best:
             return None
 
-        candidates = list(sessions_root.rglob(f"*{sid}.jsonl"))
-        if not candidates:
-            return None
+        self._attach_session_file(best, sid)
+        return best
 
-        best = max(candidates, key=lambda p: p.stat().st_mtime)
+    def _attach_session_file(self, session_file: Path, sid: Optional[str] = None) -> None:
+        if sid is None:
+            match = SESSION_ID_RE.search(session_file.name)
+            sid = match.group(1) if match else None
         self._session_id = sid
-        self._session_file = best
+        self._session_file = session_file
+        self.log_watcher.session_id = sid
         self._pending_cached = None
-        self._pending_checked_at = 0.0
-        return best
 
     def _parse_ts(self, ts: str) -> Optional[float]:
-        try:
-            if ts.endswith("Z"):
-                ts = ts[:-1] + "+00:00"
-            return datetime.fromisoformat(ts).timestamp()
-        except Exception:
-            return None
+        return parse_ts(ts)
 
     def _session_observe(self, session_file: Path) -> Tuple[float, float, float]:
-        try:
-            size = session_file.stat().st_size
-            start = max(0, size - 1024 * 1024)
-            with session_file.open("r", errors="replace") as f:
-                f.seek(start)
-                chunk = f.read()
-        except Exception:
-            return 0.0, 0.0, 0.0
-
-        last_user: float = 0.0
-        last_turn_aborted: float = 0.0
-        last_done: float = 0.0
-
-        done_re = re.compile(r"^(?:CCB_DONE|CODEX_DONE)(?::\s*[0-9a-f]{32})?$")
-
-        for line in chunk.splitlines()[-5000:]:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-            except Exception:
-                continue
-
-            ts = self._parse_ts(obj.get("timestamp", ""))
-            if ts is None:
-                continue
-
-            typ = obj.get("type")
-            payload = obj.get("payload") or {}
-
-            if typ == "event_msg" and payload.get("type") == "turn_aborted":
-                last_turn_aborted = max(last_turn_aborted, ts)
-
-            if typ == "response_item":
-                role = (payload.get("role") or "").lower()
-                if role == "user":
-                    last_user = max(last_user, ts)
-
-                content = payload.get("content") or []
-                if isinstance(content, list):
-                    text = "\n".join(
-                        (part.get("text", "") for part in content if isinstance(part, dict) and part.get("type") in ("input_text", "output_text"))
-                    )
-                    if role == "assistant":
-                        last_nonempty = ""
-                        for ln in reversed(text.splitlines()):
-                            ln = ln.strip()
-                            if ln:
-                                last_nonempty = ln
-                                break
-                        if last_nonempty and done_re.match(last_nonempty):
-                            last_done = max(last_done, ts)
-
-            if typ == "event_msg":
-                ptype = payload.get("type")
-                if ptype == "user_message":
-                    last_user = max(last_user, ts)
-
-        return float(last_user), float(last_done), float(last_turn_aborted)
+        tail = self._session_tail
+        if tail is None or tail.path != session_file:
+            tail = SessionTail(session_file)
+            self._session_tail = tail
+        tail.poll()
+        return tail.last_user, tail.last_done, tail.last_abort
 
     def _get_session_state(self, now: float, pid: int) -> Optional[Tuple[bool, float, Path]]:
-        session_file = self._detect_session_file(pid)
+        with self.profiler.phase("session_find"):
+            session_file = self._detect_session_file(pid)
         if not session_file:
             return None
+        if session_file != self._session_file:
+            self._attach_session_file(session_file)
 
-        if self._pending_cached is None or (now - self._pending_checked_at) >= self.PENDING_REFRESH_S:
+        # The tail is incremental (a stat when nothing was written), so read it on every
+        # sample: a write that woke the waiter must be seen by the sample it triggered.
+        with self.profiler.phase("session_tail"):
             obs_user_ts, obs_done_ts, obs_abort_ts = self._session_observe(session_file)
 
-            if obs_user_ts > 0 and obs_user_ts > self._last_user_ts_cached:
-                self._last_user_ts_cached = obs_user_ts
-                self._req_started_at_cached = obs_user_ts
-                self._pending_cached = True
+        if obs_user_ts > 0 and obs_user_ts > self._last_user_ts_cached:
+            self._last_user_ts_cached = obs_user_ts
+            self._req_started_at_cached = obs_user_ts
+            self._pending_cached = True
 
-            if obs_done_ts > 0 and obs_done_ts > self._last_done_ts_cached:
-                self._last_done_ts_cached = obs_done_ts
+        if obs_done_ts > 0 and obs_done_ts > self._last_done_ts_cached:
+            self._last_done_ts_cached = obs_done_ts
 
-            if obs_abort_ts > 0 and obs_abort_ts > self._last_abort_ts_cached:
-                self._last_abort_ts_cached = obs_abort_ts
+        if obs_abort_ts > 0 and obs_abort_ts > self._last_abort_ts_cached:
+            self._last_abort_ts_cached = obs_abort_ts
 
-            if self._pending_cached is None:
-                # Initial fill
-                self._last_user_ts_cached = max(self._last_user_ts_cached, obs_user_ts)
-                self._last_done_ts_cached = max(self._last_done_ts_cached, obs_done_ts)
-                self._last_abort_ts_cached = max(self._last_abort_ts_cached, obs_abort_ts)
-                self._req_started_at_cached = self._last_user_ts_cached
+        if self._pending_cached is None:
+            # Initial fill
+            self._last_user_ts_cached = max(self._last_user_ts_cached, obs_user_ts)
+            self._last_done_ts_cached = max(self._last_done_ts_cached, obs_done_ts)
+            self._last_abort_ts_cached = max(self._last_abort_ts_cached, obs_abort_ts)
+            self._req_started_at_cached = self._last_user_ts_cached
 
-                if self._last_user_ts_cached > 0 and self._last_user_ts_cached > self._last_done_ts_cached:
-                    self._pending_cached = True
-                else:
-                    self._pending_cached = False
+            if self._last_user_ts_cached > 0 and self._last_user_ts_cached > self._last_done_ts_cached:
+                self._pending_cached = True
+            else:
+                self._pending_cached = False
 
-            if self._last_user_ts_cached > 0:
-                if self._last_done_ts_cached > self._last_user_ts_cached:
-                    self._pending_cached = False
-                if self._last_abort_ts_cached > self._last_user_ts_cached:
-                    self._pending_cached = False
-            self._pending_checked_at = now
+        if self._last_user_ts_cached > 0:
+            if self._last_done_ts_cached > self._last_user_ts_cached:
+                self._pending_cached = False
+            if self._last_abort_ts_cached > self._last_user_ts_cached:
+                self._pending_cached = False
 
         return self._pending_cached, self._req_started_at_cached, session_file
 
@@ -560,7 +1126,7 @@ class CodexMonitor:
                     "Where-Object { $_.CommandLine -match '@openai/codex/vendor' -and $_.CommandLine -match 'codex' } | "
                     "Select-Object -First 1 -ExpandProperty ProcessId"
                 )
-                out = subprocess.run(
+                out = run_command(
                     ["powershell", "-NoProfile", "-Command", cmd],
                     capture_output=True,
                     text=True,
@@ -568,8 +1134,14 @@ class CodexMonitor:
                 return int(out) if out.isdigit() else None
             except Exception:
                 return None
+        table = scan_processes()
+        if table is not None:
+            for p in table.codex_processes():
+                if "@openai/codex/vendor" in p.cmdline:
+                    return p.pid
+            return None
         try:
-            result = subprocess.run(
+            result = run_command(
                 ["pgrep", "-f", "@openai/codex/vendor.*codex"],
                 capture_output=True, text=True
             )
@@ -580,7 +1152,7 @@ class CodexMonitor:
             pass
         try:
             # Fallback: scan `ps` output.
-            out = subprocess.run(
+            out = run_command(
                 ["ps", "ax", "-o", "pid=,command="],
                 capture_output=True,
                 text=True,
@@ -600,37 +1172,87 @@ class CodexMonitor:
 
     def sample(self) -> CodexStatus:
         """Take a single status sample."""
+        with self.profiler.phase("total"):
+            status = self._sample()
+        if self.history:
+            self._record_history(status)
+        return status
+
+    def stream(self, interval: float = 2.0):
+        """Async iterator of samples: `async for status in monitor.stream(): ...` (see aio.py)."""
+        try:
+            from .aio import stream
+        except ImportError:
+            from aio import stream
+
+        return stream(self, interval)
+
+    def _record_history(self, status: CodexStatus) -> None:
+        try:
+            from .history import HistoryRecorder
+        except ImportError:
+            from history import HistoryRecorder
+
+        rec = self._recorder
+        if status.pid is not None and (rec is None or rec.pid != status.pid):
+            if rec is not None:
+                rec.close()
+            rec = self._recorder = HistoryRecorder(status.pid, self._process_start_epoch(status.pid))
+        if rec is None:
+            return
+        rec.record(status)
+        if status.state == State.EXITED:
+            rec.close()
+            self._recorder = None
+
+    def _sample(self) -> CodexStatus:
         status = CodexStatus()
         status.elapsed_s = time.time() - self.start_time
 
-        # Find or verify PID
-        if self.pid is None:
-            self.pid = self.find_codex_pid()
+        with self.profiler.phase("pid"):
+            # Find or verify PID
+            if self.pid is None:
+                self.pid = self.find_codex_pid()
 
-        if self.pid is None:
-            status.state = State.EXITED
-            return status
+            if self.pid is None:
+                status.state = State.EXITED
+                return status
 
-        status.pid = self.pid
+            status.pid = self.pid
 
-        # Initialize sampler
-        if self.sampler is None:
-            self.sampler = ProcSampler(self.pid)
+            # Initialize sampler
+            if self.sampler is None:
+                self.sampler = ProcSampler(self.pid, trend_window_s=self.BLOAT_WINDOW_S or 1800)
 
-        # Check if alive
-        if not self.sampler.is_alive():
-            status.state = State.EXITED
-            self.pid = None
-            self.sampler = None
-            return status
+            # Check if alive
+            if not self.sampler.is_alive():
+                status.state = State.EXITED
+                self.pid = None
+                self.sampler = None
+                return status
 
         # Sample metrics
-        status.cpu_delta = self.sampler.sample_cpu()
-        status.io_read_delta, status.io_write_delta = self.sampler.sample_io()
-        proc_state = self.sampler.get_state()
+        with self.profiler.phase("proc"):
+            proc = self.sampler.sample()
+        status.cpu_delta = proc.cpu_delta
+        status.io_read_delta, status.io_write_delta = proc.io_read_delta, proc.io_write_delta
+        status.rchar_delta, status.wchar_delta = proc.rchar_delta, proc.wchar_delta
+        status.net_conns, status.net_state = proc.net_conns, proc.net_state
+        status.rss_bytes, status.pss_bytes = proc.rss_bytes, proc.pss_bytes
+        status.threads, status.fds = proc.threads, proc.fds
+        status.rss_per_h = self.sampler.rss_trend.per_hour()
+        status.fds_per_h = self.sampler.fd_trend.per_hour()
+        status.bloat = self.BLOAT_WINDOW_S > 0 and (
+            self.sampler.rss_trend.growing(self.BLOAT_RSS_RATIO, self.BLOAT_RSS_MIN_BYTES)
+            or self.sampler.fd_trend.growing(self.BLOAT_FD_RATIO, self.BLOAT_FD_MIN)
+        )
+        status.tree_procs = proc.tree_procs
+        status.busy_pid, status.busy_cmd, status.busy_cpu = proc.busy_pid, proc.busy_cmd, proc.busy_cpu
+        proc_state = proc.state
 
         # Check log activity
-        log_active = self.log_watcher.check_activity()
+        with self.profiler.phase("log"):
+            log_active = self.log_watcher.check_activity()
         status.last_tool = self.log_watcher.last_tool
         status.current_step = self.log_watcher.current_step
         status.plan_progress = self.log_watcher.plan_progress
@@ -646,11 +1268,25 @@ class CodexMonitor:
         else:
             status.task_s = 0.0
 
+        tail = self._session_tail
+        if tail is not None and session_file is not None and tail.path == session_file:
+            call = tail.active_call() if pending_user else None
+            if call is not None:
+                status.active_tool = call[0]
+                status.active_tool_s = max(0.0, now - call[1])
+            status.tool_latency = tail.tool_summary()
+            if pending_user:
+                status.tokens_per_s = tail.turns.tokens_per_s(now)
+                status.token_silence_s = tail.turns.token_silence_s(now)
+            status.turn_latency = tail.turns.summary()
+
         # Determine activity: keep this process-local (global logs may include other sessions).
         has_activity = (
             status.cpu_delta >= self.CPU_ACTIVE_S or
             status.io_read_delta > 0 or
-            status.io_write_delta > 0
+            status.io_write_delta > 0 or
+            # A response streaming in over the network does no block IO.
+            (bool(pending_user) and status.net_state == "streaming")
         )
 
         if has_activity:
@@ -658,10 +1294,19 @@ class CodexMonitor:
 
         status.silence_s = time.time() - self._silence_start
 
+        sess_silence = 0.0
+        if session_file:
+            try:
+                sess_silence = max(0.0, now - session_file.stat().st_mtime)
+            except Exception:
+                pass
+        status.session_silence_s = sess_silence
+
         # Determine state
         if proc_state == "D":
             if self._d_start is None:
                 self._d_start = now
+            status.d_state_s = now - self._d_start
         else:
             self._d_start = None
 
@@ -672,11 +1317,15 @@ class CodexMonitor:
         elif self._d_start is not None and (now - self._d_start) >= self.D_STUCK_S:
             status.state = State.STUCK
         elif pending_user is True and session_file:
-            try:
-                sess_silence = now - session_file.stat().st_mtime
-            except Exception:
-                sess_silence = 0.0
-            if self.MODEL_STUCK_S > 0 and sess_silence >= self.MODEL_STUCK_S and not has_activity:
+            # A silent session with a tool call outstanding is a long-running tool,
+            # not a stalled model: it never escalates past IDLE.
+            # Throughput stall: the session may still be written to (retries,
+            # errors) while no output tokens arrive.
+            token_stalled = self.TOKEN_STALL_S > 0 and status.token_silence_s >= self.TOKEN_STALL_S
+            if (
+                (self.MODEL_STUCK_S > 0 and sess_silence >= self.MODEL_STUCK_S or token_stalled)
+                and not has_activity and status.active_tool is None
+            ):
                 status.state = State.STUCK
             elif self.IDLE_S > 0 and sess_silence >= self.IDLE_S and not has_activity:
                 status.state = State.IDLE
@@ -691,23 +1340,3 @@ class CodexMonitor:
 
         return status
 
-
-def format_duration(seconds: float) -> str:
-    """Format seconds as human-readable duration."""
-    seconds = int(seconds)
-    if seconds < 60:
-        return f"{seconds}s"
-    m, s = divmod(seconds, 60)
-    if m < 60:
-        return f"{m}m{s}s"
-    h, m = divmod(m, 60)
-    return f"{h}h{m}m"
-
-
-def format_bytes(n: int) -> str:
-    """Format bytes as human-readable size."""
-    for unit in ["B", "K", "M", "G"]:
-        if n < 1024:
-            return f"{n:.0f}{unit}" if n == int(n) else f"{n:.1f}{unit}"
-        n /= 1024
-    return f"{n:.1f}T"
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""Well-known filesystem locations used by codex-status.
+
+pathlib (and typing) are not imported up front: the `codex-status-bg`
+launcher only needs `cache_root()` and should not pay for them.
+"""
+
+from __future__ import annotations
+
+import os
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def codex_home() -> Path:
+    from pathlib import Path
+
+    env = os.environ.get("CODEX_HOME", "").strip()
+    return Path(env).expanduser() if env else Path.home() / ".codex"
+
+
+def sessions_root() -> Path:
+    return codex_home() / "sessions"
+
+
+def cache_root() -> str:
+    """`cache_dir()` as a plain string."""
+    base = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "codex-status")
+
+
+def cache_dir() -> Path:
+    from pathlib import Path
+
+    return Path(cache_root())
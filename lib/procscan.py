@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""Find Codex processes by controlling TTY.
+
+On Linux this walks /proc once, reading each process's `stat` and `cmdline`,
+and shares the resulting table between callers for PROC_TTL_S, so discovery
+needs no subprocesses. Elsewhere it falls back to a single `ps -A` call,
+and per-process sampling goes through `PsBatch`: one `ps -p` call per tick
+for every monitored pid.
+
+`socket_inodes` and `tcp_connections` map a process's open sockets to its
+entries in /proc/<pid>/net/tcp{,6}, for telling network waits from hangs.
+"""
+
+import os
+import time
+import threading
+from dataclasses import dataclass
+from typing import Optional, Iterable, List, Tuple, Dict
+
+try:
+    from .profiling import run_command
+except ImportError:
+    from profiling import run_command
+
+PROC_TTL_S = 0.5
+
+
+@dataclass
+class ProcInfo:
+    pid: int
+    ppid: int
+    state: str
+    tty: Optional[str]  # e.g. "pts/3", None when there is no controlling TTY
+    start_epoch: float
+    utime: int
+    stime: int
+    cutime: int
+    cstime: int
+    comm: str
+    cmdline: str
+
+
+class ProcessTable:
+    """One snapshot of /proc."""
+
+    def __init__(self, procs: Dict[int, ProcInfo], taken_at: float):
+        self.procs = procs
+        self.taken_at = taken_at
+        self._children: Optional[Dict[int, List[int]]] = None
+
+    def get(self, pid: int) -> Optional[ProcInfo]:
+        return self.procs.get(pid)
+
+    def children(self, pid: int) -> List[int]:
+        if self._children is None:
+            children: Dict[int, List[int]] = {}
+            for p in self.procs.values():
+                children.setdefault(p.ppid, []).append(p.pid)
+            self._children = children
+        return self._children.get(pid, [])
+
+    def parent_chain(self, pid: int) -> List[int]:
+        """Ancestors of `pid`, nearest first."""
+        chain: List[int] = []
+        p = self.procs.get(pid)
+        while p is not None and p.ppid > 0 and p.ppid not in chain:
+            chain.append(p.ppid)
+            p = self.procs.get(p.ppid)
+        return chain
+
+    def codex_processes(self) -> List[ProcInfo]:
+        """Every process that looks like Codex, best matches first."""
+        found = [p for p in self.procs.values() if codex_score(p.cmdline) < 9]
+        found.sort(key=lambda p: (codex_score(p.cmdline), p.pid))
+        return found
+
+    def codex_instances(self) -> List[ProcInfo]:
+        """Codex processes not descended from another Codex process (one per instance)."""
+        found = self.codex_processes()
+        pids = {p.pid for p in found}
+        return [p for p in found if not pids.intersection(self.parent_chain(p.pid))]
+
+    def on_tty(self, tty: str) -> List[ProcInfo]:
+        key = _tty_key(tty)
+        return [p for p in self.procs.values() if p.tty == key]
+
+
+def _clk_tck() -> int:
+    try:
+        return os.sysconf("SC_CLK_TCK")
+    except Exception:
+        return 100
+
+
+def _boot_time() -> float:
+    try:
+        with open("/proc/stat", "rb") as f:
+            for line in f:
+                if line.startswith(b"btime "):
+                    return float(line.split()[1])
+    except Exception:
+        pass
+    return 0.0
+
+
+def tty_name(tty_nr: int) -> Optional[str]:
+    """Decode `stat` field 7 (tty_nr) into a name like "pts/3"."""
+    if tty_nr <= 0:
+        return None
+    major = (tty_nr >> 8) & 0xFFF
+    minor = (tty_nr & 0xFF) | ((tty_nr >> 12) & 0xFFF00)
+    if 136 <= major <= 143:
+        return f"pts/{(major - 136) * 256 + minor}"
+    if major == 4:
+        return f"tty{minor}" if minor < 64 else f"ttyS{minor - 64}"
+    return None
+
+
+def parse_stat(data: bytes) -> Optional[Tuple[str, List[bytes]]]:
+    """Split /proc/<pid>/stat into (comm, fields after comm)."""
+    lpar = data.find(b"(")
+    rpar = data.rfind(b")")
+    if lpar < 0 or rpar < 0:
+        return None
+    return data[lpar + 1:rpar].decode(errors="replace"), data[rpar + 2:].split()
+
+
+def read_proc(pid: int, boot: float, hz: int, with_cmdline: bool = True) -> Optional[ProcInfo]:
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            parsed = parse_stat(f.read())
+        if parsed is None:
+            return None
+        comm, rest = parsed
+        cmdline = ""
+        if with_cmdline:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                cmdline = f.read().replace(b"\0", b" ").decode(errors="replace").strip()
+        return ProcInfo(
+            pid=pid,
+            ppid=int(rest[1]),
+            state=rest[0].decode(),
+            tty=tty_name(int(rest[4])),
+            start_epoch=boot + int(rest[19]) / hz,
+            utime=int(rest[11]),
+            stime=int(rest[12]),
+            cutime=int(rest[13]),
+            cstime=int(rest[14]),
+            comm=comm,
+            cmdline=cmdline,
+        )
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def has_procfs() -> bool:
+    return os.path.isfile("/proc/self/stat")
+
+
+_table: Optional[ProcessTable] = None
+_table_lock = threading.Lock()
+_boot: Optional[float] = None
+
+
+def scan_processes(max_age: float = PROC_TTL_S) -> Optional[ProcessTable]:
+    """Returns a /proc snapshot no older than `max_age`, or None without procfs."""
+    global _table, _boot
+    if not has_procfs():
+        return None
+    with _table_lock:
+        now = time.time()
+        if _table is not None and now - _table.taken_at <= max_age:
+            return _table
+        if _boot is None:
+            _boot = _boot_time()
+        hz = _clk_tck()
+        procs: Dict[int, ProcInfo] = {}
+        for name in os.listdir("/proc"):
+            if not name.isdigit():
+                continue
+            info = read_proc(int(name), _boot, hz)
+            if info is not None:
+                procs[info.pid] = info
+        _table = ProcessTable(procs, now)
+        return _table
+
+
+def process_start_epoch(pid: int) -> Optional[float]:
+    """Start time of `pid` from /proc (without a full scan), or None."""
+    global _boot
+    if not has_procfs():
+        return None
+    if _boot is None:
+        _boot = _boot_time()
+    info = read_proc(pid, _boot, _clk_tck(), with_cmdline=False)
+    return info.start_epoch if info else None
+
+
+def ps_backend_forced() -> bool:
+    """CODEX_STATUS_PROC_BACKEND=ps: sample processes through `ps` even where /proc is readable."""
+    return os.environ.get("CODEX_STATUS_PROC_BACKEND", "auto").strip().lower() == "ps"
+
+
+@dataclass
+class PsRow:
+    pid: int
+    state: str
+    cpu_s: float  # total CPU time
+    elapsed_s: float  # since the process started
+
+
+class PsBatch:
+    """Samples every monitored pid with one `ps` call, shared between monitors.
+
+    Without procfs each monitor needs its process's state, CPU time and age
+    on every sample. `lookup(pid)` adds the pid to the batch and returns its
+    row from a `ps -o pid=,state=,time=,etime= -p pid1,pid2,...` snapshot no
+    older than `ttl_s`, so all monitors sampling within the same tick share
+    one fork. A pid not looked up for EXPIRE_S is dropped from the batch.
+    """
+
+    EXPIRE_S = 120.0
+
+    def __init__(self, ttl_s: float = PROC_TTL_S):
+        self.ttl_s = ttl_s
+        self._pids: Dict[int, float] = {}  # pid -> last lookup
+        self._rows: Optional[Dict[int, PsRow]] = None
+        self._taken_at = 0.0
+        self._lock = threading.Lock()
+
+    def lookup(self, pid: int) -> Optional[PsRow]:
+        """The pid's row, or None if `ps` did not list it (or could not be run)."""
+        with self._lock:
+            now = time.time()
+            known = pid in self._pids
+            self._pids[pid] = now
+            if not known or self._rows is None or now - self._taken_at > self.ttl_s:
+                self._refresh(now)
+            return self._rows.get(pid) if self._rows is not None else None
+
+    def invalidate(self) -> None:
+        """Makes the next lookup run `ps` again."""
+        with self._lock:
+            self._taken_at = 0.0
+
+    def _refresh(self, now: float) -> None:
+        for pid, seen in list(self._pids.items()):
+            if now - seen > self.EXPIRE_S:
+                del self._pids[pid]
+        self._taken_at = now
+        try:
+            p = run_command(
+                ["ps", "-o", "pid=,state=,time=,etime=", "-p", ",".join(str(pid) for pid in self._pids)],
+                capture_output=True,
+                text=True,
+            )
+        except Exception:
+            self._rows = None
+            return
+        rows: Dict[int, PsRow] = {}
+        for line in p.stdout.splitlines():
+            parts = line.split()
+            if len(parts) != 4:
+                continue
+            try:
+                pid = int(parts[0])
+            except ValueError:
+                continue
+            cpu_s = parse_elapsed(parts[2])
+            elapsed_s = parse_elapsed(parts[3])
+            rows[pid] = PsRow(pid, parts[1][:1], cpu_s or 0.0, elapsed_s or 0.0)
+        # `ps` exits non-zero when none of the pids exist; an error message without output means it failed.
+        self._rows = rows if rows or p.returncode == 0 or not p.stderr.strip() else None
+
+
+_ps_batch: Optional[PsBatch] = None
+
+
+def default_ps_batch() -> PsBatch:
+    """Process-wide batch shared by all monitors."""
+    global _ps_batch
+    if _ps_batch is None:
+        _ps_batch = PsBatch()
+    return _ps_batch
+
+
+TCP_ESTABLISHED = 1
+# Names of /proc/net/tcp `st` values.
+TCP_STATES = {
+    1: "ESTABLISHED", 2: "SYN_SENT", 3: "SYN_RECV", 4: "FIN_WAIT1", 5: "FIN_WAIT2", 6: "TIME_WAIT",
+    7: "CLOSE", 8: "CLOSE_WAIT", 9: "LAST_ACK", 10: "LISTEN", 11: "CLOSING",
+}
+
+
+def socket_inodes(pid: int, fds: Optional[List[str]] = None) -> List[int]:
+    """Inodes of the sockets among `pid`'s open file descriptors (`fds`: a listing of /proc/<pid>/fd)."""
+    fd_dir = f"/proc/{pid}/fd"
+    if fds is None:
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            return []
+    inodes = []
+    for fd in fds:
+        try:
+            link = os.readlink(f"{fd_dir}/{fd}")
+        except OSError:
+            continue
+        if link.startswith("socket:["):
+            try:
+                inodes.append(int(link[8:-1]))
+            except ValueError:
+                pass
+    return inodes
+
+
+def tcp_connections(pid: int, inodes: Iterable[int]) -> Dict[int, Tuple[int, int, int, int, bytes]]:
+    """inode -> (state, tx_queue, rx_queue, retransmits, ack/cwnd fields) for the TCP sockets among `inodes`.
+
+    The trailing rto/ato/quickack/cwnd/ssthresh fields are kept raw: they are
+    only compared between samples, as a hint that data moved. Read from
+    /proc/<pid>/net so the process's own network namespace is used.
+    """
+    wanted = set(inodes)
+    conns: Dict[int, Tuple[int, int, int, int, bytes]] = {}
+    if not wanted:
+        return conns
+    for name in ("tcp", "tcp6"):
+        try:
+            with open(f"/proc/{pid}/net/{name}", "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        for line in data.splitlines()[1:]:
+            # sl local rem st tx_queue:rx_queue tr:tm->when retrnsmt uid timeout inode
+            # refcnt addr rto ato quick|pingpong cwnd ssthresh
+            parts = line.split()
+            try:
+                inode = int(parts[9])
+                if inode not in wanted:
+                    continue
+                tx, rx = parts[4].split(b":")
+                conns[inode] = (int(parts[3], 16), int(tx, 16), int(rx, 16), int(parts[6], 16), b" ".join(parts[12:]))
+            except (IndexError, ValueError):
+                continue
+    return conns
+
+
+def parse_elapsed(s: str) -> Optional[float]:
+    """Seconds in a `ps` etime/time value: [[dd-]hh:]mm:ss, seconds possibly fractional (BSD `time`)."""
+    s = (s or "").strip()
+    if not s:
+        return None
+    days = 0
+    if "-" in s:
+        d, s = s.split("-", 1)
+        try:
+            days = int(d)
+        except ValueError:
+            return None
+    parts = s.split(":")
+    try:
+        nums = [float(p) for p in parts]
+    except ValueError:
+        return None
+    if len(nums) == 3:
+        h, m, sec = nums
+    elif len(nums) == 2:
+        h, m, sec = 0.0, nums[0], nums[1]
+    else:
+        return None
+    return days * 86400 + h * 3600 + m * 60 + sec
+
+
+def codex_score(cmdline: str) -> int:
+    """Lower is a more likely Codex process; 9 means "not Codex"."""
+    if "@openai/codex/vendor" in cmdline and "codex" in cmdline:
+        return 0
+    if " node " in f" {cmdline} " and "/bin/codex" in cmdline:
+        return 1
+    if " codex" in f" {cmdline} " or cmdline.rstrip().endswith("/codex"):
+        return 2
+    return 9
+
+
+def _tty_key(tty: str) -> str:
+    return tty[5:] if tty.startswith("/dev/") else tty
+
+
+def tty_processes(ttys: Iterable[str]) -> Dict[str, List[Tuple[int, int, str]]]:
+    """Returns {tty: [(pid, elapsed_s, cmdline)]} for the given TTYs, from one `ps` call."""
+    wanted = {_tty_key(t): t for t in ttys}
+    result: Dict[str, List[Tuple[int, int, str]]] = {t: [] for t in wanted.values()}
+    if not wanted:
+        return result
+
+    ps_variants = [
+        (True, ["ps", "-A", "-o", "pid=,tty=,etimes=,args="]),
+        (False, ["ps", "-A", "-o", "pid=,tty=,etime=,command="]),
+    ]
+    for is_etimes, cmd in ps_variants:
+        try:
+            p = run_command(cmd, capture_output=True, text=True)
+            if p.returncode != 0 or not p.stdout.strip():
+                continue
+        except Exception:
+            continue
+        for line in p.stdout.splitlines():
+            parts = line.strip().split(None, 3)
+            if len(parts) < 3:
+                continue
+            tty = wanted.get(parts[1])
+            if tty is None:
+                continue
+            try:
+                pid = int(parts[0])
+            except Exception:
+                continue
+            if is_etimes:
+                elapsed = int(parts[2]) if parts[2].isdigit() else None
+            else:
+                etime = parse_elapsed(parts[2])
+                elapsed = int(etime) if etime is not None else None
+            if elapsed is None:
+                continue
+            result[tty].append((pid, elapsed, parts[3] if len(parts) >= 4 else ""))
+        break
+    return result
+
+
+def _tty_processes_procfs(table: ProcessTable, ttys: Iterable[str]) -> Dict[str, List[Tuple[int, int, str]]]:
+    wanted = {_tty_key(t): t for t in ttys}
+    result: Dict[str, List[Tuple[int, int, str]]] = {t: [] for t in wanted.values()}
+    for p in table.procs.values():
+        tty = wanted.get(p.tty) if p.tty else None
+        if tty is not None:
+            result[tty].append((p.pid, int(table.taken_at - p.start_epoch), p.cmdline))
+    return result
+
+
+def find_codex_pids_on_ttys(ttys: Iterable[str]) -> Dict[str, int]:
+    """Returns {tty: codex pid} for the TTYs that have a Codex process."""
+    found: Dict[str, int] = {}
+    table = scan_processes()
+    by_tty = _tty_processes_procfs(table, ttys) if table is not None else tty_processes(ttys)
+    for tty, candidates in by_tty.items():
+        if not candidates:
+            continue
+        candidates.sort(key=lambda t: (codex_score(t[2]), t[1]))
+        found[tty] = candidates[0][0]
+    return found
+
+
+def find_codex_pid_on_tty(tty: str) -> Optional[int]:
+    return find_codex_pids_on_ttys([tty]).get(tty)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""Optional per-phase timing for `CodexMonitor.sample()`.
+
+Hot paths bump the module-level `counters` (bytes read, lines parsed,
+subprocesses spawned through `run_command`). A `SampleProfiler` snapshots
+them around each phase of a sample and keeps rolling statistics of wall
+time and counter deltas per phase. The counters are per thread: aio.py
+samples several monitors at once on executor threads, and each sample runs
+on one of them. Profiling is off unless
+CODEX_STATUS_PROFILE is set (or `codex-status --profile` is used); when off,
+`phase()` returns a shared no-op context.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Deque
+
+if TYPE_CHECKING:
+    import subprocess
+
+
+class Counters(threading.local):
+    # No __slots__: slot values would be shared by every thread.
+    def __init__(self):
+        self.bytes_read = 0
+        self.lines = 0
+        self.spawned = 0
+
+
+counters = Counters()
+
+
+def command_timeout() -> float:
+    try:
+        return max(0.1, float(os.environ.get("CODEX_STATUS_CMD_TIMEOUT_S", "5")))
+    except ValueError:
+        return 5.0
+
+
+def run_command(args: List[str], **kwargs) -> "subprocess.CompletedProcess":
+    """`subprocess.run`, counted for profiling.
+
+    Bounded by CODEX_STATUS_CMD_TIMEOUT_S unless a timeout is given; a hung
+    `ps` or `wezterm cli` raises `subprocess.TimeoutExpired` instead of
+    stalling the sample.
+    """
+    import subprocess
+
+    counters.spawned += 1
+    kwargs.setdefault("timeout", command_timeout())
+    return subprocess.run(args, **kwargs)
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get("CODEX_STATUS_PROFILE", "").strip().lower() in ("1", "on", "yes", "true")
+
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is open-ended.
+HIST_BOUNDS_MS = (0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000)
+
+
+class RollingStats:
+    """Summary statistics over the last `size` values."""
+
+    def __init__(self, size: int = 256):
+        self.values: Deque[float] = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        self.values.append(value)
+        self.count += 1
+        self.total += value
+
+    def histogram(self, bounds=HIST_BOUNDS_MS) -> List[int]:
+        hist = [0] * (len(bounds) + 1)
+        for v in self.values:
+            i = 0
+            while i < len(bounds) and v > bounds[i]:
+                i += 1
+            hist[i] += 1
+        return hist
+
+    def summary(self) -> Dict[str, Any]:
+        vals = sorted(self.values)
+        n = len(vals)
+        if not n:
+            return {"n": 0, "count": self.count}
+
+        def pct(p: float) -> float:
+            return vals[min(n - 1, int(round((n - 1) * p / 100.0)))]
+
+        return {
+            "n": n,
+            "count": self.count,
+            "mean": sum(vals) / n,
+            "p50": pct(50),
+            "p90": pct(90),
+            "p95": pct(95),
+            "p99": pct(99),
+            "max": vals[-1],
+        }
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "t0", "b0", "l0", "s0")
+
+    def __init__(self, profiler: "SampleProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        self.b0, self.l0, self.s0 = counters.bytes_read, counters.lines, counters.spawned
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._record(
+            self.name,
+            (time.perf_counter() - self.t0) * 1000,
+            counters.bytes_read - self.b0,
+            counters.lines - self.l0,
+            counters.spawned - self.s0,
+        )
+        return False
+
+
+class _PhaseStats:
+    def __init__(self, window: int):
+        self.wall_ms = RollingStats(window)
+        self.bytes_read = RollingStats(window)
+        self.lines = RollingStats(window)
+        self.spawned = RollingStats(window)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "wall_ms": self.wall_ms.summary(),
+            "wall_hist": self.wall_ms.histogram(),
+            "bytes_read": self.bytes_read.summary(),
+            "lines": self.lines.summary(),
+            "spawned": self.spawned.summary(),
+            "totals": {
+                "wall_ms": self.wall_ms.total,
+                "bytes_read": int(self.bytes_read.total),
+                "lines": int(self.lines.total),
+                "spawned": int(self.spawned.total),
+            },
+        }
+
+
+class SampleProfiler:
+    """Rolling per-phase statistics for one monitor's samples."""
+
+    WINDOW = 256
+
+    def __init__(self, enabled: Optional[bool] = None, window: int = WINDOW):
+        self.enabled = profiling_enabled() if enabled is None else enabled
+        self.window = window
+        self.phases: Dict[str, _PhaseStats] = {}
+        self.last: Dict[str, float] = {}
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def _record(self, name: str, wall_ms: float, bytes_read: int, lines: int, spawned: int) -> None:
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = _PhaseStats(self.window)
+        stats.wall_ms.add(wall_ms)
+        stats.bytes_read.add(bytes_read)
+        stats.lines.add(lines)
+        stats.spawned.add(spawned)
+        self.last[name] = wall_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "hist_bounds_ms": list(HIST_BOUNDS_MS),
+            "last_ms": dict(self.last),
+            "phases": {name: stats.to_dict() for name, stats in self.phases.items()},
+        }
+
+
+def render_profile(data: Dict[str, Any]) -> str:
+    """Table of per-phase statistics from `SampleProfiler.to_dict()`."""
+    phases = data.get("phases") or {}
+    if not phases:
+        return "No profile samples (set CODEX_STATUS_PROFILE=1 or use --profile)"
+    lines = [f"{'phase':<16}{'n':>6}{'last':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  {'bytes':>9}{'lines':>9}{'spawn':>9}"]
+    for name, st in phases.items():
+        w = st["wall_ms"]
+        if not w.get("n"):
+            continue
+        lines.append(
+            f"{name:<16}{w['n']:>6}{data['last_ms'].get(name, 0):>9.2f}{w['p50']:>9.2f}{w['p90']:>9.2f}{w['p99']:>9.2f}{w['max']:>9.2f}"
+            f"  {st['bytes_read']['mean']:>9.0f}{st['lines']['mean']:>9.1f}{st['spawned']['mean']:>9.2f}"
+        )
+    lines.append("(times in ms; bytes/lines/spawn are means per sample)")
+    return "\n".join(lines)
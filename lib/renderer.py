@@ -3,11 +3,12 @@
 
 import os
 import sys
-from typing import Optional, TextIO
+import time
+from typing import Optional, TextIO, List, Tuple, Any, Dict
 try:
-    from .monitor import CodexStatus, State, format_duration, format_bytes
+    from .status import CodexStatus, State, format_duration, format_bytes
 except ImportError:
-    from monitor import CodexStatus, State, format_duration, format_bytes
+    from status import CodexStatus, State, format_duration, format_bytes
 
 
 # State icons and colors
@@ -79,12 +80,18 @@ def render_title(status: CodexStatus, prefix: str = "Codex") -> str:
     if status.state == State.EXITED:
         return f"{icon} {prefix} Exit"
 
+    if status.active_tool:
+        parts.append(f"{status.active_tool[:20]} {format_duration(status.active_tool_s)}")
+
     if status.plan_progress:
         parts.append(f"[{status.plan_progress}]")
 
     if status.current_step and len(status.current_step) <= 30:
         parts.append(status.current_step)
 
+    if status.bloat:
+        parts.append("⚠Bloat")
+
     return " ".join(parts)
 
 
@@ -114,6 +121,15 @@ def render_oneline(status: CodexStatus, color: bool = True) -> str:
         if status.io_read_delta > 0 or status.io_write_delta > 0:
             parts.append(f"io+{format_bytes(status.io_read_delta + status.io_write_delta)}")
 
+        if status.net_state and status.net_state != "none":
+            parts.append(f"net={status.net_state}")
+
+        if status.busy_cmd:
+            parts.append(f"child={status.busy_cmd}")
+
+        if status.active_tool:
+            parts.append(f"running={status.active_tool}:{format_duration(status.active_tool_s)}")
+
         if status.plan_progress:
             parts.append(f"step={status.plan_progress}")
 
@@ -143,6 +159,28 @@ def render_detail(status: CodexStatus) -> str:
     if status.io_read_delta > 0 or status.io_write_delta > 0:
         lines.append(f"{c}│{RESET} IO Δ:     R+{format_bytes(status.io_read_delta)} W+{format_bytes(status.io_write_delta)}")
 
+    if status.net_state:
+        lines.append(
+            f"{c}│{RESET} Net:      {status.net_state} ({status.net_conns} conn) "
+            f"R+{format_bytes(status.rchar_delta)} W+{format_bytes(status.wchar_delta)}"
+        )
+
+    if status.rss_bytes:
+        mem = f"RSS {format_bytes(status.rss_bytes)}"
+        if status.pss_bytes:
+            mem += f"  PSS {format_bytes(status.pss_bytes)}"
+        lines.append(f"{c}│{RESET} Memory:   {mem}  threads {status.threads}  fds {status.fds}")
+        trend = f"RSS {'+' if status.rss_per_h >= 0 else '-'}{format_bytes(int(abs(status.rss_per_h)))}/h  fds {status.fds_per_h:+.0f}/h"
+        if status.bloat:
+            trend += "  ⚠ Bloat: sustained growth"
+        lines.append(f"{c}│{RESET} Trend:    {trend}")
+
+    if status.tree_procs > 1:
+        lines.append(f"{c}│{RESET} Procs:    {status.tree_procs}")
+
+    if status.busy_cmd:
+        lines.append(f"{c}│{RESET} Busy:     {status.busy_cmd} ({status.busy_pid}) +{status.busy_cpu:.2f}s")
+
     if status.plan_progress:
         lines.append(f"{c}│{RESET} Progress: {status.plan_progress}")
 
@@ -153,11 +191,112 @@ def render_detail(status: CodexStatus) -> str:
     if status.last_tool:
         lines.append(f"{c}│{RESET} LastTool: {status.last_tool}")
 
+    if status.active_tool:
+        lines.append(f"{c}│{RESET} Tool:     {status.active_tool} running {format_duration(status.active_tool_s)}")
+
+    if status.tool_latency:
+        lines.append(f"{c}│{RESET} Tools:")
+    for tool, s in sorted(status.tool_latency.items(), key=lambda kv: -kv[1]["n"])[:5]:
+        lines.append(
+            f"{c}│{RESET}   {tool[:12]:<12} n={s['n']:<4} p50 {format_duration(s['p50'])}  "
+            f"p95 {format_duration(s['p95'])}  max {format_duration(s['max'])}"
+        )
+
+    if status.tokens_per_s > 0 or status.token_silence_s > 0:
+        lines.append(
+            f"{c}│{RESET} Tokens:   {status.tokens_per_s:.1f}/s  no output for {format_duration(status.token_silence_s)}"
+        )
+
+    if status.turn_latency:
+        lines.append(f"{c}│{RESET} Turns:")
+    turn_rows = (("first_item_s", "1st item"), ("item_gap_s", "item gap"), ("turn_s", "turn"))
+    for key, name in turn_rows:
+        s = status.turn_latency.get(key)
+        if s:
+            lines.append(
+                f"{c}│{RESET}   {name:<12} n={s['n']:<4} p50 {format_duration(s['p50'])}  "
+                f"p95 {format_duration(s['p95'])}  max {format_duration(s['max'])}"
+            )
+    s = status.turn_latency.get("tokens_per_s")
+    if s:
+        lines.append(f"{c}│{RESET}   {'tok/s':<12} n={s['n']:<4} p50 {s['p50']:.1f}  p95 {s['p95']:.1f}  max {s['max']:.1f}")
+
     lines.append(f"{c}╰─────────────────────────────────────────{RESET}")
 
     return "\n".join(lines)
 
 
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def sparkline(values: List[float]) -> Tuple[str, float]:
+    """Returns (sparkline, max value)."""
+    top = max(values) if values else 0.0
+    if top <= 0:
+        return SPARK_CHARS[0] * len(values), 0.0
+    last = len(SPARK_CHARS) - 1
+    return "".join(SPARK_CHARS[min(last, int(v / top * last + 0.5))] for v in values), top
+
+
+def render_history(samples: List[Any], width: int = 60, color: bool = True) -> str:
+    """Sparklines of recorded samples (see history.HistorySample), oldest on the left."""
+    if not samples:
+        return "No history recorded"
+    n = min(max(10, width), len(samples))
+    # Each column covers a bucket of samples: the last state and the largest values.
+    buckets = [samples[i * len(samples) // n:(i + 1) * len(samples) // n] for i in range(n)]
+
+    def column(attr: str) -> List[float]:
+        return [max(getattr(s, attr) for s in b) for b in buckets]
+
+    start, end = samples[0].ts, samples[-1].ts
+    lines = [
+        f"History: {len(samples)} samples, "
+        f"{time.strftime('%H:%M:%S', time.localtime(start))} - {time.strftime('%H:%M:%S', time.localtime(end))} "
+        f"({format_duration(end - start)})"
+    ]
+    states = ""
+    for b in buckets:
+        state = b[-1].state
+        icon = STATE_ICONS.get(state, "?")
+        states += f"{COLORS.get(state, '')}{icon}{RESET}" if color else icon
+    lines.append(f"State    {states}")
+    rows = [
+        ("CPU", "cpu_delta", lambda v: f"{v:.2f}s"),
+        ("Read", "io_read_delta", format_bytes),
+        ("Write", "io_write_delta", format_bytes),
+        ("Silence", "silence_s", format_duration),
+        ("Task", "task_s", format_duration),
+    ]
+    for label, attr, fmt in rows:
+        spark, top = sparkline(column(attr))
+        lines.append(f"{label:<9}{spark}  max {fmt(top)}")
+    return "\n".join(lines)
+
+
+def render_report(summary: Dict[str, Any], reports: List[Any], top: int = 10) -> str:
+    """Aggregate report over replayed sessions (see report.SessionReport)."""
+    s = summary
+    lines = [
+        f"Sessions: {s['sessions']}  Turns: {s['turns']}  Done: {s['done']}  "
+        f"Aborted: {s['aborted']}  Unfinished: {s['unfinished']}",
+        f"Task:     p50 {format_duration(s['task_p50_s'])}  p90 {format_duration(s['task_p90_s'])}  "
+        f"max {format_duration(s['task_max_s'])}",
+        f"To DONE:  p50 {format_duration(s['done_p50_s'])}  p90 {format_duration(s['done_p90_s'])}",
+        f"Silence:  p90 {format_duration(s['gap_p90_s'])}  max {format_duration(s['gap_max_s'])} (longest gaps inside tasks)",
+    ]
+    ranked = sorted(reports, key=lambda r: max(r.task_durations, default=0.0), reverse=True)[:top]
+    if ranked:
+        lines.append("")
+        lines.append(f"{'Started':<17} {'Turns':>5} {'Done':>5} {'Abort':>5} {'Longest':>8} {'Gap':>8}  Session")
+        for r in ranked:
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(r.start)) if r.start else "-"
+            longest = format_duration(max(r.task_durations, default=0.0))
+            gap = format_duration(r.gaps[0][0]) if r.gaps else "-"
+            lines.append(f"{started:<17} {r.turns:>5} {r.done:>5} {r.aborted:>5} {longest:>8} {gap:>8}  {r.session_id or r.path}")
+    return "\n".join(lines)
+
+
 def set_terminal_title(title: str, out: Optional[TextIO] = None) -> None:
     """Set terminal window/tab title using OSC escape sequence."""
     # OSC 0 sets both window and icon title; some terminals/prompts also write OSC 0.
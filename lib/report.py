@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Offline replay of historical Codex sessions.
+
+Every `.jsonl` under ~/.codex/sessions is streamed through the live
+monitor's bounded reader (`JsonlTail`) and event decoding (`decode_line`), so
+memory stays flat however large a tool output line is, and the turns are
+rebuilt with the monitor's rules: a user message opens a task, the first
+CODEX_DONE or turn abort after it closes the task, and a later user message
+restarts it. Per session this yields task durations, time to CODEX_DONE,
+aborted turns and the longest silent gaps inside a running task (the gaps
+the stuck detection has to sit through).
+
+Files are replayed on a process pool and results are cached in
+`<cache>/report-cache.json` keyed by (path, size, mtime), so reruns only
+replay new or grown sessions.
+"""
+
+import os
+import json
+import heapq
+from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from typing import Optional, Dict, Any, List, Tuple, Iterable
+
+try:
+    from .monitor import JsonlTail
+    from .paths import cache_dir, sessions_root
+    from .session_events import USER, DONE, ABORT, decode_line, line_timestamp
+    from .session_index import SESSION_ID_RE
+except ImportError:
+    from monitor import JsonlTail
+    from paths import cache_dir, sessions_root
+    from session_events import USER, DONE, ABORT, decode_line, line_timestamp
+    from session_index import SESSION_ID_RE
+
+
+CACHE_VERSION = 1
+TOP_GAPS = 3
+# Below this many files the pool's startup costs more than it saves.
+MIN_PARALLEL_FILES = 8
+
+
+@dataclass
+class SessionReport:
+    path: str
+    session_id: str = ""
+    start: float = 0.0
+    end: float = 0.0
+    lines: int = 0
+    turns: int = 0
+    done: int = 0
+    aborted: int = 0
+    unfinished: int = 0
+    # Seconds from user message to CODEX_DONE / abort / next user message.
+    task_durations: List[float] = field(default_factory=list)
+    done_latencies: List[float] = field(default_factory=list)
+    # (seconds, start epoch) of the longest gaps between lines inside a task.
+    gaps: List[Tuple[float, float]] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SessionReport":
+        data = dict(data)
+        data["gaps"] = [tuple(g) for g in data.get("gaps") or []]
+        return cls(**data)
+
+
+def replay_session(path: str) -> SessionReport:
+    """Streams one session file and rebuilds its turns."""
+    match = SESSION_ID_RE.search(os.path.basename(path))
+    report = SessionReport(path=path, session_id=match.group(1) if match else "")
+    task_start = 0.0
+    last_ts = 0.0
+    gaps: List[Tuple[float, float]] = []
+
+    def finish(ts: float) -> None:
+        report.task_durations.append(max(0.0, ts - task_start))
+
+    # Bounded reads: a few MB per read and at most MAX_LINE bytes of any line,
+    # however large a tool output is (its events are in the line's head).
+    reader = JsonlTail(Path(path), locate=lambda st: 0)
+    while True:
+        lines, _ = reader.read_lines()
+        for line in lines:
+            report.lines += 1
+            ts = line_timestamp(line)
+            if ts is None:
+                continue
+            if not report.start:
+                report.start = ts
+            report.end = max(report.end, ts)
+            if task_start and last_ts and ts - last_ts > 0:
+                gap = (ts - last_ts, last_ts)
+                if len(gaps) < TOP_GAPS:
+                    heapq.heappush(gaps, gap)
+                elif gap > gaps[0]:
+                    heapq.heapreplace(gaps, gap)
+            last_ts = ts
+
+            event = decode_line(line)
+            if event is None:
+                continue
+            if event.kind == USER:
+                if task_start and event.ts > task_start:
+                    # Follow-up while running: the monitor restarts the task timer.
+                    report.unfinished += 1
+                    finish(event.ts)
+                if not task_start or event.ts > task_start:
+                    report.turns += 1
+                    task_start = event.ts
+            elif event.kind in (DONE, ABORT) and task_start and event.ts > task_start:
+                finish(event.ts)
+                if event.kind == DONE:
+                    report.done += 1
+                    report.done_latencies.append(event.ts - task_start)
+                elif event.kind == ABORT:
+                    report.aborted += 1
+                task_start = 0.0
+        if reader.caught_up:
+            break
+    if task_start:
+        report.unfinished += 1
+    report.gaps = sorted(gaps, reverse=True)
+    return report
+
+
+def session_files(root: Optional[Path] = None) -> Iterable[str]:
+    for dirpath, _, names in os.walk(root or sessions_root()):
+        for name in names:
+            if name.endswith(".jsonl"):
+                yield os.path.join(dirpath, name)
+
+
+def _cache_path() -> Path:
+    return cache_dir() / "report-cache.json"
+
+
+def _load_cache() -> Dict[str, Any]:
+    try:
+        data = json.loads(_cache_path().read_text())
+        if data.get("version") == CACHE_VERSION and isinstance(data.get("files"), dict):
+            return data["files"]
+    except Exception:
+        pass
+    return {}
+
+
+def _save_cache(files: Dict[str, Any]) -> None:
+    path = _cache_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"version": CACHE_VERSION, "files": files}, separators=(",", ":")))
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+
+def build_reports(
+    root: Optional[Path] = None,
+    jobs: Optional[int] = None,
+    use_cache: bool = True,
+) -> List[SessionReport]:
+    """Reports for every session under root, oldest first.
+
+    Only files whose (size, mtime) changed since the cached run are replayed.
+    """
+    cached = _load_cache() if use_cache else {}
+    entries: Dict[str, Any] = {}
+    todo: List[str] = []
+    for path in session_files(root):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        key = [st.st_size, st.st_mtime_ns]
+        hit = cached.get(path)
+        if hit is not None and hit.get("key") == key:
+            entries[path] = hit
+        else:
+            entries[path] = {"key": key}
+            todo.append(path)
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(todo) >= MIN_PARALLEL_FILES:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Largest files first so one big session does not finish last on its own.
+        todo.sort(key=lambda p: entries[p]["key"][0], reverse=True)
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = pool.map(replay_session, todo, chunksize=max(1, len(todo) // (jobs * 8)))
+            for path, report in zip(todo, results):
+                entries[path]["report"] = asdict(report)
+    else:
+        for path in todo:
+            entries[path]["report"] = asdict(replay_session(path))
+
+    if use_cache and (todo or len(entries) != len(cached)):
+        _save_cache(entries)
+    reports = [SessionReport.from_dict(e["report"]) for e in entries.values()]
+    reports.sort(key=lambda r: r.start)
+    return reports
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def summarize(reports: List[SessionReport]) -> Dict[str, Any]:
+    durations = [d for r in reports for d in r.task_durations]
+    latencies = [d for r in reports for d in r.done_latencies]
+    gaps = [g for r in reports for g in r.gaps]
+    return {
+        "sessions": len(reports),
+        "turns": sum(r.turns for r in reports),
+        "done": sum(r.done for r in reports),
+        "aborted": sum(r.aborted for r in reports),
+        "unfinished": sum(r.unfinished for r in reports),
+        "task_p50_s": _percentile(durations, 0.5),
+        "task_p90_s": _percentile(durations, 0.9),
+        "task_max_s": max(durations, default=0.0),
+        "done_p50_s": _percentile(latencies, 0.5),
+        "done_p90_s": _percentile(latencies, 0.9),
+        "gap_p90_s": _percentile([g[0] for g in gaps], 0.9),
+        "gap_max_s": max((g[0] for g in gaps), default=0.0),
+    }
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Adaptive delay between `CodexMonitor.sample()` calls.
+
+The delay follows the monitor's state machine instead of a fixed interval:
+
+- right after a state change or a new user request, sample every FAST_S for
+  FAST_WINDOW_S so the title settles quickly;
+- while Running/Thinking, never sleep past the next threshold crossing
+  (FREE_SILENCE_S, THINKING_S, IDLE_S, MODEL_STUCK_S, TOKEN_STALL_S, and
+  D_STUCK_S while the process is in D state), so the title flips
+  within MIN_GAP_S + THRESHOLD_SLACK_S of the threshold;
+- while Free/Idle/Stuck, back off exponentially from the base interval up to
+  CODEX_STATUS_MAX_INTERVAL_S. With file events, new session writes still
+  wake the loop immediately; with polling the backoff bounds the delay.
+
+CODEX_STATUS_ADAPTIVE=0 restores the fixed base interval.
+"""
+
+import os
+import time
+from typing import Optional
+
+try:
+    from .monitor import CodexStatus, State
+except ImportError:
+    from monitor import CodexStatus, State
+
+
+def adaptive_enabled() -> bool:
+    return os.environ.get("CODEX_STATUS_ADAPTIVE", "1").strip().lower() not in ("0", "off", "no")
+
+
+class AdaptiveScheduler:
+    FAST_S = 0.5
+    FAST_WINDOW_S = 3.0
+    THRESHOLD_SLACK_S = 0.05
+    BACKOFF_STATES = (State.FREE, State.IDLE, State.STUCK)
+
+    def __init__(self, monitor, base: float, max_interval: Optional[float] = None, event_driven: bool = False):
+        self.monitor = monitor
+        self.base = base
+        if max_interval is None:
+            env = os.environ.get("CODEX_STATUS_MAX_INTERVAL_S", "").strip()
+            max_interval = float(env) if env else (30.0 if event_driven else 10.0)
+        self.max_interval = max(base, max_interval)
+        self.enabled = adaptive_enabled()
+        self._state: Optional[State] = None
+        self._task_s = 0.0
+        self._fast_until = 0.0
+        self._backoff = base
+
+    def _thresholds(self, status: CodexStatus):
+        m = self.monitor
+        if status.d_state_s is not None and m.D_STUCK_S > 0:
+            yield m.D_STUCK_S - status.d_state_s
+        if status.task_s > 0:
+            for limit in (m.THINKING_S, m.IDLE_S, m.MODEL_STUCK_S):
+                if limit > 0:
+                    yield limit - status.session_silence_s
+            if m.TOKEN_STALL_S > 0 and status.token_silence_s > 0:
+                yield m.TOKEN_STALL_S - status.token_silence_s
+        else:
+            yield m.FREE_SILENCE_S - status.silence_s
+
+    def next_delay(self, status: CodexStatus, now: Optional[float] = None) -> float:
+        """Seconds to wait before sampling again, given the latest status."""
+        if not self.enabled:
+            return self.base
+        now = time.time() if now is None else now
+
+        new_request = status.task_s > 0 and status.task_s < self._task_s
+        if status.state != self._state or new_request:
+            self._fast_until = now + self.FAST_WINDOW_S
+            self._backoff = self.base
+        self._state = status.state
+        self._task_s = status.task_s
+
+        if now < self._fast_until:
+            delay = self.FAST_S
+        elif status.state in self.BACKOFF_STATES:
+            delay = self._backoff
+            self._backoff = min(self.max_interval, self._backoff * 2)
+        else:
+            delay = self.base
+
+        for left in self._thresholds(status):
+            if left > 0:
+                delay = min(delay, left + self.THRESHOLD_SLACK_S)
+        return min(delay, self.max_interval)
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""Fast decoding of Codex session `.jsonl` lines into compact events.
+
+Most lines in a session file are large `response_item` tool outputs and
+reasoning items. `decode_line` reads lines in Codex's compact layout without
+`json.loads`: the timestamp and types come from the line head, the few other
+fields an event needs from byte searches, and timestamps are parsed from
+their fixed ISO-8601 layout with a per-second cache instead of
+`datetime.fromisoformat`. Only done markers and lines in other layouts are
+decoded as JSON, the latter behind a cheap byte-level prefilter.
+
+`scan_backward` walks a session from its end over an mmap, so the last user
+message can be found behind gigabytes of tool output in constant memory.
+"""
+
+import os
+import re
+import json
+import mmap
+import calendar
+from typing import Optional, Dict, Iterator, Tuple
+
+USER = "user"
+DONE = "done"
+ABORT = "turn_aborted"
+TOOL_CALL = "tool_call"
+TOOL_OUTPUT = "tool_output"
+# Any other model output item (reasoning, assistant message without the marker).
+ITEM = "item"
+# Cumulative output token count of the session.
+TOKENS = "token_count"
+
+DONE_RE = re.compile(r"^(?:CCB_DONE|CODEX_DONE)(?::\s*([0-9a-f]{32}))?$")
+
+# Codex writes compact JSON with the envelope and payload type (and role) first:
+#   {"timestamp":"2025-10-09T08:53:22.545Z","type":"response_item","payload":{"type":"function_call",...
+# decode_line reads the timestamp and both types from that head with plain byte
+# operations, and the few fields an event needs (call id, tool name, output
+# tokens) with byte searches, without `json.loads`. Keys searched for in the
+# whole line cannot match inside string values, where their quotes are escaped.
+# Lines in any other layout go through _PREFILTER; escaped JSON inside tool
+# output ("\"role\":\"user\"") does not match it.
+HEAD = 256
+_TS_OPEN = b'{"timestamp":"'
+_TS_CLOSE = b'Z","type":"'
+_RESPONSE_ITEM = b'response_item","payload":{"type":"'
+_EVENT_MSG = b'event_msg","payload":{"type":"'
+_PREFILTER = re.compile(rb'"user_message"|"role":\s*"user"|"turn_aborted"|CODEX_DONE|CCB_DONE')
+_TS_KEY = b'"timestamp":"'
+# Tool calls and their outputs are paired by call id. Shell commands also
+# appear as exec_command_begin/end events with the same call id.
+_CALL_TYPES = {"function_call": None, "custom_tool_call": None, "local_shell_call": "shell"}
+_OUTPUT_TYPES = ("function_call_output", "custom_tool_call_output", "local_shell_call_output")
+_CALL_TYPES_B = {t.encode(): tool for t, tool in _CALL_TYPES.items()}
+_OUTPUT_TYPES_B = frozenset(t.encode() for t in _OUTPUT_TYPES)
+_EXEC_BEGIN = b'"type":"exec_command_begin"'
+_EXEC_END = b'"type":"exec_command_end"'
+_CALL_ID_RE = re.compile(rb'"call_id":"([^"]+)"')
+_ROLE_RE = re.compile(rb'"role":"([a-z]*)"')
+_NAME_RE = re.compile(rb'"name":"([^"\\]*)"')
+_OUTPUT_TOKENS_RE = re.compile(rb'"total_token_usage":\{[^}]*?"output_tokens":(\d+)')
+
+
+def _maybe_relevant(line: bytes) -> bool:
+    """Prefilter for lines not in the compact layout decode_line reads directly."""
+    head = line[:HEAD]
+    if b'"type":"response_item"' in head:
+        if b'"role":"user"' in head:
+            return True
+        if b'"role":"assistant"' in head:
+            return b"CODEX_DONE" in line or b"CCB_DONE" in line
+        # Prefixes of both the call and the output types.
+        return (
+            b'"type":"function_call' in head or b'"type":"custom_tool_call' in head
+            or b'"type":"local_shell_call' in head
+        )
+    if b'"type":"event_msg"' in head:
+        return (
+            b'"user_message"' in head or b'"turn_aborted"' in head
+            or _EXEC_BEGIN in head or _EXEC_END in head or b'"token_count"' in head
+        )
+    if b'"type":"' in head:
+        return False
+    return _PREFILTER.search(line) is not None
+
+
+class SessionEvent:
+    __slots__ = ("kind", "ts", "req_id", "call_id", "tool", "tokens", "cursor")
+
+    def __init__(
+        self,
+        kind: str,
+        ts: float,
+        req_id: Optional[str] = None,
+        call_id: Optional[str] = None,
+        tool: Optional[str] = None,
+        tokens: int = 0,
+    ):
+        self.kind = kind
+        self.ts = ts
+        self.req_id = req_id
+        self.call_id = call_id
+        self.tool = tool
+        self.tokens = tokens
+        # Set by monitor.SessionFollower: where to resume to get the events after this one.
+        self.cursor: Optional[str] = None
+
+    def __repr__(self) -> str:
+        if self.call_id:
+            return f"SessionEvent({self.kind!r}, {self.ts!r}, call_id={self.call_id!r}, tool={self.tool!r})"
+        if self.kind == TOKENS:
+            return f"SessionEvent({self.kind!r}, {self.ts!r}, tokens={self.tokens!r})"
+        return f"SessionEvent({self.kind!r}, {self.ts!r}, req_id={self.req_id!r})"
+
+
+_second_cache: Dict[str, int] = {}
+
+
+def parse_ts(ts: str) -> Optional[float]:
+    """Parse `YYYY-MM-DDTHH:MM:SS[.fff]Z` (or any ISO-8601 string) to epoch seconds."""
+    if len(ts) >= 20 and ts[-1] == "Z" and ts[4] == "-" and ts[10] == "T":
+        head = ts[:19]
+        base = _second_cache.get(head)
+        if base is None:
+            try:
+                base = calendar.timegm((
+                    int(ts[0:4]), int(ts[5:7]), int(ts[8:10]),
+                    int(ts[11:13]), int(ts[14:16]), int(ts[17:19]),
+                ))
+            except ValueError:
+                return None
+            if len(_second_cache) > 4096:
+                _second_cache.clear()
+            _second_cache[head] = base
+        frac = ts[19:-1]
+        if not frac:
+            return float(base)
+        if frac[0] != "." or not frac[1:].isdigit():
+            return _parse_ts_slow(ts)
+        return base + int(frac[1:]) / (10 ** (len(frac) - 1))
+    return _parse_ts_slow(ts)
+
+
+def _parse_ts_slow(ts: str) -> Optional[float]:
+    try:
+        from datetime import datetime
+
+        if ts.endswith("Z"):
+            ts = ts[:-1] + "+00:00"
+        return datetime.fromisoformat(ts).timestamp()
+    except Exception:
+        return None
+
+
+def line_timestamp(line: bytes) -> Optional[float]:
+    """Timestamp of a raw session line without decoding the JSON."""
+    i = line.find(_TS_KEY)
+    if i < 0:
+        return None
+    i += len(_TS_KEY)
+    j = line.find(b'"', i)
+    if j < 0:
+        return None
+    return parse_ts(line[i:j].decode("ascii", errors="replace"))
+
+
+def _last_nonempty_line(text: str) -> str:
+    for ln in reversed(text.splitlines()):
+        ln = ln.strip()
+        if ln:
+            return ln
+    return ""
+
+
+def _output_event(line: bytes) -> Optional[SessionEvent]:
+    """Tool outputs are the largest lines: take call id and timestamp from the head without decoding."""
+    head = line[:HEAD]
+    if not (b'_call_output"' in head or _EXEC_END in head):
+        return None
+    match = _CALL_ID_RE.search(head)
+    ts = line_timestamp(head)
+    if match is None or ts is None:
+        return None
+    return SessionEvent(TOOL_OUTPUT, ts, call_id=match.group(1).decode("utf-8", errors="replace"))
+
+
+def _item_event(line: bytes) -> Optional[SessionEvent]:
+    """A model output item only matters for its timestamp, which is in the head."""
+    head = line[:HEAD]
+    if b'"type":"response_item"' not in head or b'"role":"user"' in head:
+        return None
+    ts = line_timestamp(head)
+    return SessionEvent(ITEM, ts) if ts is not None else None
+
+
+_head_seconds: Dict[bytes, int] = {}
+_FRAC_SCALE = tuple(10 ** n for n in range(10))
+
+
+def _head_second(sec: bytes) -> Optional[int]:
+    """Epoch seconds of a `YYYY-MM-DDTHH:MM:SS` timestamp prefix, cached per second."""
+    base = _head_seconds.get(sec)
+    if base is None:
+        try:
+            base = calendar.timegm((int(sec[0:4]), int(sec[5:7]), int(sec[8:10]), int(sec[11:13]), int(sec[14:16]), int(sec[17:19])))
+        except ValueError:
+            return None
+        if len(_head_seconds) > 4096:
+            _head_seconds.clear()
+        _head_seconds[sec] = base
+    return base
+
+
+def _decode_other(line: bytes) -> Optional[SessionEvent]:
+    """decode_line for lines in another layout than Codex's compact one."""
+    if not _maybe_relevant(line):
+        return _item_event(line)
+    return _output_event(line) or _decode_json(line)
+
+
+def decode_line(line: bytes) -> Optional[SessionEvent]:
+    """Returns the event carried by a session line, or None if it is irrelevant."""
+    # The timestamp ends at byte 33 (whole seconds) to 43 (nanoseconds).
+    z = line.find(_TS_CLOSE, 33, 54) if line.startswith(_TS_OPEN) else -1
+    if z < 0:
+        return _decode_other(line)
+    if line.startswith(_RESPONSE_ITEM, z + 11):
+        start = z + 11 + len(_RESPONSE_ITEM)
+        response = True
+    elif line.startswith(_EVENT_MSG, z + 11):
+        start = z + 11 + len(_EVENT_MSG)
+        response = False
+    else:
+        return _decode_other(line)
+    end = line.find(b'"', start)
+    ptype = line[start:end]
+    sec = line[14:33]
+    base = _head_seconds.get(sec)
+    if base is None:
+        base = _head_second(sec)
+        if base is None:
+            return None
+    if z == 33:
+        ts = float(base)
+    elif line[33] == 0x2E and line[34:z].isdigit():  # "."
+        ts = base + int(line[34:z]) / _FRAC_SCALE[z - 34]
+    else:
+        return _decode_other(line)
+
+    if not response:
+        if ptype == b"token_count":
+            match = _OUTPUT_TOKENS_RE.search(line, end)
+            return SessionEvent(TOKENS, ts, tokens=int(match.group(1))) if match else None
+        if ptype == b"user_message":
+            return SessionEvent(USER, ts)
+        if ptype == b"turn_aborted":
+            return SessionEvent(ABORT, ts)
+        if ptype == b"exec_command_begin" or ptype == b"exec_command_end":
+            match = _CALL_ID_RE.search(line, end)
+            if match is None:
+                return None
+            call_id = match.group(1).decode("utf-8", errors="replace")
+            if ptype == b"exec_command_end":
+                return SessionEvent(TOOL_OUTPUT, ts, call_id=call_id)
+            return SessionEvent(TOOL_CALL, ts, call_id=call_id, tool="shell")
+        return None
+
+    if ptype == b"message":
+        match = _ROLE_RE.search(line, end, end + HEAD)
+        role = match.group(1) if match else b""
+        if role == b"user":
+            return SessionEvent(USER, ts)
+        if role == b"assistant" and (b"CODEX_DONE" in line or b"CCB_DONE" in line):
+            return _decode_json(line)
+        return SessionEvent(ITEM, ts)
+    if ptype in _OUTPUT_TYPES_B:
+        match = _CALL_ID_RE.search(line, end, HEAD)
+        if match is None:
+            return _decode_json(line)
+        return SessionEvent(TOOL_OUTPUT, ts, call_id=match.group(1).decode("utf-8", errors="replace"))
+    if ptype in _CALL_TYPES_B:
+        match = _CALL_ID_RE.search(line, end)
+        if match is None or _CALL_TYPES_B[ptype] is not None:
+            return _decode_json(line)  # local_shell_call and calls without a call id are rare
+        name = _NAME_RE.search(line, end)
+        tool = name.group(1).decode("utf-8", errors="replace") if name else ""
+        return SessionEvent(TOOL_CALL, ts, call_id=match.group(1).decode("utf-8", errors="replace"), tool=tool or "tool")
+    return SessionEvent(ITEM, ts)
+
+
+def _decode_json(line: bytes) -> Optional[SessionEvent]:
+    """Full decode, for the rare lines the byte-level paths of decode_line leave open."""
+    try:
+        obj = json.loads(line)
+    except Exception:
+        return None
+    if not isinstance(obj, dict):
+        return None
+
+    ts = parse_ts(obj.get("timestamp") or "")
+    if ts is None:
+        return None
+
+    typ = obj.get("type")
+    payload = obj.get("payload") or {}
+
+    if typ == "event_msg":
+        ptype = payload.get("type")
+        if ptype == "turn_aborted":
+            return SessionEvent(ABORT, ts)
+        if ptype == "user_message":
+            return SessionEvent(USER, ts)
+        if ptype in ("exec_command_begin", "exec_command_end") and payload.get("call_id"):
+            kind = TOOL_CALL if ptype == "exec_command_begin" else TOOL_OUTPUT
+            return SessionEvent(kind, ts, call_id=str(payload["call_id"]), tool="shell")
+        if ptype == "token_count":
+            usage = (payload.get("info") or {}).get("total_token_usage") or {}
+            tokens = usage.get("output_tokens")
+            return SessionEvent(TOKENS, ts, tokens=tokens) if isinstance(tokens, int) else None
+        return None
+
+    if typ != "response_item":
+        return None
+
+    ptype = payload.get("type")
+    if ptype in _CALL_TYPES:
+        call_id = payload.get("call_id") or payload.get("id")
+        if not call_id:
+            return None
+        tool = _CALL_TYPES[ptype] or str(payload.get("name") or "tool")
+        return SessionEvent(TOOL_CALL, ts, call_id=str(call_id), tool=tool)
+    if ptype in _OUTPUT_TYPES:
+        call_id = payload.get("call_id")
+        return SessionEvent(TOOL_OUTPUT, ts, call_id=str(call_id)) if call_id else None
+
+    role = (payload.get("role") or "").lower()
+    if role == "user":
+        return SessionEvent(USER, ts)
+    if role != "assistant":
+        return None
+
+    content = payload.get("content") or []
+    if not isinstance(content, list):
+        return SessionEvent(ITEM, ts)
+    text = "\n".join(
+        (part.get("text", "") for part in content if isinstance(part, dict) and part.get("type") in ("input_text", "output_text"))
+    )
+    match = DONE_RE.match(_last_nonempty_line(text))
+    if match:
+        return SessionEvent(DONE, ts, match.group(1))
+    return SessionEvent(ITEM, ts)
+
+
+# Lines longer than this are decoded from their head only (see _decode_head).
+MAX_DECODE = 1024 * 1024
+SCAN_BLOCK = 1024 * 1024
+
+
+def _decode_head(head: bytes) -> Optional[SessionEvent]:
+    """Event of an over-long line from its first HEAD bytes: a tool output or a huge pasted user message."""
+    event = _output_event(head)
+    if event is not None:
+        return event
+    if b'"user_message"' in head or b'"role":"user"' in head:
+        ts = line_timestamp(head)
+        return SessionEvent(USER, ts) if ts is not None else None
+    return _item_event(head)
+
+
+def scan_backward(path: str, end: Optional[int] = None, block: int = SCAN_BLOCK) -> Iterator[Tuple[int, SessionEvent]]:
+    """Yields (line offset, event) for the complete lines before `end` (default: EOF), newest first.
+
+    The file is mapped, not read: it is copied and split into lines one block
+    at a time (the first block is small, later ones grow to `block`), a line
+    longer than a block is walked with block-sized newline searches and only
+    its head decoded, and pages already walked are dropped from the mapping,
+    so memory stays constant for any file size. Stop iterating as soon as you
+    have what you need; the trailing line (still being written) is never
+    yielded.
+    """
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return
+    with f:
+        try:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return
+        with mm:
+            dontneed = getattr(mmap, "MADV_DONTNEED", None)
+            released = size  # pages at or above this offset are no longer needed
+            # hi: end of the newest line not yet yielded (the offset of its newline);
+            # searched < hi while walking down a line longer than a block.
+            hi = searched = mm.rfind(b"\n", 0, size if end is None else min(end, size))
+            step = min(block, 64 * 1024)
+            while hi > 0:
+                if dontneed is not None and released - searched >= 4 * block:
+                    # Walked pages are only faulted in again if a line is copied from them.
+                    low = (searched // mmap.PAGESIZE + 1) * mmap.PAGESIZE
+                    if low < released:
+                        try:
+                            mm.madvise(dontneed, low, released - low)
+                        except (OSError, ValueError):
+                            dontneed = None
+                        released = low
+                if searched < hi:
+                    lo = max(0, searched - block)
+                    nl = mm.rfind(b"\n", lo, searched)
+                    if nl == -1 and lo > 0:
+                        searched = lo
+                        continue
+                    start = nl + 1
+                    if hi - start > MAX_DECODE:
+                        event = _decode_head(mm[start:start + HEAD])
+                    else:
+                        event = decode_line(mm[start:hi])
+                    if event is not None:
+                        yield start, event
+                    hi = searched = nl
+                    continue
+
+                lo = max(0, hi - step)
+                step = min(block, step * 2)
+                lines = mm[lo:hi].split(b"\n")
+                if len(lines) == 1 and lo > 0:
+                    searched = lo  # no newline in the block
+                    continue
+                # lines[0] may continue below lo: it is split again with the next block.
+                pos = hi
+                for i in range(len(lines) - 1, 0, -1):
+                    line = lines[i]
+                    pos -= len(line)
+                    if line:
+                        event = decode_line(line)
+                        if event is not None:
+                            yield pos, event
+                    pos -= 1
+                if lo == 0:
+                    if lines[0]:
+                        event = decode_line(lines[0])
+                        if event is not None:
+                            yield 0, event
+                    return
+                hi = searched = pos
+
+
+def complete_length(path: str, block: int = 64 * 1024) -> int:
+    """Bytes up to and including the last newline (0 if there is none)."""
+    try:
+        with open(path, "rb") as f:
+            pos = os.fstat(f.fileno()).st_size
+            while pos > 0:
+                lo = max(0, pos - block)
+                f.seek(lo)
+                nl = f.read(pos - lo).rfind(b"\n")
+                if nl != -1:
+                    return lo + nl + 1
+                pos = lo
+    except OSError:
+        pass
+    return 0
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""Persistent index of Codex session files under ~/.codex/sessions.
+
+Codex stores sessions as `sessions/YYYY/MM/DD/rollout-<ts>-<id>.jsonl`. The
+index maps session id to path, cwd, start time and mtime, and is kept in the
+codex-status cache dir so attach-time discovery does not have to walk (and
+open) every historical session file.
+
+Updates are incremental: only day directories at or after the watermark (the
+newest day seen by the last scan) are listed again. A full scan happens only
+when the index file is missing, unreadable or from another version/root.
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+try:
+    from .paths import cache_dir, sessions_root
+    from .profiling import counters
+except ImportError:
+    from paths import cache_dir, sessions_root
+    from profiling import counters
+
+
+SESSION_ID_RE = re.compile(r"([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})\.jsonl$")
+
+
+def _parse_meta_ts(ts: str) -> float:
+    try:
+        from datetime import datetime
+
+        if ts.endswith("Z"):
+            ts = ts[:-1] + "+00:00"
+        return datetime.fromisoformat(ts).timestamp()
+    except Exception:
+        return 0.0
+
+
+class SessionIndex:
+    """Session id -> (path, cwd, start, mtime), persisted as JSON."""
+
+    VERSION = 1
+    REFRESH_S = 1.0
+
+    def __init__(self, root: Optional[Path] = None, index_path: Optional[Path] = None):
+        self.root = root or sessions_root()
+        self.index_path = index_path or cache_dir() / "session-index.json"
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._watermark = ""
+        self._loaded = False
+        self._refreshed_at = 0.0
+        # Bumped whenever a session is added or moved, so callers can cache lookups.
+        self.generation = 0
+        # Monitors sampled on worker threads (see aio.py) share one index.
+        self._lock = threading.RLock()
+
+    def _load(self) -> bool:
+        try:
+            data = json.loads(self.index_path.read_text())
+            if data.get("version") != self.VERSION or data.get("root") != str(self.root):
+                return False
+            sessions = data["sessions"]
+            if not isinstance(sessions, dict):
+                return False
+            self._sessions = sessions
+            self._watermark = str(data.get("watermark") or "")
+            self.generation += 1
+            return True
+        except Exception:
+            return False
+
+    def _save(self) -> None:
+        data = {
+            "version": self.VERSION,
+            "root": str(self.root),
+            "watermark": self._watermark,
+            "sessions": self._sessions,
+        }
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data, separators=(",", ":")))
+            os.replace(tmp, self.index_path)
+        except Exception:
+            pass
+
+    def _day_dirs(self, since: str) -> List[Tuple[str, str]]:
+        """Returns [(YYYY/MM/DD, dirpath)] for day dirs at or after `since`."""
+        out: List[Tuple[str, str]] = []
+        since_y, since_m = since[:4], since[:7]
+        try:
+            years = [e for e in os.scandir(self.root) if e.is_dir() and e.name.isdigit()]
+        except OSError:
+            return out
+        for y in years:
+            if y.name < since_y:
+                continue
+            try:
+                months = [e for e in os.scandir(y.path) if e.is_dir() and e.name.isdigit()]
+            except OSError:
+                continue
+            for m in months:
+                if f"{y.name}/{m.name}" < since_m:
+                    continue
+                try:
+                    days = [e for e in os.scandir(m.path) if e.is_dir() and e.name.isdigit()]
+                except OSError:
+                    continue
+                for d in days:
+                    key = f"{y.name}/{m.name}/{d.name}"
+                    if key >= since:
+                        out.append((key, d.path))
+        out.sort()
+        return out
+
+    def _read_meta(self, path: str) -> Tuple[str, float]:
+        """Returns (realpath of cwd, start epoch) from the session_meta line."""
+        try:
+            with open(path, "r", errors="replace") as f:
+                first = f.readline()
+            counters.bytes_read += len(first)
+            counters.lines += 1
+            first = first.strip()
+            obj = json.loads(first) if first else {}
+        except Exception:
+            return "", 0.0
+        if obj.get("type") != "session_meta":
+            return "", 0.0
+        payload = obj.get("payload") or {}
+        cwd = payload.get("cwd") or ""
+        if cwd:
+            try:
+                cwd = os.path.realpath(cwd)
+            except Exception:
+                pass
+        start = _parse_meta_ts(payload.get("timestamp") or obj.get("timestamp") or "")
+        return cwd, start
+
+    def _index_dir(self, dirpath: str) -> bool:
+        changed = False
+        try:
+            entries = list(os.scandir(dirpath))
+        except OSError:
+            return False
+        for e in entries:
+            m = SESSION_ID_RE.search(e.name)
+            if not m or not e.is_file():
+                continue
+            try:
+                mtime = e.stat().st_mtime
+            except OSError:
+                continue
+            sid = m.group(1)
+            known = self._sessions.get(sid)
+            # Entries without a cwd were indexed before session_meta was flushed.
+            if known and known.get("path") == e.path and known.get("cwd"):
+                # Not worth a rewrite of the index file on its own; queries re-stat.
+                known["mtime"] = mtime
+                continue
+            cwd, start = self._read_meta(e.path)
+            self._sessions[sid] = {"path": e.path, "cwd": cwd, "start": start, "mtime": mtime}
+            self.generation += 1
+            changed = True
+        return changed
+
+    def _scan(self, since: str) -> bool:
+        changed = False
+        if not since:
+            # Older layouts kept rollout files directly under sessions/.
+            changed |= self._index_dir(str(self.root))
+        for key, dirpath in self._day_dirs(since):
+            changed |= self._index_dir(dirpath)
+            if key > self._watermark:
+                self._watermark = key
+                changed = True
+        return changed
+
+    def rebuild(self) -> None:
+        """Full scan of the sessions tree."""
+        with self._lock:
+            self._sessions = {}
+            self._watermark = ""
+            self.generation += 1
+            self._scan("")
+            self._loaded = True
+            self._refreshed_at = time.time()
+            self._save()
+
+    def refresh(self, force: bool = False) -> None:
+        """Bring the index up to date, scanning only days at/after the watermark."""
+        with self._lock:
+            self._refresh(force)
+
+    def _refresh(self, force: bool) -> None:
+        now = time.time()
+        if not force and self._loaded and (now - self._refreshed_at) < self.REFRESH_S:
+            return
+        if not self.root.exists():
+            self._refreshed_at = now
+            return
+        if not self._loaded:
+            if not self._load():
+                self.rebuild()
+                return
+            self._loaded = True
+        changed = self._scan(self._watermark)
+        self._refreshed_at = now
+        if changed:
+            self._save()
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        self.refresh()
+        with self._lock:
+            entry = self._sessions.get(sid)
+        if entry and not os.path.exists(entry["path"]):
+            return None
+        return entry
+
+    def find_by_id(self, sid: str) -> Optional[Path]:
+        entry = self.get(sid)
+        return Path(entry["path"]) if entry else None
+
+    def find_by_cwd(self, cwd: str, since_epoch: float) -> Optional[Path]:
+        """Most recently modified session started in `cwd` and touched after `since_epoch`."""
+        self.refresh()
+        try:
+            cwd_norm = os.path.realpath(cwd)
+        except Exception:
+            cwd_norm = cwd
+        best: Optional[Tuple[float, str]] = None
+        with self._lock:
+            entries = list(self._sessions.values())
+        for entry in entries:
+            if entry.get("cwd") != cwd_norm:
+                continue
+            try:
+                mtime = os.stat(entry["path"]).st_mtime
+            except OSError:
+                continue
+            if mtime < since_epoch - 5:
+                continue
+            if best is None or mtime > best[0]:
+                best = (mtime, entry["path"])
+        return Path(best[1]) if best else None
+
+    def sessions(self) -> Dict[str, Dict[str, Any]]:
+        self.refresh()
+        with self._lock:
+            return dict(self._sessions)
+
+
+_default_index: Optional[SessionIndex] = None
+
+
+def default_session_index() -> SessionIndex:
+    """Process-wide index shared by all monitors."""
+    global _default_index
+    if _default_index is None or _default_index.root != sessions_root():
+        _default_index = SessionIndex()
+    return _default_index
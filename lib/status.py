@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Status snapshot types shared by the monitor, renderers and readers of published statuses.
+
+Kept out of monitor.py so `codex-status` can print a published status
+without importing the monitor stack.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any
+from enum import Enum
+
+
+class State(Enum):
+    STARTING = "starting"
+    RUNNING = "running"
+    THINKING = "thinking"
+    FREE = "free"
+    IDLE = "idle"
+    STUCK = "stuck"
+    EXITED = "exited"
+
+
+@dataclass
+class CodexStatus:
+    state: State = State.STARTING
+    pid: Optional[int] = None
+    elapsed_s: float = 0
+    silence_s: float = 0
+    task_s: float = 0  # seconds since current request started (if pending)
+    session_silence_s: float = 0  # seconds since the session file was last written
+    cpu_delta: float = 0
+    io_read_delta: int = 0
+    io_write_delta: int = 0
+    rchar_delta: int = 0  # bytes read/written through any fd (sockets, pipes), not just block IO
+    wchar_delta: int = 0
+    net_conns: int = 0  # established TCP connections of the Codex process
+    net_state: Optional[str] = None  # streaming / waiting / stalled / none (see ProcSampler)
+    rss_bytes: int = 0  # whole process tree
+    pss_bytes: int = 0
+    threads: int = 0
+    fds: int = 0
+    rss_per_h: float = 0  # fitted trend over the bloat window
+    fds_per_h: float = 0
+    bloat: bool = False  # sustained RSS or fd growth
+    last_tool: Optional[str] = None
+    current_step: Optional[str] = None
+    plan_progress: Optional[str] = None  # e.g. "3/5"
+    tree_procs: int = 0  # live processes in Codex's process tree (incl. Codex)
+    busy_pid: Optional[int] = None  # busiest descendant since last sample
+    busy_cmd: Optional[str] = None
+    busy_cpu: float = 0
+    active_tool: Optional[str] = None  # oldest tool call still waiting for its output
+    active_tool_s: float = 0
+    tool_latency: Dict[str, Dict[str, float]] = field(default_factory=dict)  # per tool: n/p50/p95/max seconds
+    tokens_per_s: float = 0  # output tokens/sec of the pending turn
+    token_silence_s: float = 0  # seconds since output tokens last grew in the pending turn
+    d_state_s: Optional[float] = None  # seconds in uninterruptible sleep (D), None when not in D
+    turn_latency: Dict[str, Dict[str, float]] = field(default_factory=dict)  # see TurnMetrics.STATS
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "pid": self.pid,
+            "elapsed_s": self.elapsed_s,
+            "silence_s": self.silence_s,
+            "task_s": self.task_s,
+            "session_silence_s": self.session_silence_s,
+            "cpu_delta": self.cpu_delta,
+            "io_read_delta": self.io_read_delta,
+            "io_write_delta": self.io_write_delta,
+            "rchar_delta": self.rchar_delta,
+            "wchar_delta": self.wchar_delta,
+            "net_conns": self.net_conns,
+            "net_state": self.net_state,
+            "rss_bytes": self.rss_bytes,
+            "pss_bytes": self.pss_bytes,
+            "threads": self.threads,
+            "fds": self.fds,
+            "rss_per_h": self.rss_per_h,
+            "fds_per_h": self.fds_per_h,
+            "bloat": self.bloat,
+            "last_tool": self.last_tool,
+            "current_step": self.current_step,
+            "plan_progress": self.plan_progress,
+            "tree_procs": self.tree_procs,
+            "busy_pid": self.busy_pid,
+            "busy_cmd": self.busy_cmd,
+            "busy_cpu": self.busy_cpu,
+            "active_tool": self.active_tool,
+            "active_tool_s": self.active_tool_s,
+            "tool_latency": self.tool_latency,
+            "tokens_per_s": self.tokens_per_s,
+            "token_silence_s": self.token_silence_s,
+            "d_state_s": self.d_state_s,
+            "turn_latency": self.turn_latency,
+            "error": self.error,
+            "timestamp": time.time(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CodexStatus":
+        status = cls()
+        for key, value in data.items():
+            if key == "state":
+                status.state = State(value)
+            elif key != "timestamp" and hasattr(status, key):
+                setattr(status, key, value)
+        return status
+
+
+def format_duration(seconds: float) -> str:
+    """Format seconds as human-readable duration."""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    m, s = divmod(seconds, 60)
+    if m < 60:
+        return f"{m}m{s}s"
+    h, m = divmod(m, 60)
+    return f"{h}h{m}m"
+
+
+def format_bytes(n: int) -> str:
+    """Format bytes as human-readable size."""
+    for unit in ["B", "K", "M", "G"]:
+        if n < 1024:
+            return f"{n:.0f}{unit}" if n == int(n) else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}T"
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Latest status of live monitors, shared through memory-mapped files.
+
+Every running monitor (the daemon, a `codex-status-bg` worker or
+`codex-status-wrapper`) publishes its most recent `CodexStatus` plus a few
+rolling metrics to `<cache>/status/<codex pid>-<writer pid>.status` after
+each sample. `codex-status` reads those files instead of cold-sampling, so
+it answers without rediscovering the process or rescanning sessions, and
+its CPU/IO numbers come from a monitor that has a previous sample.
+
+File layout: a HEADER_SIZE-byte header (magic, version, sequence, payload
+length) followed by up to CAPACITY bytes of JSON. The writer makes the
+sequence odd while it updates the payload and even again afterwards;
+readers retry until they see the same even sequence before and after
+copying the payload (a seqlock), so no file locking is needed.
+"""
+
+import os
+import json
+import mmap
+import time
+import struct
+from collections import deque
+from pathlib import Path
+from typing import Optional, Dict, Any, Deque, Tuple, List
+
+try:
+    from .paths import cache_dir
+except ImportError:
+    from paths import cache_dir
+
+
+MAGIC = b"CXS1"
+VERSION = 1
+_HEADER = struct.Struct("<4sIQI")  # magic, version, seq, length
+HEADER_SIZE = 32
+CAPACITY = 64 * 1024
+STALE_S = 15.0
+ROLLING_S = 60.0
+
+
+def status_dir() -> Path:
+    return cache_dir() / "status"
+
+
+def _alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+        return True
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+
+
+class StatusPublisher:
+    """Writes one monitor's latest status for one Codex process."""
+
+    def __init__(self, pid: int, source: str, tty: Optional[str] = None, cwd: Optional[str] = None, max_wait: float = 0.0):
+        self.pid = pid
+        self.source = source
+        self.tty = tty
+        self.cwd = os.path.realpath(cwd) if cwd else None
+        # Readers treat the status as stale once the writer missed a few wakeups.
+        self.ttl = max(STALE_S, 3 * max_wait)
+        self.path = status_dir() / f"{pid}-{os.getpid()}.status"
+        self._mm: Optional[mmap.mmap] = None
+        self._seq = 0
+        self._samples = 0
+        self._state: Optional[str] = None
+        self._state_since = 0.0
+        self._recent: Deque[Tuple[float, float, int, int]] = deque()
+
+    def _open(self) -> mmap.mmap:
+        if self._mm is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                os.ftruncate(fd, HEADER_SIZE + CAPACITY)
+                self._mm = mmap.mmap(fd, HEADER_SIZE + CAPACITY)
+            finally:
+                os.close(fd)
+        return self._mm
+
+    def _rolling(self, now: float, status) -> Dict[str, Any]:
+        self._recent.append((now, status.cpu_delta, status.io_read_delta, status.io_write_delta))
+        while self._recent and now - self._recent[0][0] > ROLLING_S:
+            self._recent.popleft()
+        return {
+            "window_s": ROLLING_S,
+            "samples": len(self._recent),
+            "cpu_s": sum(r[1] for r in self._recent),
+            "io_read": sum(r[2] for r in self._recent),
+            "io_write": sum(r[3] for r in self._recent),
+        }
+
+    def publish(self, status, monitor=None) -> None:
+        """Publishes `status`, with the session file and profile of `monitor` if given."""
+        now = time.time()
+        session_file = monitor.session_file if monitor is not None else None
+        profile = monitor.profiler.to_dict() if monitor is not None and monitor.profiler.enabled else None
+        state = status.state.value
+        if state != self._state:
+            self._state = state
+            self._state_since = now
+        self._samples += 1
+        doc = {
+            "pid": self.pid,
+            "writer_pid": os.getpid(),
+            "source": self.source,
+            "tty": self.tty,
+            "cwd": self.cwd,
+            "session_file": str(session_file) if session_file else None,
+            "updated_at": now,
+            "expires_at": now + self.ttl,
+            "samples": self._samples,
+            "state_since": self._state_since,
+            "rolling": self._rolling(now, status),
+            "status": status.to_dict(),
+        }
+        if profile is not None:
+            doc["profile"] = profile
+        payload = json.dumps(doc, separators=(",", ":")).encode()
+        if len(payload) > CAPACITY and profile is not None:
+            del doc["profile"]
+            payload = json.dumps(doc, separators=(",", ":")).encode()
+        if len(payload) > CAPACITY:
+            return
+        try:
+            mm = self._open()
+        except OSError:
+            return
+        self._seq += 1
+        _HEADER.pack_into(mm, 0, MAGIC, VERSION, self._seq, 0)
+        mm[HEADER_SIZE:HEADER_SIZE + len(payload)] = payload
+        self._seq += 1
+        _HEADER.pack_into(mm, 0, MAGIC, VERSION, self._seq, len(payload))
+
+    def close(self) -> None:
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except Exception:
+                pass
+            self._mm = None
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+
+
+def read_status_file(path: Path, retries: int = 5) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        for _ in range(retries):
+            magic, version, seq, length = _HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or version != VERSION:
+                return None
+            if seq & 1:
+                # A write in progress (its length is 0 until it finishes).
+                time.sleep(0.0001)
+                continue
+            if length == 0 or length > CAPACITY:
+                return None
+            payload = mm[HEADER_SIZE:HEADER_SIZE + length]
+            if _HEADER.unpack_from(mm, 0)[2] != seq:
+                continue
+            try:
+                return json.loads(payload)
+            except ValueError:
+                return None
+        return None
+    finally:
+        mm.close()
+
+
+def live_statuses(pid: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Fresh statuses from live monitors (optionally for one Codex pid), newest first."""
+    try:
+        names = os.listdir(status_dir())
+    except OSError:
+        return []
+    now = time.time()
+    prefix = f"{pid}-" if pid is not None else ""
+    found: List[Dict[str, Any]] = []
+    for name in names:
+        if not name.endswith(".status") or not name.startswith(prefix):
+            continue
+        path = status_dir() / name
+        doc = read_status_file(path)
+        if doc is None:
+            continue
+        if not _alive(int(doc.get("writer_pid") or 0)):
+            # The writer died without cleaning up.
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            continue
+        if float(doc.get("expires_at") or 0) < now or not _alive(int(doc.get("pid") or 0)):
+            continue
+        found.append(doc)
+    found.sort(key=lambda d: d.get("updated_at") or 0, reverse=True)
+    return found
+
+
+def read_status(pid: Optional[int] = None, cwd: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """The freshest live status, preferring monitors started in `cwd` when no pid is given."""
+    found = live_statuses(pid)
+    if not found:
+        return None
+    if pid is None and cwd:
+        real = os.path.realpath(cwd)
+        for doc in found:
+            if doc.get("cwd") == real:
+                return doc
+    return found[0]
@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""Title output for monitored terminals: tmux, WezTerm CLI or OSC escape sequences.
+
+Titles go through a `TitleDispatcher`, which keeps only the latest pending
+title per terminal, drops titles equal to the one already shown and applies
+at most one title per terminal every CODEX_STATUS_TITLE_MIN_INTERVAL_S. The
+daemon shares one dispatcher between all terminals and flushes it once per
+tick, so the WezTerm pane listing is fetched once per flush and tmux titles
+for every pane are sent as one command line over a single persistent
+`tmux -C` control-mode connection per tmux server.
+"""
+
+import os
+import json
+import time
+import select
+import shutil
+import subprocess
+from typing import Optional, List, Dict, Tuple
+
+try:
+    from .profiling import counters, run_command
+    from .renderer import set_terminal_title
+except ImportError:
+    from profiling import counters, run_command
+    from renderer import set_terminal_title
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+_which: Dict[str, bool] = {}
+
+
+def _have(cmd: str) -> bool:
+    if cmd not in _which:
+        _which[cmd] = shutil.which(cmd) is not None
+    return _which[cmd]
+
+
+def wezterm_mode() -> str:
+    """Resolve CODEX_STATUS_WEZTERM_MODE (`auto` picks window-active if wezterm exists)."""
+    mode = os.environ.get("CODEX_STATUS_WEZTERM_MODE", "auto").strip().lower()
+    if mode == "auto":
+        mode = "window-active" if shutil.which("wezterm") else "off"
+    return mode
+
+
+def tmux_mode() -> str:
+    """Resolve CODEX_STATUS_TMUX_MODE: `pane` (pane title), `window` (window name) or `off`."""
+    mode = os.environ.get("CODEX_STATUS_TMUX_MODE", "auto").strip().lower()
+    if mode == "auto":
+        mode = "pane"
+    return mode if mode in ("pane", "window") else "off"
+
+
+def title_min_interval() -> float:
+    try:
+        return max(0.0, float(os.environ.get("CODEX_STATUS_TITLE_MIN_INTERVAL_S", "0.5")))
+    except ValueError:
+        return 0.5
+
+
+class WezTermPanes:
+    """`wezterm cli list` output, cached briefly and shared by all controllers."""
+
+    TTL_MS = 500
+
+    def __init__(self):
+        self._last_list_ms: int = 0
+        self._last_list: List[Dict] = []
+        self._available: Optional[bool] = None
+
+    def available(self) -> bool:
+        if self._available is None:
+            self._available = shutil.which("wezterm") is not None
+        return self._available
+
+    def list(self, now_ms: int) -> List[Dict]:
+        if self._last_list_ms and (now_ms - self._last_list_ms) < self.TTL_MS:
+            return self._last_list
+        try:
+            out = run_command(
+                ["wezterm", "cli", "list", "--format", "json"],
+                capture_output=True,
+                text=True,
+                stdin=subprocess.DEVNULL,
+            ).stdout
+            items = json.loads(out) if out else []
+            self._last_list = items if isinstance(items, list) else []
+        except Exception:
+            self._last_list = []
+        self._last_list_ms = now_ms
+        return self._last_list
+
+
+class WezTermController:
+    def __init__(self, tty_path: str, mode: str, panes: Optional[WezTermPanes] = None, pane_id: Optional[str] = None):
+        self.tty_path = tty_path
+        self.mode = mode
+        self.panes = panes or WezTermPanes()
+        self.pane_id: Optional[str] = pane_id
+        self.window_id: Optional[str] = None
+
+    def _wezterm_ok(self) -> bool:
+        return self.panes.available()
+
+    def _list(self, now_ms: int) -> List[Dict]:
+        return self.panes.list(now_ms)
+
+    def resolve(self, now_ms: int) -> None:
+        if not self._wezterm_ok():
+            return
+        for it in self._list(now_ms):
+            if it.get("tty_name") == self.tty_path:
+                pane = it.get("pane_id")
+                win = it.get("window_id")
+                if pane is not None:
+                    self.pane_id = str(pane)
+                if win is not None:
+                    self.window_id = str(win)
+                return
+
+    def pane_is_active(self, now_ms: int) -> bool:
+        if not self.pane_id:
+            return False
+        for it in self._list(now_ms):
+            if str(it.get("pane_id")) == str(self.pane_id):
+                return bool(it.get("is_active"))
+        return False
+
+    def set_title(self, title: str, now_ms: int) -> bool:
+        if self.mode not in ("tab", "window", "window-active"):
+            return False
+        if not self._wezterm_ok():
+            return False
+        if not self.pane_id:
+            self.resolve(now_ms)
+        if not self.pane_id:
+            return False
+
+        if self.mode == "tab":
+            try:
+                r = run_command(
+                    ["wezterm", "cli", "set-tab-title", "--pane-id", str(self.pane_id), title],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    stdin=subprocess.DEVNULL,
+                )
+                return r.returncode == 0
+            except Exception:
+                return False
+
+        if self.mode == "window-active" and not self.pane_is_active(now_ms):
+            return True  # no-op, but "handled"
+
+        args = ["wezterm", "cli", "set-window-title"]
+        if self.window_id:
+            args += ["--window-id", str(self.window_id)]
+        else:
+            args += ["--pane-id", str(self.pane_id)]
+        args.append(title)
+        try:
+            r = run_command(
+                args,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                stdin=subprocess.DEVNULL,
+            )
+            return r.returncode == 0
+        except Exception:
+            return False
+
+
+_tmux_version_cache: Optional[Tuple[int, int]] = None
+
+
+def _tmux_version() -> Tuple[int, int]:
+    """(major, minor) of the `tmux` binary; (0, 0) if unknown. Development builds count as new."""
+    global _tmux_version_cache
+    if _tmux_version_cache is None:
+        version = (0, 0)
+        try:
+            out = run_command(["tmux", "-V"], capture_output=True, text=True, stdin=subprocess.DEVNULL).stdout
+            # "tmux 3.3a", "tmux next-3.5", "tmux master", "tmux openbsd-7.4"
+            word = out.split()[1] if len(out.split()) > 1 else ""
+            if word == "master":
+                version = (99, 0)
+            elif not word.startswith("openbsd-"):
+                digits = word.rsplit("-", 1)[-1].split(".")
+                major = int(digits[0])
+                minor = int("".join(c for c in digits[1] if c.isdigit()) or 0) if len(digits) > 1 else 0
+                version = (major, minor)
+        except Exception:
+            pass
+        _tmux_version_cache = version
+    return _tmux_version_cache
+
+
+def _tmux_quote(arg: str) -> str:
+    if arg and all(c.isalnum() or c in "%@$-_./:,=" for c in arg):
+        return arg
+    return '"' + arg.replace("\\", "\\\\").replace('"', '\\"').replace("$", "\\$") + '"'
+
+
+class TmuxControl:
+    """One persistent `tmux -C` control-mode client for a tmux server.
+
+    The client runs in a session of its own, so the user's sessions never gain
+    an attached client (`session_attached` and attach hooks are left alone).
+    A control client cannot exist without a session, so every codex-status
+    process (daemon, worker, wrapper) attaches to the one SESSION instead of
+    each creating another entry in `tmux ls`. Commands are written as one line and their replies read back
+    as `%begin ... %end` blocks. With tmux older than CONTROL_MIN_VERSION, or
+    while the client cannot be started, each batch runs as a single `tmux`
+    process instead.
+
+    If the client dies or times out mid-batch, that batch is not retried in
+    the same flush: its titles stay pending and go out through a one-shot
+    `tmux` process on the next one, so a pane title can lag by up to one
+    sample while the control client is down.
+    """
+
+    TIMEOUT_S = 1.0
+    RETRY_S = 30.0
+    PANES_TTL_S = 5.0
+    # `refresh-client -f no-output` needs 3.2.
+    CONTROL_MIN_VERSION = (3, 2)
+    SESSION = "codex-status"
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self._proc: Optional[subprocess.Popen] = None
+        self._buf = b""
+        self._retry_at = 0.0
+        self._panes: Dict[str, str] = {}
+        self._panes_at = 0.0
+        # Set when the last batch was lost with the control client; cleared by the next run().
+        self.lost = False
+
+    def _start(self) -> bool:
+        if self._proc is not None:
+            if self._proc.poll() is None:
+                return True
+            self._reset()
+        if time.monotonic() < self._retry_at or _tmux_version() < self.CONTROL_MIN_VERSION:
+            return False
+        # -A attaches if another process already made the session. destroy-unattached
+        # removes it with the last client, even if that process is killed.
+        session = self.SESSION
+        try:
+            counters.spawned += 1
+            self._proc = subprocess.Popen(
+                [
+                    "tmux", "-S", self.socket_path, "-C",
+                    "new-session", "-A", "-s", session, "cat", ";",
+                    "set-option", "-t", session, "destroy-unattached", "on", ";",
+                    "refresh-client", "-f", "no-output",
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            self._retry_at = time.monotonic() + self.RETRY_S
+            return False
+        self._buf = b""
+        return True
+
+    def _reset(self) -> None:
+        proc, self._proc = self._proc, None
+        self._retry_at = time.monotonic() + self.RETRY_S
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+        except Exception:
+            pass
+        try:
+            proc.kill()
+            proc.wait(timeout=1)
+        except Exception:
+            pass
+
+    def _readline(self, deadline: float) -> Optional[bytes]:
+        assert self._proc is not None
+        while b"\n" not in self._buf:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return None
+            ready, _, _ = select.select([self._proc.stdout], [], [], left)
+            if not ready:
+                return None
+            chunk = os.read(self._proc.stdout.fileno(), 65536)
+            if not chunk:
+                return None
+            self._buf += chunk
+        line, self._buf = self._buf.split(b"\n", 1)
+        return line
+
+    def _run_control(self, commands: List[List[str]]) -> Optional[List[List[str]]]:
+        line = " ; ".join(" ".join(_tmux_quote(a) for a in cmd) for cmd in commands) + "\n"
+        try:
+            os.write(self._proc.stdin.fileno(), line.encode())
+        except OSError:
+            self._reset()
+            return None
+        results: List[List[str]] = []
+        block: Optional[List[str]] = None
+        mine = False
+        deadline = time.monotonic() + self.TIMEOUT_S
+        while len(results) < len(commands):
+            raw = self._readline(deadline)
+            if raw is None:
+                self._reset()
+                return None
+            if block is None:
+                if raw.startswith(b"%begin "):
+                    parts = raw.split()
+                    # Flag 1 marks replies to commands sent by this client.
+                    mine = len(parts) >= 4 and parts[3] == b"1"
+                    block = []
+                continue
+            if raw.startswith(b"%end ") or raw.startswith(b"%error "):
+                if mine:
+                    results.append(block)
+                block = None
+                continue
+            block.append(raw.decode("utf-8", errors="replace"))
+        return results
+
+    def run(self, commands: List[List[str]]) -> Optional[List[List[str]]]:
+        """Runs `commands` as one batch. Returns each command's output lines, or None on failure."""
+        self.lost = False
+        if not commands:
+            return []
+        if self._start():
+            results = self._run_control(commands)
+            if results is None:
+                self.lost = True
+            return results
+        argv = ["tmux", "-S", self.socket_path]
+        for i, cmd in enumerate(commands):
+            if i:
+                argv.append(";")
+            argv.extend(cmd)
+        try:
+            r = run_command(argv, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+        except Exception:
+            return None
+        if r.returncode != 0:
+            return None
+        # Without control mode the outputs are concatenated; only single queries need them.
+        return [r.stdout.splitlines()] + [[] for _ in commands[1:]]
+
+    def pane_for_tty(self, tty_path: str) -> Optional[str]:
+        now = time.monotonic()
+        pane = self._panes.get(tty_path)
+        stale = now - self._panes_at > self.PANES_TTL_S
+        if pane is not None and not stale:
+            return pane
+        if pane is None and now - self._panes_at < 1.0:
+            return None
+        out = self.run([["list-panes", "-a", "-F", "#{pane_id} #{pane_tty}"]])
+        self._panes_at = now
+        if out is None:
+            return None
+        panes: Dict[str, str] = {}
+        for line in out[0]:
+            parts = line.split(" ", 1)
+            if len(parts) == 2:
+                panes[parts[1]] = parts[0]
+        self._panes = panes
+        return panes.get(tty_path)
+
+    def set_titles(self, items: List[Tuple[str, str]], mode: str) -> bool:
+        """Sets titles for [(pane id, title)] in one batch."""
+        commands: List[List[str]] = []
+        for pane, title in items:
+            # Both commands expand #{...} formats in their argument.
+            text = title.replace("#", "##")
+            if mode == "window":
+                commands.append(["rename-window", "-t", pane, text])
+            else:
+                commands.append(["select-pane", "-t", pane, "-T", text])
+        return self.run(commands) is not None
+
+    def close(self) -> None:
+        self._reset()
+
+
+class TitleDispatcher:
+    """Coalesces, deduplicates and rate-limits title updates for many terminals."""
+
+    def __init__(self, panes: Optional[WezTermPanes] = None, min_interval: Optional[float] = None):
+        self.panes = panes or WezTermPanes()
+        self.min_interval = title_min_interval() if min_interval is None else min_interval
+        self._tmux: Dict[str, TmuxControl] = {}
+        self._pending: Dict["TitleOutput", str] = {}
+
+    def tmux(self, socket_path: str) -> TmuxControl:
+        ctl = self._tmux.get(socket_path)
+        if ctl is None:
+            ctl = self._tmux[socket_path] = TmuxControl(socket_path)
+        return ctl
+
+    def submit(self, output: "TitleOutput", title: str) -> None:
+        if title == output.last_title:
+            self._pending.pop(output, None)
+        else:
+            self._pending[output] = title
+
+    def flush(self, force: bool = False) -> Optional[float]:
+        """Applies the pending titles that are due. Returns seconds until the next one is."""
+        if not self._pending:
+            return None
+        now = time.monotonic()
+        due: List[Tuple["TitleOutput", str]] = []
+        next_due: Optional[float] = None
+        for output, title in list(self._pending.items()):
+            wait = output.last_set + self.min_interval - now
+            if wait > 0 and not force:
+                next_due = wait if next_due is None else min(next_due, wait)
+                continue
+            due.append((output, title))
+            del self._pending[output]
+        self._apply(due, now)
+        return next_due
+
+    def _apply(self, due: List[Tuple["TitleOutput", str]], now: float) -> None:
+        by_tmux: Dict[Tuple[TmuxControl, str], List[Tuple["TitleOutput", str, str]]] = {}
+        rest: List[Tuple["TitleOutput", str]] = []
+        for output, title in due:
+            target = output.tmux_target()
+            if target is None:
+                rest.append((output, title))
+            else:
+                ctl, pane = target
+                by_tmux.setdefault((ctl, output.tmux_mode), []).append((output, pane, title))
+
+        for (ctl, mode), items in by_tmux.items():
+            if ctl.set_titles([(pane, title) for _, pane, title in items], mode):
+                for output, _, title in items:
+                    output._applied(title, now)
+            elif ctl.lost:
+                # Retried through a one-shot `tmux` on the next flush; a newer title submitted meanwhile wins.
+                for output, _, title in items:
+                    self._pending.setdefault(output, title)
+            else:
+                rest.extend((output, title) for output, _, title in items)
+
+        now_ms = _now_ms()
+        for output, title in rest:
+            output._write(title, now_ms)
+            output._applied(title, now)
+
+    def close(self) -> None:
+        self.flush(force=True)
+        if self._pending:  # a batch lost with a tmux control client
+            self.flush(force=True)
+        for ctl in self._tmux.values():
+            ctl.close()
+        self._tmux.clear()
+
+
+class TitleOutput:
+    """Sets a terminal's title via tmux or WezTerm when possible, otherwise OSC on its TTY.
+
+    With a shared `dispatcher` titles are applied when the owner flushes it;
+    otherwise the output has a private dispatcher flushed on every
+    `set_title()`.
+    """
+
+    def __init__(
+        self,
+        tty_path: str,
+        mode: Optional[str] = None,
+        panes: Optional[WezTermPanes] = None,
+        dispatcher: Optional[TitleDispatcher] = None,
+        pane_id: Optional[str] = None,
+        tmux: Optional[str] = None,
+    ):
+        self.tty_path = tty_path
+        self.mode = mode if mode is not None else wezterm_mode()
+        self._own_dispatcher = dispatcher is None
+        self.dispatcher = dispatcher or TitleDispatcher(panes=panes)
+        self.wez = WezTermController(tty_path=tty_path, mode=self.mode, panes=self.dispatcher.panes, pane_id=pane_id)
+        # $TMUX is "<socket>,<server pid>,<session>" inside a tmux pane.
+        tmux = os.environ.get("TMUX", "") if tmux is None else tmux
+        self.tmux_socket = tmux.split(",", 1)[0] if tmux else ""
+        self.tmux_mode = tmux_mode() if self.tmux_socket else "off"
+        self.last_title = ""
+        self.last_set = float("-inf")
+        try:
+            self.tty_out = open(tty_path, "w", buffering=1)
+        except Exception:
+            self.tty_out = None
+
+    def set_title(self, title: str) -> None:
+        self.dispatcher.submit(self, title)
+        if self._own_dispatcher:
+            self.dispatcher.flush()
+
+    def tmux_target(self) -> Optional[Tuple[TmuxControl, str]]:
+        if self.tmux_mode == "off" or not _have("tmux"):
+            return None
+        ctl = self.dispatcher.tmux(self.tmux_socket)
+        pane = ctl.pane_for_tty(self.tty_path)
+        return (ctl, pane) if pane else None
+
+    def _write(self, title: str, now_ms: int) -> None:
+        handled = False
+        if self.mode != "off":
+            handled = self.wez.set_title(title, now_ms)
+        if not handled and self.tty_out:
+            try:
+                set_terminal_title(title, out=self.tty_out)
+            except Exception:
+                pass
+
+    def _applied(self, title: str, now: float) -> None:
+        self.last_title = title
+        self.last_set = now
+
+    def close(self) -> None:
+        pending = self.dispatcher._pending.pop(self, None)
+        if pending is not None:
+            self.dispatcher._apply([(self, pending)], time.monotonic())
+        if self._own_dispatcher:
+            self.dispatcher.close()
+        if self.tty_out:
+            try:
+                self.tty_out.close()
+            except Exception:
+                pass
+            self.tty_out = None
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Sustained-growth detection for slowly changing gauges (memory, fds).
+
+`Trend` keeps the values seen over the last `window_s` seconds and fits a
+least-squares line through them. Growth counts as sustained only when the
+samples cover at least half the window, the fit explains most of the
+variance (a one-off spike or a sawtooth from a garbage collector does not
+qualify) and the fitted increase over the window is large both relative to
+the starting level and in absolute terms.
+"""
+
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+
+class Trend:
+    MIN_STEP_S = 5.0  # at most one point per MIN_STEP_S keeps the fit cheap
+    MIN_R2 = 0.7
+
+    def __init__(self, window_s: float = 1800.0):
+        self.window_s = window_s
+        self.points: Deque[Tuple[float, float]] = deque()
+        self._fit: Optional[Tuple[float, float]] = None
+
+    def add(self, ts: float, value: float) -> None:
+        if self.points and ts - self.points[-1][0] < self.MIN_STEP_S:
+            return
+        self._fit = None
+        self.points.append((ts, value))
+        while self.points and ts - self.points[0][0] > self.window_s:
+            self.points.popleft()
+
+    def span_s(self) -> float:
+        return self.points[-1][0] - self.points[0][0] if len(self.points) > 1 else 0.0
+
+    def fit(self) -> Tuple[float, float]:
+        """(slope per second, r²) of the least-squares line; (0, 0) with fewer than 3 points."""
+        if self._fit is None:
+            self._fit = self._compute_fit()
+        return self._fit
+
+    def _compute_fit(self) -> Tuple[float, float]:
+        n = len(self.points)
+        if n < 3:
+            return 0.0, 0.0
+        t0 = self.points[0][0]
+        xs = [t - t0 for t, _ in self.points]
+        ys = [v for _, v in self.points]
+        mx, my = sum(xs) / n, sum(ys) / n
+        sxx = sum((x - mx) ** 2 for x in xs)
+        syy = sum((y - my) ** 2 for y in ys)
+        sxy = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+        if sxx <= 0:
+            return 0.0, 0.0
+        slope = sxy / sxx
+        r2 = (sxy * sxy) / (sxx * syy) if syy > 0 else 0.0
+        return slope, r2
+
+    def per_hour(self) -> float:
+        return self.fit()[0] * 3600.0
+
+    def growing(self, min_ratio: float, min_abs: float) -> bool:
+        """True if the value grew steadily by at least min_ratio of its start and min_abs over the window."""
+        if self.span_s() < self.window_s / 2:
+            return False
+        slope, r2 = self.fit()
+        if slope <= 0 or r2 < self.MIN_R2:
+            return False
+        growth = slope * self.span_s()
+        start = self.points[0][1]
+        return growth >= min_abs and growth >= min_ratio * max(start, 1.0)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""Wake monitor loops on session/log writes instead of a fixed sleep.
+
+On Linux an inotify backend (via ctypes, no extra dependencies) watches the
+active session file, its directory and codex-tui.log, so a sample can be
+taken as soon as Codex writes. Elsewhere, or when inotify is unavailable,
+`PollWatcher` simply sleeps for the timeout.
+
+Select the backend with CODEX_STATUS_WATCH=auto|inotify|poll (default auto).
+"""
+
+import os
+import time
+import struct
+import select
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Set
+
+try:
+    from .paths import sessions_root
+except ImportError:
+    from paths import sessions_root
+
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+FILE_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_DELETE_SELF | IN_MOVE_SELF
+DIR_MASK = IN_CREATE | IN_MOVED_TO
+
+
+class PollWatcher:
+    """Fallback backend: no file events, just a timed wait."""
+
+    backend = "poll"
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self.fired: Set[str] = set()
+
+    def set_paths(self, paths: Dict[str, int]) -> None:
+        pass
+
+    def wait(self, timeout: float) -> bool:
+        """Sleeps up to `timeout`. Returns True if woken early by `wake()`."""
+        woke = self._wake.wait(max(0.0, timeout))
+        self._wake.clear()
+        return woke
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify backend."""
+
+    backend = "inotify"
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._add.restype = ctypes.c_int
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = [ctypes.c_int, ctypes.c_int]
+        self._rm.restype = ctypes.c_int
+
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._watches: Dict[str, int] = {}  # path -> wd
+        self._masks: Dict[str, int] = {}
+        self.fired: Set[str] = set()  # watched paths with events in the last wait()
+
+    def set_paths(self, paths: Dict[str, int]) -> None:
+        """Reconcile watches with {path: mask}. Missing paths are skipped."""
+        for path in list(self._watches):
+            if paths.get(path) != self._masks.get(path):
+                self._rm(self._fd, self._watches.pop(path))
+                self._masks.pop(path, None)
+        for path, mask in paths.items():
+            if path in self._watches:
+                continue
+            wd = self._add(self._fd, os.fsencode(path), mask)
+            if wd >= 0:
+                self._watches[path] = wd
+                self._masks[path] = mask
+
+    def _drain(self, fd: int) -> bytes:
+        chunks = []
+        try:
+            while True:
+                data = os.read(fd, 65536)
+                if not data:
+                    break
+                chunks.append(data)
+        except (BlockingIOError, OSError):
+            pass
+        return b"".join(chunks)
+
+    def _handle_events(self, data: bytes) -> None:
+        """Records which paths fired and drops watches whose file was moved/deleted.
+
+        set_paths re-adds dropped watches by path.
+        """
+        seen = set()
+        dead = {}
+        off = 0
+        while off + 16 <= len(data):
+            wd, mask, _cookie, name_len = struct.unpack_from("iIII", data, off)
+            seen.add(wd)
+            if mask & (IN_IGNORED | IN_MOVE_SELF | IN_DELETE_SELF):
+                dead[wd] = dead.get(wd, 0) | mask
+            off += 16 + name_len
+        for path, wd in list(self._watches.items()):
+            if wd in seen:
+                self.fired.add(path)
+            if wd in dead:
+                if not dead[wd] & IN_IGNORED:
+                    self._rm(self._fd, wd)
+                del self._watches[path]
+                self._masks.pop(path, None)
+
+    def wait(self, timeout: float) -> bool:
+        """Blocks until a watched path changes or `timeout` expires."""
+        self.fired = set()
+        try:
+            ready, _, _ = select.select([self._fd, self._wake_r], [], [], max(0.0, timeout))
+        except InterruptedError:
+            return False
+        if not ready:
+            return False
+        if self._fd in ready:
+            self._handle_events(self._drain(self._fd))
+        if self._wake_r in ready:
+            self._drain(self._wake_r)
+        return True
+
+    def wake(self) -> None:
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def create_watcher():
+    """Returns an inotify watcher when available, otherwise a PollWatcher."""
+    backend = os.environ.get("CODEX_STATUS_WATCH", "auto").strip().lower()
+    if backend != "poll" and os.name == "posix" and Path("/proc/sys/fs/inotify").is_dir():
+        try:
+            return InotifyWatcher()
+        except Exception:
+            pass
+    return PollWatcher()
+
+
+def monitor_watch_paths(monitor) -> Dict[str, int]:
+    """Paths whose writes can change `monitor`'s status, as {path: inotify mask}."""
+    paths: Dict[str, int] = {}
+    log_path = monitor.log_watcher.log_path
+    if log_path.exists():
+        paths[str(log_path)] = FILE_MASK
+    session_file: Optional[Path] = monitor.session_file
+    if session_file is not None:
+        paths[str(session_file)] = FILE_MASK
+        paths[str(session_file.parent)] = DIR_MASK
+    else:
+        # Not attached yet: watch today's session dir for the rollout file.
+        today = sessions_root() / time.strftime("%Y/%m/%d")
+        watch_dir = today if today.is_dir() else sessions_root()
+        if watch_dir.is_dir():
+            paths[str(watch_dir)] = DIR_MASK
+    return paths
+
+
+class MonitorWaiter:
+    """Sleeps between `CodexMonitor.sample()` calls, waking early on Codex writes.
+
+    With inotify, `slow_interval` only paces the CPU/IO based checks (D-state,
+    stuck silence); status changes driven by the session file show up as soon
+    as it is written. `MIN_GAP_S` coalesces bursts of writes while streaming.
+    """
+
+    MIN_GAP_S = 0.2
+
+    def __init__(self, monitor, interval: float = 2.0, watcher=None):
+        self.monitor = monitor
+        self.watcher = watcher or create_watcher()
+        self.interval = interval
+        self.slow_interval = interval
+        if self.event_driven:
+            slow = os.environ.get("CODEX_STATUS_SLOW_INTERVAL_S", "").strip()
+            self.slow_interval = max(interval, float(slow) if slow else 5.0)
+        self._last_return = 0.0
+
+    @property
+    def event_driven(self) -> bool:
+        return self.watcher.backend != "poll"
+
+    def _paths(self) -> Dict[str, int]:
+        return monitor_watch_paths(self.monitor)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits for the next sample. Returns True if a file event triggered it."""
+        timeout = self.slow_interval if timeout is None else timeout
+        start = time.time()
+        gap = self.MIN_GAP_S - (start - self._last_return)
+        if gap > 0:
+            time.sleep(gap)
+        self.watcher.set_paths(self._paths())
+        triggered = self.watcher.wait(timeout - (time.time() - start))
+        self._last_return = time.time()
+        return triggered and self.event_driven
+
+    def wake(self) -> None:
+        self.watcher.wake()
+
+    def close(self) -> None:
+        self.watcher.close()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Run with: python3 -m unittest discover -s tests"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+import daemon  # noqa: E402
+from status import CodexStatus, State  # noqa: E402
+
+
+class _FakeMonitor:
+    def __init__(self, sample):
+        self._sample = sample
+        self.samples = 0
+
+    def sample(self):
+        self.samples += 1
+        return self._sample()
+
+
+def _fail():
+    raise RuntimeError("procfs went away")
+
+
+class MonitorDaemonTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self._env = dict(os.environ)
+        self.addCleanup(lambda: (os.environ.clear(), os.environ.update(self._env)))
+        os.environ.update({
+            "XDG_CACHE_HOME": tmp.name,
+            "CODEX_STATUS_WEZTERM_MODE": "off",
+            "CODEX_STATUS_TMUX_MODE": "off",
+        })
+        os.environ.pop("TMUX", None)
+        self.daemon = daemon.MonitorDaemon()
+        self.addCleanup(self.daemon.shutdown)
+        self.tty = os.path.join(tmp.name, "tty")
+        Path(self.tty).touch()
+
+    def register(self) -> "daemon._Session":
+        self.assertTrue(self.daemon._handle({"op": "register", "tty": self.tty})["ok"])
+        return self.daemon._sessions[self.tty]
+
+    def test_failed_sample_waits_for_next_tick(self):
+        session = self.register()
+        session.monitor = monitor = _FakeMonitor(_fail)
+        now = 1000.0
+        self.assertEqual(self.daemon._sample_due(now, set()), self.daemon.interval)
+        self.assertEqual(session.next_at, now + self.daemon.interval)
+        self.daemon._sample_due(now + 0.1, set())
+        self.assertEqual(monitor.samples, 1)
+
+    def test_reregister_closes_old_session_from_main_loop(self):
+        old = self.register()
+        closed = []
+        old.close = lambda: closed.append(old)
+        replaced = []
+
+        def sample():
+            # The launcher re-registers the TTY while the main loop is sampling it.
+            replaced.append(self.register())
+            self.assertEqual(closed, [])
+            return CodexStatus(state=State.EXITED)
+
+        old.monitor = _FakeMonitor(sample)
+        self.daemon._sample_due(1000.0, set())
+        self.assertEqual(closed, [])
+        self.daemon._close_retired()
+        self.assertEqual(closed, [old])
+        self.assertIs(self.daemon._sessions[self.tty], replaced[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""Run with: python3 -m unittest discover -s tests"""
+
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+from monitor import CodexMonitor, JsonlTail, LogWatcher, ProcSampler, SessionFollower  # noqa: E402
+from status import State  # noqa: E402
+from session_events import DONE, USER  # noqa: E402
+from session_index import SessionIndex  # noqa: E402
+from test_procscan import stat_line  # noqa: E402
+
+
+def _line(t: float, payload_type: str, **payload) -> str:
+    ts = datetime.fromtimestamp(t, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+    kind = "event_msg" if payload_type == "user_message" else "response_item"
+    return json.dumps({"timestamp": ts, "type": kind, "payload": dict(type=payload_type, **payload)}, separators=(",", ":"))
+
+
+def user_line(t: float) -> str:
+    return _line(t, "user_message", message="fix the failing test")
+
+
+def done_line(t: float) -> str:
+    return _line(t, "message", role="assistant", content=[{"type": "output_text", "text": "Fixed.\n\nCODEX_DONE"}])
+
+
+class PendingStateTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self._env = dict(os.environ)
+        self.addCleanup(lambda: (os.environ.clear(), os.environ.update(self._env)))
+        os.environ["CODEX_HOME"] = self.tmp.name
+        self.session = Path(self.tmp.name) / "rollout-2025-10-09T08-53-00-0199aaaa-bbbb-7ccc-8ddd-eeeeeeeeeeee.jsonl"
+
+    def test_done_marker_clears_pending_on_next_sample(self):
+        t0 = time.time() - 10
+        self.session.write_text(user_line(t0) + "\n")
+        monitor = CodexMonitor(pid=os.getpid(), start_cwd=self.tmp.name)
+        monitor._detect_session_file = lambda pid: self.session
+
+        pending, started, _ = monitor._get_session_state(time.time(), os.getpid())
+        self.assertTrue(pending)
+        self.assertAlmostEqual(started, t0, places=2)
+
+        with self.session.open("a") as f:
+            f.write(done_line(t0 + 5) + "\n")
+        # The very next sample (as triggered by the file event) must see the marker.
+        pending, _, _ = monitor._get_session_state(time.time(), os.getpid())
+        self.assertFalse(pending)
+
+    def test_new_request_after_done_is_pending_again(self):
+        t0 = time.time() - 20
+        self.session.write_text(user_line(t0) + "\n" + done_line(t0 + 1) + "\n")
+        monitor = CodexMonitor(pid=os.getpid(), start_cwd=self.tmp.name)
+        monitor._detect_session_file = lambda pid: self.session
+        self.assertFalse(monitor._get_session_state(time.time(), os.getpid())[0])
+
+        with self.session.open("a") as f:
+            f.write(user_line(t0 + 10) + "\n")
+        self.assertTrue(monitor._get_session_state(time.time(), os.getpid())[0])
+
+
+def call_line(t: float, call_id: str, name: str = "shell") -> str:
+    return _line(t, "function_call", name=name, arguments="{}", call_id=call_id)
+
+
+def output_line(t: float, call_id: str) -> str:
+    return _line(t, "function_call_output", call_id=call_id, output="ok")
+
+
+@unittest.skipUnless(sys.platform.startswith("linux") and shutil.which("sleep"), "needs Linux /proc and sleep(1)")
+class OpenToolCallStateTest(unittest.TestCase):
+    """A silent session with a tool call still waiting for its output is a long tool run, not a stuck model."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self._env = dict(os.environ)
+        self.addCleanup(lambda: (os.environ.clear(), os.environ.update(self._env)))
+        os.environ["CODEX_HOME"] = self.tmp.name
+        os.environ["XDG_CACHE_HOME"] = self.tmp.name
+        os.environ.update({"CODEX_STATUS_MODEL_STUCK_S": "600", "CODEX_STATUS_TOKEN_STALL_S": "600"})
+        self.session = Path(self.tmp.name) / "rollout-2025-10-09T08-53-00-0199aaaa-bbbb-7ccc-8ddd-eeeeeeeeeeee.jsonl"
+        # An idle process: the monitor's own CPU use would count as activity.
+        proc = subprocess.Popen(["sleep", "60"])
+        self.addCleanup(lambda: (proc.kill(), proc.wait()))
+        self.monitor = CodexMonitor(pid=proc.pid, start_cwd=self.tmp.name)
+        self.monitor._detect_session_file = lambda pid: self.session
+        self.t0 = time.time() - 3600
+
+    def write(self, *lines: str) -> None:
+        with self.session.open("a") as f:
+            f.write("".join(line + "\n" for line in lines))
+        # Last written long ago: silent for longer than MODEL_STUCK_S.
+        os.utime(self.session, (self.t0 + 60, self.t0 + 60))
+
+    def test_open_call_keeps_silent_turn_out_of_stuck(self):
+        self.write(user_line(self.t0), call_line(self.t0 + 1, "c1", name="cargo_test"))
+        status = self.monitor.sample()
+        self.assertEqual(status.state, State.IDLE)
+        self.assertEqual(status.active_tool, "cargo_test")
+        self.assertGreaterEqual(status.active_tool_s, 3599 - 60)
+
+    def test_stuck_once_the_call_has_its_output(self):
+        self.write(user_line(self.t0), call_line(self.t0 + 1, "c1"))
+        self.assertEqual(self.monitor.sample().state, State.IDLE)
+        self.write(output_line(self.t0 + 30, "c1"))
+        status = self.monitor.sample()
+        self.assertIsNone(status.active_tool)
+        self.assertEqual(status.state, State.STUCK)
+
+    def test_calls_of_a_finished_turn_do_not_carry_over(self):
+        # The previous turn ended (CODEX_DONE) without an output for c1; the new turn is silent.
+        self.write(user_line(self.t0), call_line(self.t0 + 1, "c1"), done_line(self.t0 + 2), user_line(self.t0 + 10))
+        status = self.monitor.sample()
+        self.assertIsNone(status.active_tool)
+        self.assertEqual(status.state, State.STUCK)
+
+    def test_oldest_open_call_is_reported(self):
+        self.write(user_line(self.t0), call_line(self.t0 + 1, "c1", name="first"), call_line(self.t0 + 5, "c2", name="second"))
+        self.assertEqual(self.monitor.sample().active_tool, "first")
+        self.write(output_line(self.t0 + 20, "c1"))
+        status = self.monitor.sample()
+        self.assertEqual((status.active_tool, status.state), ("second", State.IDLE))
+
+
+class CwdSessionLookupTest(unittest.TestCase):
+    """Codex started without a session id on its cmdline: the session is found by cwd."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        root = Path(self.tmp.name)
+        self.work = root / "work"
+        self.work.mkdir()
+        self.day = root / "sessions" / "2025" / "10" / "09"
+        self.day.mkdir(parents=True)
+        index = SessionIndex(root / "sessions", root / "index.json")
+        index.REFRESH_S = 0.0
+        self.monitor = CodexMonitor(pid=os.getpid(), start_cwd=str(self.work), session_index=index)
+        self.monitor._read_cmdline = lambda pid: "codex"
+        self.lookups = 0
+        find = index.find_by_cwd
+
+        def counted(cwd, since):
+            self.lookups += 1
+            return find(cwd, since)
+
+        index.find_by_cwd = counted
+
+    def session(self, sid: str) -> Path:
+        meta = json.dumps({"timestamp": "2025-10-09T08:53:00.000Z", "type": "session_meta",
+                           "payload": {"id": sid, "cwd": str(self.work)}})
+        path = self.day / f"rollout-2025-10-09T08-53-00-{sid}.jsonl"
+        path.write_text(meta + "\n" + user_line(time.time()) + "\n")
+        return path
+
+    def test_resolved_file_is_cached(self):
+        first = self.session("0199aaaa-bbbb-7ccc-8ddd-eeeeeeeeeeee")
+        for _ in range(3):
+            self.assertEqual(self.monitor._detect_session_file(os.getpid()), first)
+        self.assertEqual(self.lookups, 1)
+
+    def test_re_resolves_when_rotated_or_removed(self):
+        first = self.session("0199aaaa-bbbb-7ccc-8ddd-eeeeeeeeeeee")
+        self.assertEqual(self.monitor._detect_session_file(os.getpid()), first)
+        rotated = self.session("0199aaaa-bbbb-7ccc-8ddd-ffffffffffff")
+        os.utime(first, (time.time() - 2, time.time() - 2))
+        self.assertEqual(self.monitor._detect_session_file(os.getpid()), rotated)
+        rotated.unlink()
+        self.assertEqual(self.monitor._detect_session_file(os.getpid()), first)
+        self.assertEqual(self.lookups, 3)
+
+
+class LogWatcherTest(unittest.TestCase):
+    SID = "0199aaaa-bbbb-7ccc-8ddd-eeeeeeeeeeee"
+    OTHER = "0199aaaa-bbbb-7ccc-8ddd-ffffffffffff"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.log = Path(self.tmp.name) / "codex-tui.log"
+        self.log.write_text("")
+        self.watcher = LogWatcher(self.log, session_id=self.SID)
+        self.exclusive = True
+        self.exclusive_calls = 0
+        self.watcher.is_exclusive = self._is_exclusive
+        self.assertFalse(self.watcher.check_activity())
+
+    def _is_exclusive(self) -> bool:
+        self.exclusive_calls += 1
+        return self.exclusive
+
+    def append(self, *lines: str) -> None:
+        with self.log.open("a") as f:
+            f.write("".join(line + "\n" for line in lines))
+
+    def tool(self, name: str, sid: str = "") -> str:
+        tag = f' session_id="{sid}"' if sid else ""
+        return f"2025-10-09T08:53:00Z INFO codex_core{tag}: ToolCall: {name} {{}}"
+
+    def test_tagged_lines_follow_session_id(self):
+        self.append(self.tool("shell", self.OTHER))
+        self.assertFalse(self.watcher.check_activity())
+        self.append(self.tool("apply_patch", self.SID))
+        self.assertTrue(self.watcher.check_activity())
+        self.assertEqual(self.watcher.last_tool, "apply_patch")
+
+    def test_untagged_lines_need_an_exclusive_codex(self):
+        self.exclusive = False
+        self.append(self.tool("shell"), self.tool("shell"))
+        self.assertFalse(self.watcher.check_activity())
+        self.assertEqual(self.exclusive_calls, 1)  # asked once per read, not per line
+        self.assertIsNone(self.watcher.last_tool)
+        self.exclusive = True
+        self.append(self.tool("read_file"))
+        self.assertTrue(self.watcher.check_activity())
+        self.assertEqual(self.watcher.last_tool, "read_file")
+
+    def test_other_lines_are_not_activity(self):
+        self.append("2025-10-09T08:53:00Z INFO codex_core: websocket connected")
+        self.assertFalse(self.watcher.check_activity())
+
+    def test_rotated_log_is_read_from_start(self):
+        self.append("x" * 200)
+        self.watcher.check_activity()
+        rotated = self.log.with_name("codex-tui.log.1")
+        os.replace(self.log, rotated)
+        # Longer than the old file: only the new inode tells that it was rotated.
+        self.append(self.tool("shell", self.SID), "y" * 300)
+        self.assertTrue(self.watcher.check_activity())
+        self.assertEqual(self.watcher.last_tool, "shell")
+
+    def test_truncated_log_is_read_from_start(self):
+        self.append("x" * 500)
+        self.watcher.check_activity()
+        self.log.write_text(self.tool("update_plan", self.SID) + "\n")
+        self.assertTrue(self.watcher.check_activity())
+
+    def test_update_plan_progress(self):
+        plan = '{"plan": [{"step": "Read code", "status": "completed"}, {"step": "Fix bug", "status": "in_progress"}]}'
+        self.append(self.tool("update_plan", self.SID) + " " + plan)
+        self.assertTrue(self.watcher.check_activity())
+        self.assertEqual((self.watcher.current_step, self.watcher.plan_progress), ("Fix bug", "1/2"))
+
+    def test_over_long_line_is_skipped(self):
+        self.watcher.MAX_LINE = 64
+        with self.log.open("a") as f:
+            f.write(self.tool("shell", self.SID) + " " + "x" * 100)
+        self.assertFalse(self.watcher.check_activity())
+        self.append("x" * 100, self.tool("read_file", self.SID))
+        self.assertTrue(self.watcher.check_activity())
+        self.assertEqual(self.watcher.last_tool, "read_file")
+
+
+class JsonlTailTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "rollout.jsonl"
+        self.path.write_bytes(b"")
+
+    def append(self, data: bytes) -> None:
+        with self.path.open("ab") as f:
+            f.write(data)
+
+    def test_partial_line_is_buffered_until_complete(self):
+        tail = JsonlTail(self.path)
+        self.append(b'{"a":1}\n{"b":')
+        self.assertEqual(tail.read_lines(), ([b'{"a":1}'], True))
+        self.append(b"2}")
+        self.assertEqual(tail.read_lines(), ([], False))
+        self.append(b"\n")
+        self.assertEqual(tail.read_lines(), ([b'{"b":2}'], False))
+
+    def test_initial_window_drops_cut_first_line(self):
+        self.append(b"x" * 30 + b"\nsecond\nthird\n")
+        self.assertEqual(JsonlTail(self.path, initial_window=20).read_lines(), ([b"second", b"third"], True))
+
+    def test_truncation_restarts_from_beginning(self):
+        self.append(b"one\ntwo\nthree\n")
+        tail = JsonlTail(self.path)
+        tail.read_lines()
+        self.path.write_bytes(b"new\n")
+        self.assertEqual(tail.read_lines(), ([b"new"], True))
+
+    def test_replaced_file_is_reread(self):
+        self.append(b"old\n")
+        tail = JsonlTail(self.path)
+        tail.read_lines()
+        replacement = self.path.with_name("next.jsonl")
+        replacement.write_bytes(b"old\nreplaced\n")
+        os.replace(replacement, self.path)
+        self.assertEqual(tail.read_lines(), ([b"old", b"replaced"], True))
+        self.assertEqual(tail.read_lines(), ([], False))
+
+    def test_locate_chooses_restart_offset(self):
+        self.append(b"one\ntwo\n")
+        tail = JsonlTail(self.path, locate=lambda st: 4)
+        self.assertEqual(tail.read_lines(), ([b"two"], True))
+
+    def test_over_long_line_is_cut_at_max_line(self):
+        tail = JsonlTail(self.path, track_line_ends=True)
+        tail.MAX_LINE = 8
+        tail.read_lines()
+        self.append(b"0123456789abcdef")
+        self.assertEqual(tail.read_lines(), ([], False))
+        self.append(b"ghij\nnext\n")
+        self.assertEqual(tail.read_lines(), ([b"01234567", b"next"], False))
+        # Resume positions are past the whole line, not its kept head.
+        self.assertEqual(tail.line_ends, [21, 26])
+
+    def test_reads_at_most_max_read_per_poll(self):
+        tail = JsonlTail(self.path)
+        tail.MAX_READ = 8
+        tail.read_lines()
+        self.append(b"aaa\nbbb\nccc\n")
+        self.assertEqual(tail.read_lines(), ([b"aaa", b"bbb"], False))
+        self.assertFalse(tail.caught_up)
+        self.assertEqual(tail.read_lines(), ([b"ccc"], False))
+        self.assertTrue(tail.caught_up)
+
+
+class NetStateTest(unittest.TestCase):
+    """ProcSampler._net_state from consecutive /proc/<pid>/net/tcp readings."""
+
+    def setUp(self):
+        self.conns = {}
+        self.sampler = ProcSampler(2 ** 22 + 100)
+        for name, fake in (("socket_inodes", lambda pid, fds: list(self.conns)),
+                           ("tcp_connections", lambda pid, inodes: dict(self.conns))):
+            patcher = mock.patch(f"monitor.{name}", fake)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def state(self):
+        return self.sampler._net_state(None)
+
+    def test_states(self):
+        self.assertEqual(self.state(), (0, "none"))
+        self.conns = {1: (1, 0, 0, 0, b"20 4 30 10"), 2: (10, 0, 0, 0, b"")}
+        self.assertEqual(self.state(), (1, "streaming"))  # a connection opened
+        self.assertEqual(self.state(), (1, "waiting"))  # connected, nothing moved
+        self.conns[1] = (1, 0, 0, 0, b"20 4 31 10")
+        self.assertEqual(self.state(), (1, "streaming"))  # ack/cwnd fields moved
+        self.conns[1] = (1, 512, 0, 0, b"20 4 31 10")
+        self.assertEqual(self.state(), (1, "streaming"))  # send data queued
+        self.assertEqual(self.state(), (1, "stalled"))  # and not draining
+        self.conns[1] = (1, 0, 0, 2, b"20 4 31 10")
+        self.assertEqual(self.state(), (1, "stalled"))  # retransmitting
+        self.conns = {1: (6, 0, 0, 0, b"")}
+        self.assertEqual(self.state(), (0, "streaming"))  # closed: TIME_WAIT
+
+
+class ProcSamplerTest(unittest.TestCase):
+    """Tree-wide CPU accounting over a fake /proc (utime/cutime in ticks, CLK_TCK 100)."""
+
+    ROOT = 2 ** 22 + 100  # above pid_max: never a real process
+
+    def setUp(self):
+        self.procs = {}
+        self.spawn(self.ROOT, 1, comm="codex")
+        self.sampler = ProcSampler(self.ROOT)
+        self.sampler._has_procfs = True
+        self.sampler._clk_tck = 100
+        self.sampler._children = lambda pid: [p for p, rec in self.procs.items() if rec["ppid"] == pid]
+        patcher = mock.patch("monitor.open", self._open, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _open(self, path, *args, **kwargs):
+        _, proc, pid, name = path.split("/", 3)
+        if proc == "proc" and name == "stat" and int(pid) in self.procs:
+            return io.BytesIO(stat_line(**self.procs[int(pid)]))
+        raise FileNotFoundError(path)
+
+    def spawn(self, pid: int, ppid: int, comm: str = "sh") -> None:
+        self.procs[pid] = dict(comm=comm, pid=pid, ppid=ppid, utime=0, stime=0, cutime=0, cstime=0, start=pid)
+
+    def burn(self, pid: int, ticks: int) -> None:
+        self.procs[pid]["utime"] += ticks
+
+    def reap(self, pid: int) -> None:
+        """The process exits and its parent wait()s for it: its totals move into the parent's cutime/cstime."""
+        rec = self.procs.pop(pid)
+        parent = self.procs[rec["ppid"]]
+        parent["cutime"] += rec["utime"] + rec["cutime"]
+        parent["cstime"] += rec["stime"] + rec["cstime"]
+
+    def cpu(self) -> float:
+        return round(self.sampler.sample().cpu_delta, 6)
+
+    def test_live_descendants(self):
+        child = self.ROOT + 1
+        self.spawn(child, self.ROOT, comm="cargo")
+        self.burn(self.ROOT, 100)
+        self.burn(child, 50)
+        self.assertEqual(self.cpu(), 1.5)
+        self.burn(child, 20)
+        sample = self.sampler.sample()
+        self.assertAlmostEqual(sample.cpu_delta, 0.2)
+        self.assertEqual((sample.busy_pid, sample.busy_cmd, sample.tree_procs), (child, "cargo", 2))
+        self.assertEqual(self.cpu(), 0.0)
+
+    def test_reaped_child_counts_only_unseen_ticks(self):
+        child = self.ROOT + 1
+        self.spawn(child, self.ROOT)
+        self.cpu()
+        self.burn(child, 30)
+        self.assertEqual(self.cpu(), 0.3)
+        self.burn(child, 10)
+        self.reap(child)
+        self.assertEqual(self.cpu(), 0.1)
+        self.assertEqual(self.cpu(), 0.0)
+
+    def test_child_between_samples_counts_in_full(self):
+        self.cpu()
+        child = self.ROOT + 1
+        self.spawn(child, self.ROOT)
+        self.burn(child, 25)
+        self.reap(child)
+        self.assertEqual(self.cpu(), 0.25)
+
+    def test_grandchild_reaped_through_exited_parent(self):
+        child, grandchild = self.ROOT + 1, self.ROOT + 2
+        self.spawn(child, self.ROOT)
+        self.spawn(grandchild, child)
+        self.cpu()
+        self.burn(grandchild, 40)
+        self.burn(child, 5)
+        self.assertEqual(self.cpu(), 0.45)
+        self.burn(grandchild, 10)
+        self.reap(grandchild)
+        self.burn(child, 2)
+        self.reap(child)
+        self.assertEqual(self.cpu(), 0.12)
+
+    def test_replaced_pid_is_a_new_process(self):
+        child = self.ROOT + 1
+        self.spawn(child, self.ROOT)
+        self.burn(child, 80)
+        self.cpu()
+        self.reap(child)
+        # Same pid, later start time: its ticks are not a delta against the old process.
+        self.spawn(child, self.ROOT)
+        self.procs[child]["start"] += 1
+        self.burn(child, 30)
+        self.assertEqual(self.cpu(), 0.3)
+
+
+class SessionFollowerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.session = Path(self.tmp.name) / "rollout-a.jsonl"
+        self.t0 = time.time() - 100
+
+    def append(self, *lines: str) -> None:
+        with self.session.open("a") as f:
+            f.write("".join(line + "\n" for line in lines))
+
+    def test_starts_after_last_complete_line(self):
+        self.append(user_line(self.t0))
+        with self.session.open("a") as f:
+            f.write(done_line(self.t0 + 1)[:20])  # still being written
+        follower = SessionFollower(self.session)
+        self.assertEqual(follower.poll(), [])
+        with self.session.open("a") as f:
+            f.write(done_line(self.t0 + 1)[20:] + "\n")
+        self.assertEqual([e.kind for e in follower.poll()], [DONE])
+
+    def test_cursor_resumes_after_event(self):
+        self.append(user_line(self.t0), done_line(self.t0 + 1), user_line(self.t0 + 2))
+        events = SessionFollower(self.session, from_start=True).poll()
+        self.assertEqual([e.kind for e in events], [USER, DONE, USER])
+        resumed = SessionFollower(self.session, cursor=events[1].cursor).poll()
+        self.assertEqual([(e.kind, e.ts) for e in resumed], [(USER, events[2].ts)])
+
+    def test_cursor_after_over_long_line(self):
+        self.append(user_line(self.t0))
+        follower = SessionFollower(self.session)
+        follower.poll()
+        huge = _line(self.t0 + 1, "function_call_output", call_id="c1", output="x" * (JsonlTail.MAX_READ + JsonlTail.MAX_LINE))
+        self.append(huge, done_line(self.t0 + 2))
+        events = []
+        while True:
+            events += follower.poll()
+            if follower.caught_up:
+                break
+        self.assertEqual(events[-1].kind, DONE)
+        self.assertEqual(int(events[-1].cursor.rsplit(":", 1)[1]), self.session.stat().st_size)
+
+    def test_replaced_file_restarts_at_beginning(self):
+        self.append(user_line(self.t0), done_line(self.t0 + 1))
+        follower = SessionFollower(self.session)
+        follower.poll()
+        self.session.unlink()
+        self.append(user_line(self.t0 + 5))
+        self.assertEqual([e.kind for e in follower.poll()], [USER])
+
+
+if __name__ == "__main__":
+    unittest.main()
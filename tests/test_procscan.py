@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Run with: python3 -m unittest discover -s tests"""
+
+import io
+import os
+import socket
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+from procscan import (  # noqa: E402
+    TCP_STATES, PsBatch, has_procfs, parse_elapsed, parse_stat, read_proc, socket_inodes, tcp_connections, tty_name,
+)
+
+
+def stat_line(comm: str, pid: int = 4242, ppid: int = 1, tty_nr: int = 34816, utime: int = 150, stime: int = 25,
+              cutime: int = 40, cstime: int = 7, start: int = 98765) -> bytes:
+    """A /proc/<pid>/stat line: pid (comm) state ppid pgrp session tty_nr ... starttime ..."""
+    fields = ["S", str(ppid), str(pid), str(pid), str(tty_nr), str(pid), "4194560", "0", "0", "0", "0",
+              str(utime), str(stime), str(cutime), str(cstime), "20", "0", "1", "0", str(start)] + ["0"] * 32
+    return f"{pid} ({comm}) {' '.join(fields)}\n".encode()
+
+
+class ParseStatTest(unittest.TestCase):
+    def test_plain_comm(self):
+        comm, rest = parse_stat(stat_line("codex"))
+        self.assertEqual(comm, "codex")
+        self.assertEqual(rest[0], b"S")
+        self.assertEqual(int(rest[4]), 34816)
+        self.assertEqual((int(rest[11]), int(rest[13])), (150, 40))
+        self.assertEqual(int(rest[19]), 98765)
+
+    def test_comm_with_spaces_and_parentheses(self):
+        for comm in ("tmux: server", "a) b (c", "((x))", ") 1 2 3", ""):
+            with self.subTest(comm=comm):
+                parsed_comm, rest = parse_stat(stat_line(comm))
+                self.assertEqual(parsed_comm, comm)
+                self.assertEqual(rest[:2], [b"S", b"1"])
+                self.assertEqual(int(rest[19]), 98765)
+
+    def test_garbage(self):
+        self.assertIsNone(parse_stat(b""))
+        self.assertIsNone(parse_stat(b"4242 codex S 1"))
+
+
+class TtyNameTest(unittest.TestCase):
+    def test_decodes_tty_nr(self):
+        cases = {
+            0: None,
+            -1: None,
+            (136 << 8) | 3: "pts/3",
+            (136 << 8) | 255: "pts/255",
+            # Minor numbers above 255 continue in bits 20-31; majors 137-143 are further pts ranges.
+            (136 << 8) | (1 << 20): "pts/256",
+            (137 << 8) | 4: "pts/260",
+            (4 << 8) | 1: "tty1",
+            (4 << 8) | 64: "ttyS0",
+            (4 << 8) | 65: "ttyS1",
+            (5 << 8) | 1: None,  # /dev/console
+        }
+        for tty_nr, name in cases.items():
+            with self.subTest(tty_nr=tty_nr):
+                self.assertEqual(tty_name(tty_nr), name)
+
+def tcp_row(sl: int, state: int, inode: int, tx: int = 0, rx: int = 0, retrans: int = 0, tail: str = "20 4 30 10 -1") -> str:
+    return (
+        f"{sl:4d}: 0100007F:1F90 0100007F:D431 {state:02X} {tx:08X}:{rx:08X} 00:00000000 {retrans:08X}"
+        f"  1000        0 {inode} 1 0000000000000000 {tail}"
+    )
+
+
+TCP_HEADER = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode"
+
+
+class TcpConnectionsTest(unittest.TestCase):
+    def fake_proc(self, tcp, tcp6=None):
+        files = {"/proc/7/net/tcp": tcp, "/proc/7/net/tcp6": tcp6}
+
+        def fake_open(path, *args, **kwargs):
+            rows = files.get(path)
+            if rows is None:
+                raise FileNotFoundError(path)
+            return io.BytesIO("\n".join([TCP_HEADER] + rows).encode() + b"\n")
+
+        patcher = mock.patch("procscan.open", fake_open, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_states_and_queues(self):
+        rows = [tcp_row(i, state, 100 + state) for i, state in enumerate(TCP_STATES)]
+        rows.append(tcp_row(20, 1, 500, tx=0x1A2B, rx=0x10, retrans=3, tail="204 40 1 10 7"))
+        self.fake_proc(rows)
+        conns = tcp_connections(7, [100 + state for state in TCP_STATES] + [500])
+        self.assertEqual({inode - 100: c[0] for inode, c in conns.items() if inode != 500}, {s: s for s in TCP_STATES})
+        self.assertEqual(conns[500], (1, 0x1A2B, 0x10, 3, b"204 40 1 10 7"))
+
+    def test_only_wanted_inodes_from_both_tables(self):
+        self.fake_proc([tcp_row(0, 1, 11), tcp_row(1, 1, 12)], tcp6=[tcp_row(0, 10, 13), "garbage line"])
+        self.assertEqual(sorted(tcp_connections(7, [11, 13, 99])), [11, 13])
+        self.assertEqual(tcp_connections(7, []), {})
+
+    def test_missing_tables(self):
+        self.assertEqual(tcp_connections(2 ** 22 + 1, [11]), {})
+
+    @unittest.skipUnless(has_procfs(), "needs /proc")
+    def test_own_sockets(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.addCleanup(server.close)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        client = socket.create_connection(server.getsockname())
+        self.addCleanup(client.close)
+        accepted, _ = server.accept()
+        self.addCleanup(accepted.close)
+        inodes = {os.fstat(s.fileno()).st_ino: s for s in (server, client, accepted)}
+        self.assertTrue(set(inodes) <= set(socket_inodes(os.getpid())))
+        states = {inodes[i]: TCP_STATES[c[0]] for i, c in tcp_connections(os.getpid(), inodes).items()}
+        self.assertEqual(states, {server: "LISTEN", client: "ESTABLISHED", accepted: "ESTABLISHED"})
+
+
+class ParseElapsedTest(unittest.TestCase):
+    def test_formats(self):
+        cases = {
+            "00:05": 5.0,  # etime mm:ss
+            "01:02": 62.0,
+            "1:02:03": 3723.0,  # hh:mm:ss
+            "12:00:00": 43200.0,
+            "2-01:02:03": 2 * 86400 + 3723.0,  # dd-hh:mm:ss
+            "1-00:00:00": 86400.0,
+            "0:01.23": 1.23,  # BSD `time`: fractional seconds
+            "125:07.50": 125 * 60 + 7.5,  # BSD `time`: minutes past 59
+            "  03:04 ": 184.0,
+        }
+        for text, seconds in cases.items():
+            with self.subTest(text=text):
+                self.assertAlmostEqual(parse_elapsed(text), seconds)
+
+    def test_invalid(self):
+        for text in ("", None, "   ", "42", "1:2:3:4", "ab:cd", "x-01:02:03", "-", "01:02-03"):
+            with self.subTest(text=text):
+                self.assertIsNone(parse_elapsed(text))
+
+
+class PsBatchTest(unittest.TestCase):
+    def test_rows_use_parse_elapsed(self):
+        out = "  101 S    00:00:03       05:10\n  202 Rs   1:02:03.50  3-04:05:06\nps: garbage\n"
+        result = mock.Mock(stdout=out, stderr="", returncode=0)
+        with mock.patch("procscan.run_command", return_value=result) as run:
+            batch = PsBatch()
+            row = batch.lookup(202)
+            self.assertEqual((row.state, row.cpu_s, row.elapsed_s), ("R", 3723.5, 3 * 86400 + 4 * 3600 + 5 * 60 + 6))
+            self.assertEqual(batch.lookup(101).elapsed_s, 310.0)
+        self.assertEqual(run.call_count, 2)  # a new pid joins the batch
+
+
+@unittest.skipUnless(has_procfs(), "needs /proc")
+class ReadProcTest(unittest.TestCase):
+    def test_reads_own_process(self):
+        info = read_proc(os.getpid(), boot=0.0, hz=100)
+        self.assertEqual(info.pid, os.getpid())
+        self.assertEqual(info.ppid, os.getppid())
+        self.assertEqual(info.state, "R")
+        self.assertIn("python", info.cmdline)
+        self.assertGreaterEqual(info.utime, 0)
+
+    def test_missing_process(self):
+        self.assertIsNone(read_proc(2 ** 22 + 1, boot=0.0, hz=100))
+
+
+if __name__ == "__main__":
+    unittest.main()
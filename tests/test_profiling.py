@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Run with: python3 -m unittest discover -s tests"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO / "lib"))
+
+from monitor import CodexMonitor  # noqa: E402
+from profiling import SampleProfiler, counters, render_profile  # noqa: E402
+from test_monitor import done_line, user_line  # noqa: E402
+
+
+class CountersTest(unittest.TestCase):
+    def test_concurrent_samples_count_only_their_own_reads(self):
+        profilers = [SampleProfiler(enabled=True) for _ in range(2)]
+        inside = threading.Barrier(2)
+
+        def sample(profiler: SampleProfiler, nbytes: int) -> None:
+            with profiler.phase("session_tail"):
+                counters.bytes_read += nbytes
+                counters.lines += 1
+                inside.wait()  # both phases open at once
+                inside.wait()
+
+        threads = [threading.Thread(target=sample, args=(p, n)) for p, n in zip(profilers, (100, 5000))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        totals = [p.to_dict()["phases"]["session_tail"]["totals"] for p in profilers]
+        self.assertEqual([t["bytes_read"] for t in totals], [100, 5000])
+        self.assertEqual([t["lines"] for t in totals], [1, 1])
+
+
+class ProfileViewTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self._env = dict(os.environ)
+        self.addCleanup(lambda: (os.environ.clear(), os.environ.update(self._env)))
+        os.environ["CODEX_HOME"] = self.tmp.name
+        os.environ["XDG_CACHE_HOME"] = self.tmp.name
+        self.session = Path(self.tmp.name) / "rollout-2025-10-09T08-53-00-0199aaaa-bbbb-7ccc-8ddd-eeeeeeeeeeee.jsonl"
+        t0 = time.time() - 10
+        self.session.write_text(user_line(t0) + "\n" + done_line(t0 + 1) + "\n")
+
+    def test_sample_records_each_phase(self):
+        monitor = CodexMonitor(pid=os.getpid(), start_cwd=self.tmp.name)
+        monitor.profiler.enabled = True
+        monitor._detect_session_file = lambda pid: self.session
+        monitor.sample()
+        monitor.sample()
+        phases = monitor.profiler.to_dict()["phases"]
+        for name in ("total", "pid", "proc", "session_find", "session_tail", "log"):
+            with self.subTest(phase=name):
+                self.assertEqual(phases[name]["wall_ms"]["count"], 2)
+        tail = phases["session_tail"]["totals"]
+        # The first sample reads the whole session, the second only stats it.
+        self.assertEqual(tail["bytes_read"], self.session.stat().st_size)
+        self.assertEqual(tail["lines"], 2)
+        self.assertEqual(phases["session_tail"]["bytes_read"]["max"], self.session.stat().st_size)
+
+    def test_disabled_profiler_records_nothing(self):
+        monitor = CodexMonitor(pid=os.getpid(), start_cwd=self.tmp.name)
+        monitor.profiler.enabled = False
+        monitor._detect_session_file = lambda pid: self.session
+        monitor.sample()
+        self.assertEqual(monitor.profiler.to_dict()["phases"], {})
+
+    def test_render_profile(self):
+        profiler = SampleProfiler(enabled=True)
+        for nbytes in (100, 300):
+            with profiler.phase("session_tail"):
+                counters.bytes_read += nbytes
+        table = render_profile(profiler.to_dict()).splitlines()
+        self.assertEqual(table[0].split(), ["phase", "n", "last", "p50", "p90", "p99", "max", "bytes", "lines", "spawn"])
+        row = table[1].split()
+        self.assertEqual(row[:2], ["session_tail", "2"])
+        self.assertEqual(row[7], "200")  # mean bytes per sample
+        self.assertIn("No profile samples", render_profile({}))
+
+    @unittest.skipUnless(sys.platform.startswith("linux") and shutil.which("sleep"), "needs Linux /proc and sleep(1)")
+    def test_profile_flag(self):
+        proc = subprocess.Popen(["sleep", "30"])
+        self.addCleanup(lambda: (proc.kill(), proc.wait()))
+        cmd = [sys.executable, str(REPO / "bin" / "codex-status"), "--profile", "-p", str(proc.pid)]
+        data = json.loads(subprocess.run(cmd + ["--json"], capture_output=True, text=True, timeout=30).stdout)
+        self.assertTrue({"total", "pid", "proc", "log"} <= set(data["profile"]["phases"]))
+        text = subprocess.run(cmd + ["--no-color"], capture_output=True, text=True, timeout=30).stdout
+        self.assertIn("phase", text)
+        self.assertIn("total", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
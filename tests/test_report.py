@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Run with: python3 -m unittest discover -s tests"""
+
+import sys
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+from monitor import JsonlTail  # noqa: E402
+from report import replay_session  # noqa: E402
+from test_monitor import _line, done_line, user_line  # noqa: E402
+
+
+class ReplaySessionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "rollout-2025-10-09T08-53-00-0199aaaa-bbbb-7ccc-8ddd-eeeeeeeeeeee.jsonl"
+        self.t0 = 1760000000.0
+
+    def test_turns(self):
+        self.path.write_text("\n".join([
+            user_line(self.t0), done_line(self.t0 + 10),
+            user_line(self.t0 + 60), _line(self.t0 + 61, "reasoning", summary=[]),
+            user_line(self.t0 + 90), done_line(self.t0 + 100),
+            user_line(self.t0 + 200),
+        ]) + "\n")
+        report = replay_session(str(self.path))
+        self.assertEqual(report.session_id, "0199aaaa-bbbb-7ccc-8ddd-eeeeeeeeeeee")
+        self.assertEqual((report.lines, report.turns, report.done, report.unfinished), (7, 4, 2, 2))
+        self.assertEqual(report.task_durations, [10.0, 30.0, 10.0])
+
+    def test_memory_is_bounded_by_huge_lines(self):
+        huge = _line(self.t0 + 1, "function_call_output", call_id="c1", output="x" * (4 * 1024 * 1024))
+        self.path.write_text("\n".join([user_line(self.t0), huge, done_line(self.t0 + 5)]) + "\n")
+        with mock.patch.object(JsonlTail, "MAX_READ", 64 * 1024), mock.patch.object(JsonlTail, "MAX_LINE", 64 * 1024):
+            tracemalloc.start()
+            try:
+                report = replay_session(str(self.path))
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        self.assertEqual((report.lines, report.turns, report.done), (3, 1, 1))
+        self.assertLess(peak, 1024 * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Run with: python3 -m unittest discover -s tests"""
+
+import os
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+from scheduler import AdaptiveScheduler  # noqa: E402
+from status import CodexStatus, State  # noqa: E402
+
+
+def fake_monitor(**overrides):
+    limits = dict(FREE_SILENCE_S=2, THINKING_S=5, IDLE_S=30, MODEL_STUCK_S=900, D_STUCK_S=10, TOKEN_STALL_S=900)
+    limits.update(overrides)
+    return SimpleNamespace(**limits)
+
+
+class ThresholdTest(unittest.TestCase):
+    def setUp(self):
+        self._env = dict(os.environ)
+        self.addCleanup(lambda: (os.environ.clear(), os.environ.update(self._env)))
+        os.environ.pop("CODEX_STATUS_ADAPTIVE", None)
+        os.environ.pop("CODEX_STATUS_MAX_INTERVAL_S", None)
+
+    def backed_off(self, monitor) -> AdaptiveScheduler:
+        """A scheduler that has backed off to its 30 s maximum in the Idle state."""
+        scheduler = AdaptiveScheduler(monitor, 2.0, event_driven=True)
+        status = CodexStatus(state=State.IDLE, task_s=60, session_silence_s=60)
+        now = 1000.0
+        for _ in range(10):
+            now += scheduler.next_delay(status, now)
+        self.assertEqual(scheduler.next_delay(status, now), scheduler.max_interval)
+        self.now = now
+        return scheduler
+
+    def test_never_steps_past_d_state_deadline(self):
+        monitor = fake_monitor()
+        scheduler = self.backed_off(monitor)
+        status = CodexStatus(state=State.IDLE, task_s=60, session_silence_s=60, d_state_s=3.0)
+        delay = scheduler.next_delay(status, self.now + 1)
+        self.assertLessEqual(delay, monitor.D_STUCK_S - 3.0 + scheduler.THRESHOLD_SLACK_S)
+        self.assertGreater(delay, 0)
+
+    def test_never_steps_past_token_stall_deadline(self):
+        monitor = fake_monitor()
+        scheduler = self.backed_off(monitor)
+        status = CodexStatus(state=State.IDLE, task_s=960, session_silence_s=60, token_silence_s=895.0)
+        delay = scheduler.next_delay(status, self.now + 1)
+        self.assertLessEqual(delay, monitor.TOKEN_STALL_S - 895.0 + scheduler.THRESHOLD_SLACK_S)
+
+    def test_disabled_deadlines_do_not_shorten_backoff(self):
+        monitor = fake_monitor(D_STUCK_S=0, TOKEN_STALL_S=0)
+        scheduler = self.backed_off(monitor)
+        status = CodexStatus(state=State.IDLE, task_s=960, session_silence_s=60, token_silence_s=895.0, d_state_s=3.0)
+        self.assertEqual(scheduler.next_delay(status, self.now + 1), scheduler.max_interval)
+
+
+if __name__ == "__main__":
+    unittest.main()
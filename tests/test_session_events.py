@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Run with: python3 -m unittest discover -s tests"""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+from session_events import (  # noqa: E402
+    ABORT, DONE, ITEM, TOKENS, TOOL_CALL, TOOL_OUTPUT, USER, _decode_json, complete_length, decode_line, parse_ts,
+)
+
+TS = "2025-10-09T08:53:00.123Z"
+EPOCH = 1759999980.123
+REQ_ID = "0123456789abcdef0123456789abcdef"
+
+
+def line(kind: str, payload: dict, ts: str = TS, compact: bool = True) -> bytes:
+    obj = {"timestamp": ts, "type": kind, "payload": payload}
+    return json.dumps(obj, separators=(",", ":") if compact else None).encode()
+
+
+def assistant(text: str) -> dict:
+    return {"type": "message", "role": "assistant", "content": [{"type": "output_text", "text": text}]}
+
+
+# (line type, payload) -> (kind, req_id, call_id, tool, tokens) or None
+CASES = [
+    ("event_msg", {"type": "user_message", "message": "fix it"}, (USER, None, None, None, 0)),
+    ("response_item", {"type": "message", "role": "user", "content": [{"type": "input_text", "text": "hi"}]},
+     (USER, None, None, None, 0)),
+    ("response_item", assistant("Fixed.\n\nCODEX_DONE"), (DONE, None, None, None, 0)),
+    ("response_item", assistant(f"Fixed.\n\nCODEX_DONE: {REQ_ID}\n"), (DONE, REQ_ID, None, None, 0)),
+    ("response_item", assistant("CCB_DONE"), (DONE, None, None, None, 0)),
+    ("response_item", assistant("I will print CODEX_DONE when finished."), (ITEM, None, None, None, 0)),
+    ("response_item", assistant("Looking at the code."), (ITEM, None, None, None, 0)),
+    ("response_item", {"type": "reasoning", "summary": []}, (ITEM, None, None, None, 0)),
+    ("response_item", {"type": "function_call", "name": "shell", "arguments": "{}", "call_id": "call_1"},
+     (TOOL_CALL, None, "call_1", "shell", 0)),
+    ("response_item", {"type": "custom_tool_call", "name": "apply_patch", "input": "*** Begin", "call_id": "call_2"},
+     (TOOL_CALL, None, "call_2", "apply_patch", 0)),
+    ("response_item", {"type": "local_shell_call", "call_id": "call_3", "action": {"type": "exec"}},
+     (TOOL_CALL, None, "call_3", "shell", 0)),
+    ("response_item", {"type": "function_call_output", "call_id": "call_1", "output": "ok"},
+     (TOOL_OUTPUT, None, "call_1", None, 0)),
+    ("response_item", {"type": "custom_tool_call_output", "call_id": "call_2", "output": "ok"},
+     (TOOL_OUTPUT, None, "call_2", None, 0)),
+    ("event_msg", {"type": "exec_command_begin", "call_id": "call_4", "command": ["ls"]},
+     (TOOL_CALL, None, "call_4", "shell", 0)),
+    ("event_msg", {"type": "exec_command_end", "call_id": "call_4", "exit_code": 0},
+     (TOOL_OUTPUT, None, "call_4", None, 0)),
+    ("event_msg", {"type": "turn_aborted", "reason": "interrupted"}, (ABORT, None, None, None, 0)),
+    ("event_msg", {"type": "token_count", "info": {"total_token_usage": {"input_tokens": 900, "output_tokens": 321}}},
+     (TOKENS, None, None, None, 321)),
+    ("event_msg", {"type": "token_count", "info": None}, None),
+    ("event_msg", {"type": "agent_reasoning", "text": "thinking"}, None),
+    ("session_meta", {"id": "0199aaaa-bbbb-7ccc-8ddd-eeeeeeeeeeee", "cwd": "/tmp"}, None),
+    ("turn_context", {"cwd": "/tmp"}, None),
+]
+
+
+def fields(event):
+    if event is None:
+        return None
+    return (event.kind, event.req_id, event.call_id, event.tool if event.kind == TOOL_CALL else None, event.tokens)
+
+
+class DecodeLineTest(unittest.TestCase):
+    def test_line_types(self):
+        for kind, payload, expected in CASES:
+            with self.subTest(type=payload.get("type", kind)):
+                event = decode_line(line(kind, payload))
+                self.assertEqual(fields(event), expected)
+                if event is not None:
+                    self.assertAlmostEqual(event.ts, EPOCH, places=6)
+
+    def test_other_layouts_keep_turn_boundaries(self):
+        # Codex writes compact JSON; any other layout still yields the events that delimit turns.
+        for kind, payload, expected in CASES:
+            with self.subTest(type=payload.get("type", kind)):
+                event = decode_line(line(kind, payload, compact=False))
+                if expected is not None and expected[0] in (USER, DONE, ABORT):
+                    self.assertEqual(fields(event), expected)
+                    self.assertAlmostEqual(event.ts, EPOCH, places=6)
+                elif event is not None:
+                    self.assertEqual(fields(event), expected)
+
+    def test_matches_full_json_decode(self):
+        # decode_line's byte-level paths must agree with json.loads wherever both give an event.
+        for kind, payload, _ in CASES:
+            raw = line(kind, payload)
+            expected = _decode_json(raw)
+            if expected is not None:
+                with self.subTest(type=payload.get("type", kind)):
+                    self.assertEqual(fields(decode_line(raw)), fields(expected))
+
+    def test_timestamp_precision(self):
+        payload = {"type": "user_message", "message": "hi"}
+        for ts, epoch in (
+            ("2025-10-09T08:53:00Z", 1759999980.0),
+            ("2025-10-09T08:53:00.5Z", 1759999980.5),
+            ("2025-10-09T08:53:00.123456Z", 1759999980.123456),
+            ("2025-10-09T08:53:00.123456789Z", 1759999980.123456789),
+            ("2025-10-09T10:53:00.250+02:00", 1759999980.25),
+        ):
+            with self.subTest(ts=ts):
+                self.assertAlmostEqual(decode_line(line("event_msg", payload, ts=ts)).ts, epoch, places=6)
+
+    def test_bad_lines(self):
+        for raw in (b"", b"{", b"[]", b"not json", b'{"timestamp":"yesterday","type":"event_msg"}',
+                    line("event_msg", {"type": "user_message"}, ts="2025-13-40T00:00:00Z")):
+            with self.subTest(raw=raw):
+                self.assertIsNone(decode_line(raw))
+
+    def test_tool_output_is_decoded_from_its_head(self):
+        # A huge output cut at MAX_LINE is no longer valid JSON.
+        raw = line("response_item", {"type": "function_call_output", "call_id": "call_9", "output": "x" * 10000})
+        self.assertEqual(fields(decode_line(raw[:2000])), (TOOL_OUTPUT, None, "call_9", None, 0))
+
+
+class ParseTsTest(unittest.TestCase):
+    def test_formats(self):
+        cases = {
+            "2025-10-09T08:53:00Z": 1759999980.0,
+            "2025-10-09T08:53:00.5Z": 1759999980.5,
+            "2025-10-09T08:53:00.000001Z": 1759999980.000001,
+            "2025-10-09T10:53:00+02:00": 1759999980.0,
+            "2025-10-09T08:53:00.5+00:00": 1759999980.5,
+        }
+        for ts, epoch in cases.items():
+            with self.subTest(ts=ts):
+                self.assertAlmostEqual(parse_ts(ts), epoch, places=6)
+
+    def test_cached_second_is_reused_with_other_fractions(self):
+        self.assertAlmostEqual(parse_ts("2025-10-09T08:53:00.100Z"), 1759999980.1)
+        self.assertAlmostEqual(parse_ts("2025-10-09T08:53:00.900Z"), 1759999980.9)
+
+    def test_invalid(self):
+        for ts in ("", "garbage", "2025-13-01T00:00:00Z", "2025-10-09T08:53:00.12xZ"):
+            with self.subTest(ts=ts):
+                self.assertIsNone(parse_ts(ts))
+
+
+class CompleteLengthTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "rollout.jsonl"
+
+    def length(self, data: bytes, block: int = 64 * 1024) -> int:
+        self.path.write_bytes(data)
+        return complete_length(str(self.path), block=block)
+
+    def test_lengths(self):
+        self.assertEqual(self.length(b""), 0)
+        self.assertEqual(self.length(b"partial"), 0)
+        self.assertEqual(self.length(b"one\ntwo\n"), 8)
+        self.assertEqual(self.length(b"one\ntwo\nthr"), 8)
+
+    def test_partial_line_longer_than_block(self):
+        self.assertEqual(self.length(b"one\n" + b"x" * 100, block=16), 4)
+        self.assertEqual(self.length(b"x" * 100, block=16), 0)
+
+    def test_missing_file(self):
+        self.assertEqual(complete_length(str(self.path)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Run with: python3 -m unittest discover -s tests"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+import status_store  # noqa: E402
+from status import CodexStatus, State  # noqa: E402
+from status_store import StatusPublisher, read_status_file  # noqa: E402
+
+
+class ReadStatusFileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self._env = dict(os.environ)
+        self.addCleanup(lambda: (os.environ.clear(), os.environ.update(self._env)))
+        os.environ["XDG_CACHE_HOME"] = self.tmp.name
+        self.publisher = StatusPublisher(os.getpid(), "test", cwd=self.tmp.name)
+        self.addCleanup(self.publisher.close)
+
+    def test_reads_published_status(self):
+        self.publisher.publish(CodexStatus(state=State.RUNNING, pid=os.getpid()))
+        doc = read_status_file(self.publisher.path)
+        self.assertEqual(doc["status"]["state"], "running")
+
+    def test_retries_while_a_write_is_in_progress(self):
+        self.publisher.publish(CodexStatus(state=State.RUNNING, pid=os.getpid()))
+        mm = self.publisher._mm
+        _, _, seq, length = status_store._HEADER.unpack_from(mm, 0)
+        # The writer's first header update: odd sequence, length 0.
+        status_store._HEADER.pack_into(mm, 0, status_store.MAGIC, status_store.VERSION, seq + 1, 0)
+
+        def finish_write(_):
+            status_store._HEADER.pack_into(mm, 0, status_store.MAGIC, status_store.VERSION, seq + 2, length)
+
+        with mock.patch.object(status_store.time, "sleep", side_effect=finish_write) as sleep:
+            doc = read_status_file(self.publisher.path)
+        self.assertTrue(sleep.called)
+        self.assertEqual(doc["status"]["state"], "running")
+
+    def test_gives_up_on_a_write_that_never_finishes(self):
+        self.publisher.publish(CodexStatus(state=State.RUNNING, pid=os.getpid()))
+        status_store._HEADER.pack_into(self.publisher._mm, 0, status_store.MAGIC, status_store.VERSION, 7, 0)
+        with mock.patch.object(status_store.time, "sleep"):
+            self.assertIsNone(read_status_file(self.publisher.path, retries=3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Run with: python3 -m unittest discover -s tests"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+from titles import TmuxControl, _tmux_version  # noqa: E402
+
+
+@unittest.skipUnless(shutil.which("tmux") and _tmux_version() >= TmuxControl.CONTROL_MIN_VERSION, "needs tmux >= 3.2")
+class TmuxControlTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.socket = str(Path(tmp.name) / "tmux.sock")
+        self.tmux("new-session", "-d", "-s", "user", "sleep 300")
+        self.addCleanup(lambda: self.tmux("kill-server"))
+
+    def tmux(self, *args: str) -> str:
+        return subprocess.run(["tmux", "-S", self.socket, *args], capture_output=True, text=True).stdout
+
+    def sessions(self) -> str:
+        return self.tmux("list-sessions", "-F", "#{session_name}:#{session_attached}")
+
+    def test_processes_share_one_control_session(self):
+        controls = [TmuxControl(self.socket) for _ in range(3)]
+        for i, ctl in enumerate(controls):
+            self.addCleanup(ctl.close)
+            self.assertEqual(ctl.run([["display-message", "-p", str(i)]]), [[str(i)]])
+        self.assertEqual(sorted(self.sessions().split()), [f"{TmuxControl.SESSION}:3", "user:0"])
+        for ctl in controls:
+            ctl.close()
+        self.assertEqual(self.sessions().split(), ["user:0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
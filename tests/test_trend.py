@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Run with: python3 -m unittest discover -s tests"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+from monitor import CodexMonitor  # noqa: E402
+from renderer import render_detail, render_title  # noqa: E402
+from status import CodexStatus, State  # noqa: E402
+from trend import Trend  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def trend_of(values, step_s: float = 60.0, window_s: float = 1800.0) -> Trend:
+    trend = Trend(window_s)
+    for i, value in enumerate(values):
+        trend.add(1000.0 + i * step_s, value)
+    return trend
+
+
+class TrendTest(unittest.TestCase):
+    def test_steady_growth(self):
+        # 200 MB -> 500 MB over 30 minutes.
+        trend = trend_of([200 * MB + i * 10 * MB for i in range(31)])
+        slope, r2 = trend.fit()
+        self.assertAlmostEqual(slope, 10 * MB / 60)
+        self.assertAlmostEqual(r2, 1.0)
+        self.assertAlmostEqual(trend.per_hour(), 600 * MB)
+        self.assertTrue(trend.growing(0.25, 128 * MB))
+
+    def test_growth_below_thresholds(self):
+        trend = trend_of([1000 * MB + i * MB for i in range(31)])  # +30 MB on 1 GB
+        self.assertFalse(trend.growing(0.25, 128 * MB))
+        self.assertTrue(trend.growing(0.01, 16 * MB))
+
+    def test_needs_half_the_window(self):
+        steep = [200 * MB + i * 50 * MB for i in range(14)]
+        self.assertFalse(trend_of(steep).growing(0.25, 128 * MB))
+        self.assertTrue(trend_of(steep + [900 * MB, 950 * MB]).growing(0.25, 128 * MB))
+
+    def test_flat_spike_and_sawtooth_are_not_growth(self):
+        cases = {
+            "flat": [300 * MB] * 31,
+            "spike": [300 * MB] * 30 + [900 * MB],
+            "sawtooth": [300 * MB + (i % 5) * 60 * MB for i in range(31)],
+            "shrinking": [900 * MB - i * 10 * MB for i in range(31)],
+        }
+        for name, values in cases.items():
+            with self.subTest(name):
+                self.assertFalse(trend_of(values).growing(0.25, 128 * MB))
+
+    def test_fit_needs_three_points(self):
+        self.assertEqual(trend_of([1, 1000]).fit(), (0.0, 0.0))
+        self.assertEqual(Trend().per_hour(), 0.0)
+
+    def test_points_are_throttled_and_expire(self):
+        trend = Trend(window_s=100.0)
+        for ts in range(0, 300):
+            trend.add(float(ts), float(ts))
+        self.assertEqual(len(trend.points), 21)  # one per MIN_STEP_S over the last 100 s
+        self.assertEqual(trend.span_s(), 100.0)
+        self.assertEqual(trend.points[0], (195.0, 195.0))
+
+    def test_fit_is_recomputed_after_add(self):
+        trend = trend_of([10, 20, 30])
+        self.assertAlmostEqual(trend.fit()[0], 10 / 60)
+        trend.add(1000.0 + 3 * 60, 100)
+        self.assertGreater(trend.fit()[0], 10 / 60)
+
+
+class _StubTrend:
+    def __init__(self, growing: bool):
+        self._growing = growing
+        self.asked = []
+
+    def add(self, ts, value):
+        pass
+
+    def per_hour(self) -> float:
+        return 600.0 * MB if self._growing else 0.0
+
+    def growing(self, min_ratio, min_abs) -> bool:
+        self.asked.append((min_ratio, min_abs))
+        return self._growing
+
+
+@unittest.skipUnless(sys.platform.startswith("linux") and shutil.which("sleep"), "needs Linux /proc and sleep(1)")
+class BloatFlagTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self._env = dict(os.environ)
+        self.addCleanup(lambda: (os.environ.clear(), os.environ.update(self._env)))
+        os.environ["CODEX_HOME"] = tmp.name
+        os.environ["XDG_CACHE_HOME"] = tmp.name
+        proc = subprocess.Popen(["sleep", "60"])
+        self.addCleanup(lambda: (proc.kill(), proc.wait()))
+        self.pid = proc.pid
+
+    def monitor(self, rss_growing: bool, fds_growing: bool) -> CodexMonitor:
+        monitor = CodexMonitor(pid=self.pid)
+        monitor._detect_session_file = lambda pid: None
+        monitor.sample()
+        monitor.sampler.rss_trend = _StubTrend(rss_growing)
+        monitor.sampler.fd_trend = _StubTrend(fds_growing)
+        return monitor
+
+    def test_rss_or_fd_growth_raises_bloat(self):
+        for rss, fds in ((True, False), (False, True)):
+            with self.subTest(rss=rss, fds=fds):
+                monitor = self.monitor(rss, fds)
+                self.assertTrue(monitor.sample().bloat)
+        monitor = self.monitor(True, False)
+        monitor.sample()
+        self.assertEqual(monitor.sampler.rss_trend.asked, [(monitor.BLOAT_RSS_RATIO, monitor.BLOAT_RSS_MIN_BYTES)])
+
+    def test_no_growth(self):
+        self.assertFalse(self.monitor(False, False).sample().bloat)
+
+    def test_window_zero_turns_it_off(self):
+        os.environ["CODEX_STATUS_BLOAT_WINDOW_S"] = "0"
+        self.assertFalse(self.monitor(True, True).sample().bloat)
+
+
+class BloatRenderTest(unittest.TestCase):
+    def test_shown_in_title_and_detail(self):
+        status = CodexStatus(state=State.RUNNING, pid=1, rss_bytes=700 * MB, rss_per_h=600 * MB, bloat=True)
+        self.assertIn("Bloat", render_title(status))
+        self.assertIn("Bloat: sustained growth", render_detail(status))
+        status.bloat = False
+        self.assertNotIn("Bloat", render_title(status))
+        self.assertNotIn("Bloat", render_detail(status))
+
+
+if __name__ == "__main__":
+    unittest.main()
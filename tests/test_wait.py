@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Run with: python3 -m unittest discover -s tests"""
+
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO / "lib"))
+
+from test_monitor import done_line, user_line  # noqa: E402
+
+# argv[0] of the fake Codex: auto-detection looks for the vendored binary's path.
+CODEX_ARGV0 = "/usr/lib/node_modules/@openai/codex/vendor/x86_64-unknown-linux-musl/codex/codex"
+SID = "0199aaaa-bbbb-7ccc-8ddd-eeeeeeeeeeee"
+REQ_ID = "0123456789abcdef0123456789abcdef"
+
+
+@unittest.skipUnless(sys.platform.startswith("linux") and shutil.which("sleep"), "needs Linux /proc and sleep(1)")
+class WaitExitCodeTest(unittest.TestCase):
+    """`codex-status wait` against a fake Codex (`sleep` named like Codex) and a session file in its cwd."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        root = Path(self.tmp.name)
+        self.work = root / "work"
+        self.work.mkdir()
+        self.env = dict(os.environ)
+        self.env.update({
+            "HOME": str(root / "home"),
+            "CODEX_HOME": str(root / "codex"),
+            "XDG_CACHE_HOME": str(root / "cache"),
+            "CODEX_STATUS_WEZTERM_MODE": "off",
+            "CODEX_STATUS_TMUX_MODE": "off",
+        })
+        self.env.pop("TMUX", None)
+        self.sessions = root / "codex" / "sessions" / time.strftime("%Y/%m/%d")
+        self.sessions.mkdir(parents=True)
+        self.t0 = time.time() - 30
+
+    def codex(self) -> subprocess.Popen:
+        proc = subprocess.Popen([CODEX_ARGV0, "60"], executable=shutil.which("sleep"), cwd=str(self.work))
+        self.addCleanup(lambda: (proc.kill(), proc.wait()))
+        time.sleep(0.1)
+        return proc
+
+    def session(self, *lines: str, sid: str = SID) -> Path:
+        meta = (
+            f'{{"timestamp":"2025-10-09T08:53:00.000Z","type":"session_meta",'
+            f'"payload":{{"id":"{sid}","cwd":"{self.work}","timestamp":"2025-10-09T08:53:00.000Z"}}}}'
+        )
+        path = self.sessions / f"rollout-{time.strftime('%Y-%m-%dT%H-%M-%S')}-{sid}.jsonl"
+        path.write_text("".join(line + "\n" for line in (meta,) + lines))
+        return path
+
+    def wait(self, *args: str) -> int:
+        cmd = [sys.executable, str(REPO / "bin" / "codex-status"), "wait", "-q", "-i", "0.2", *args]
+        return subprocess.run(cmd, env=self.env, cwd=str(self.work), timeout=30).returncode
+
+    def test_done_marker_already_written(self):
+        proc = self.codex()
+        self.session(user_line(self.t0), done_line(self.t0 + 1).replace("CODEX_DONE", f"CODEX_DONE: {REQ_ID}"))
+        self.assertEqual(self.wait("--until", "done", "--req-id", REQ_ID, "-p", str(proc.pid), "--timeout", "5"), 0)
+
+    def test_done_without_req_id_when_codex_is_idle(self):
+        proc = self.codex()
+        self.session(user_line(self.t0), done_line(self.t0 + 1))
+        self.assertEqual(self.wait("--until", "done", "-p", str(proc.pid), "--timeout", "5"), 0)
+
+    def test_exited(self):
+        proc = self.codex()
+        self.session(user_line(time.time()))
+        threading.Timer(0.5, proc.kill).start()
+        self.assertEqual(self.wait("--until", "done", "-p", str(proc.pid), "--timeout", "10"), 1)
+
+    def test_stuck(self):
+        proc = self.codex()
+        self.session(user_line(time.time()))
+        os.kill(proc.pid, signal.SIGSTOP)
+        self.addCleanup(lambda: os.kill(proc.pid, signal.SIGCONT))
+        self.assertEqual(self.wait("--until", "done", "-p", str(proc.pid), "--timeout", "10"), 2)
+
+    def test_not_found(self):
+        proc = self.codex()
+        proc.kill()
+        proc.wait()
+        self.assertEqual(self.wait("--until", "done", "-p", str(proc.pid), "--timeout", "5"), 3)
+
+    def test_timeout_while_request_pending(self):
+        proc = self.codex()
+        self.session(user_line(time.time()))
+        self.assertEqual(self.wait("--until", "done", "-p", str(proc.pid), "--timeout", "1"), 124)
+
+    def test_follows_published_codex(self):
+        # Auto-detection would pick the lowest pid; the published status names the other one.
+        other = self.codex()
+        proc = self.codex()
+        self.assertLess(other.pid, proc.pid)
+        session = self.session(user_line(time.time()))
+        saved = dict(os.environ)
+        self.addCleanup(lambda: (os.environ.clear(), os.environ.update(saved)))
+        os.environ.update({k: self.env[k] for k in ("CODEX_HOME", "XDG_CACHE_HOME")})
+        from status import CodexStatus, State
+        from status_store import StatusPublisher
+
+        publisher = StatusPublisher(proc.pid, "test", cwd=str(self.work))
+        self.addCleanup(publisher.close)
+        publisher.publish(CodexStatus(state=State.RUNNING, pid=proc.pid), monitor=_Published(session))
+        threading.Timer(0.5, proc.kill).start()
+        self.assertEqual(self.wait("--until", "exited", "--timeout", "10"), 0)
+
+
+class _Published:
+    """The monitor attributes StatusPublisher.publish reads."""
+
+    def __init__(self, session_file: Path):
+        self.session_file = session_file
+        self.profiler = type("Profiler", (), {"enabled": False})()
+
+
+if __name__ == "__main__":
+    unittest.main()